@@ -8,6 +8,8 @@ import datetime
 import os
 from dotenv import load_dotenv
 import asyncio
+from persistence import scheduler
+from snapshots import load_snapshot, write_snapshot
 
 # -------------------------------
 # LOAD ENVIRONMENT VARIABLES
@@ -66,64 +68,41 @@ user_cooldowns = {}
 user_loot_history = {}
 
 def load_data():
+    """Load the newest snapshot generation that passes its checksum."""
     global user_cooldowns, user_loot_history
-    if os.path.exists(DATA_FILE):
-        try:
-            with open(DATA_FILE, "r") as f:
-                raw_data = f.read()
-                data = json.loads(raw_data)
-                
-            user_cooldowns = {
-                int(k): datetime.datetime.fromisoformat(v).astimezone(datetime.timezone.utc)
-                for k, v in data.get("cooldowns", {}).items()
-            }
-            user_loot_history = {
-                int(k): [
-                    (i, v, datetime.datetime.fromisoformat(t).astimezone(datetime.timezone.utc))
-                    for i, v, t in v_list
-                ]
-                for k, v_list in data.get("history", {}).items()
-            }
-
-        except json.JSONDecodeError as e:
-            print(f"[WARNING] loot_data.json is corrupted: {e}. Attempting partial recovery...")
-            try:
-                
-                recovered_data = None
-                for line in raw_data.splitlines():
-                    try:
-                        recovered_data = json.loads(line)
-                        break
-                    except:
-                        continue
-                if recovered_data:
-                    user_cooldowns = {
-                        int(k): datetime.datetime.fromisoformat(v).astimezone(datetime.timezone.utc)
-                        for k, v in recovered_data.get("cooldowns", {}).items()
-                    }
-                    user_loot_history = {
-                        int(k): [
-                            (i, v, datetime.datetime.fromisoformat(t).astimezone(datetime.timezone.utc))
-                            for i, v, t in v_list
-                        ]
-                        for k, v_list in recovered_data.get("history", {}).items()
-                    }
-                    print("[INFO] Successfully recovered partial data.")
-                else:
-                    print("[ERROR] Could not recover any data. Please fix loot_data.json manually.")
-            except Exception as ex:
-                print(f"[ERROR] Failed to recover data: {ex}")
+    data = load_snapshot(DATA_FILE)
+    if data is None:
+        return
 
-def save_data():
-    data = {
+    user_cooldowns = {
+        int(k): datetime.datetime.fromisoformat(v).astimezone(datetime.timezone.utc)
+        for k, v in data.get("cooldowns", {}).items()
+    }
+    user_loot_history = {
+        int(k): [
+            (i, v, datetime.datetime.fromisoformat(t).astimezone(datetime.timezone.utc))
+            for i, v, t in v_list
+        ]
+        for k, v_list in data.get("history", {}).items()
+    }
+
+def build_snapshot():
+    return {
         "cooldowns": {str(k): v.isoformat() for k, v in user_cooldowns.items()},
         "history": {
             str(k): [(i, v, t.isoformat()) for i, v, t in v_list]
             for k, v_list in user_loot_history.items()
         },
     }
-    with open(DATA_FILE, "w") as f:
-        json.dump(data, f, indent=4)
+
+def write_data(data):
+    write_snapshot(DATA_FILE, data)
+
+def save_data():
+    """Queue a write-behind save; the scheduler coalesces bursts into one flush."""
+    scheduler.mark_dirty(DATA_FILE)
+
+scheduler.register(DATA_FILE, build_snapshot, write_data)
 
 
 load_data()
@@ -554,9 +533,11 @@ async def retry_command(ctx, target: discord.Member):
 # RUN BOT
 # -------------------------------
 async def main():
+    scheduler.start()
     try:
         await bot.start(TOKEN)
     finally:
         await notify_offline()
+        await scheduler.shutdown()
 
 asyncio.run(main())
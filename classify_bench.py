@@ -0,0 +1,164 @@
+"""
+Benchmark for the embed classification pipeline (embed_rules.py).
+
+Builds synthetic channel traffic (plain chatter, unrelated bot embeds,
+forwarded posts, and Karuta work completions crediting users by mention or
+by @username) and reports messages per second for the old per-message code
+in worked_command next to the Classifier.
+
+    python classify_bench.py                               # 50k messages, 5k members
+    python classify_bench.py --messages 200000 --members 20000
+    python classify_bench.py --match-rate 0.3 --username-rate 0.5
+"""
+
+import argparse
+import random
+import re
+import sys
+import time
+from types import SimpleNamespace
+
+import discord
+
+from embed_rules import Classifier, ForwardedRule, WorkCompletionRule, WORK_PHRASE
+
+# ----------------------------
+# Synthetic traffic
+# ----------------------------
+
+FILLER = (
+    "**Card dropped!** React to grab it.",
+    "> _Wishlist_ alert for ~~someone~~ everyone",
+    "Your **daily** reward is ready | claim it with `kdaily`",
+    "The festival has started! Visit the *shop* for limited frames.",
+)
+
+
+def make_members(count: int, rng: random.Random):
+    return [
+        SimpleNamespace(id=10**17 + i, name=f"user{rng.randrange(10**6)}_{i}")
+        for i in range(count)
+    ]
+
+
+def make_messages(count: int, members, match_rate: float, username_rate: float,
+                  forwarded_rate: float, rng: random.Random):
+    messages = []
+    for _ in range(count):
+        roll = rng.random()
+        flags = SimpleNamespace(forwarded=False)
+        if roll < match_rate:
+            credited = rng.sample(members, rng.randint(1, 3))
+            if rng.random() < username_rate:
+                who = " ".join(f"@{m.name}" for m in credited)
+            else:
+                who = " ".join(f"<@{m.id}>" for m in credited)
+            desc = f"**{WORK_PHRASE.capitalize()}!**\n{who}\n> _Collect_ your ~~rewards~~ now"
+            message = SimpleNamespace(author=SimpleNamespace(bot=True, id=1), flags=flags,
+                                      embeds=[SimpleNamespace(title=None, description=desc)])
+        elif roll < match_rate + forwarded_rate:
+            flags.forwarded = True
+            message = SimpleNamespace(author=SimpleNamespace(bot=False, id=2), flags=flags, embeds=[])
+        elif rng.random() < 0.5:
+            message = SimpleNamespace(author=SimpleNamespace(bot=True, id=1), flags=flags,
+                                      embeds=[SimpleNamespace(title="Karuta", description=rng.choice(FILLER))])
+        else:
+            message = SimpleNamespace(author=SimpleNamespace(bot=False, id=3), flags=flags, embeds=[])
+        messages.append(message)
+    return messages
+
+
+# ----------------------------
+# Old code path (worked_command before the pipeline)
+# ----------------------------
+
+def legacy_strip_markdown(text):
+    if not text:
+        return ""
+    text = re.sub(r"[*_~>|]", "", text)
+    text = text.replace("", "")
+    text = text.replace("\n", "").strip()
+    return text
+
+
+def legacy_count(messages, members):
+    user_counts = {}
+    matched = 0
+    for message in messages:
+        if not message.embeds:
+            continue
+        if message.author.bot:
+            for e in message.embeds:
+                desc = legacy_strip_markdown(e.description.lower() if e.description else "")
+                if WORK_PHRASE.lower() in desc:
+                    matched += 1
+                    original_desc = e.description or ""
+                    mentions = re.findall(r"<@!?(\d+)>", original_desc)
+                    if mentions:
+                        for uid in mentions:
+                            user_counts[int(uid)] = user_counts.get(int(uid), 0) + 1
+                    else:
+                        for username in re.findall(r"@(\w+)", original_desc):
+                            member = discord.utils.find(lambda m: m.name.lower() == username.lower(), members)
+                            if member:
+                                user_counts[member.id] = user_counts.get(member.id, 0) + 1
+    return matched, user_counts
+
+
+def pipeline_count(messages, members):
+    names = {m.name.lower(): m.id for m in members}
+    classifier = Classifier([WorkCompletionRule(), ForwardedRule()], resolve=lambda u: names.get(u.lower()))
+    user_counts = {}
+    matched = 0
+    for rule_name, _, result in classifier.run(messages):
+        if rule_name != "work_completion":
+            continue
+        matched += 1
+        for uid in result:
+            user_counts[uid] = user_counts.get(uid, 0) + 1
+    return matched, user_counts
+
+
+# ----------------------------
+# CLI
+# ----------------------------
+
+def timed(fn, *args):
+    started = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - started
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Messages/second for embed classification.")
+    parser.add_argument("--messages", type=int, default=50_000, help="synthetic messages to classify")
+    parser.add_argument("--members", type=int, default=5_000, help="guild size for @username lookups")
+    parser.add_argument("--match-rate", type=float, default=0.1, help="share of messages that are work completions")
+    parser.add_argument("--username-rate", type=float, default=0.2,
+                        help="share of completions that credit by @username instead of mention")
+    parser.add_argument("--forwarded-rate", type=float, default=0.05, help="share of forwarded posts")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args(argv)
+
+    rng = random.Random(args.seed)
+    members = make_members(args.members, rng)
+    messages = make_messages(args.messages, members, args.match_rate, args.username_rate,
+                             args.forwarded_rate, rng)
+
+    (old_matched, old_counts), old_s = timed(legacy_count, messages, members)
+    (new_matched, new_counts), new_s = timed(pipeline_count, messages, members)
+
+    print(f"{args.messages:,} messages, {args.members:,} members, "
+          f"{args.match_rate:.0%} completions ({args.username_rate:.0%} by username)")
+    print(f"  legacy    {old_s * 1000:9.1f} ms  {args.messages / old_s:12,.0f} msg/s")
+    print(f"  pipeline  {new_s * 1000:9.1f} ms  {args.messages / new_s:12,.0f} msg/s  ({old_s / new_s:.1f}x)")
+
+    if (old_matched, old_counts) != (new_matched, new_counts):
+        print("  MISMATCH between legacy and pipeline results")
+        return 1
+    print(f"  results agree: {new_matched:,} completions, {len(new_counts):,} users credited")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
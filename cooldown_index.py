@@ -0,0 +1,185 @@
+import asyncio
+import heapq
+from datetime import datetime, timedelta, timezone
+
+# ----------------------------
+# Cooldown expiry index
+# ----------------------------
+
+class CooldownIndex:
+    """
+    Min-heap of (ready_at, user_id), kept next to user_cooldowns.
+
+    - set() is O(log n); an older heap entry for the same user is left in
+      place and skipped later (lazy deletion), so nothing is ever searched.
+    - pop_due() hands back users whose cooldown just ran out, in order.
+    - upcoming() walks the heap best-first and stops after k live entries,
+      so "who is ready in the next hour" costs O(k log n), not a full scan.
+
+    Users that have expired but not opened again sit in `ready` until their
+    next open, which answers "who is eligible right now" directly.
+
+    discard() parks a user who can't open at all right now (left the server,
+    stopped boosting), so expiry and eligibility queries never walk past
+    them; restore() puts them back. ready_at() still answers for parked users.
+    """
+
+    def __init__(self, cooldown_seconds: int):
+        self.cooldown = timedelta(seconds=cooldown_seconds)
+        self._heap = []
+        self._ready_at = {}   # user_id -> ready_at (datetime) for live heap entries
+        self.ready = {}       # user_id -> ready_at for users already eligible
+        self._parked = {}     # user_id -> ready_at for discarded users
+        self._changed = None
+
+    # ------------
+    # Updates
+    # ------------
+
+    def load(self, cooldowns: dict, now: datetime | None = None):
+        """Rebuild from {user_id: last_open}; O(n) heapify."""
+        now = now or datetime.now(timezone.utc)
+        self._heap = []
+        self._ready_at = {}
+        self.ready = {}
+        self._parked = {}
+        expired = []
+        for user_id, last_open in cooldowns.items():
+            ready_at = last_open + self.cooldown
+            if ready_at <= now:
+                expired.append((ready_at, user_id))
+            else:
+                self._ready_at[user_id] = ready_at
+                self._heap.append((ready_at, user_id))
+        heapq.heapify(self._heap)
+        for ready_at, user_id in sorted(expired):
+            self.ready[user_id] = ready_at
+        self._wake()
+
+    def set(self, user_id: int, last_open: datetime):
+        ready_at = last_open + self.cooldown
+        self.ready.pop(user_id, None)
+        self._parked.pop(user_id, None)
+        self._ready_at[user_id] = ready_at
+        heapq.heappush(self._heap, (ready_at, user_id))
+        if self._heap[0][1] == user_id:
+            self._wake()
+
+    def ready_at(self, user_id: int):
+        """When `user_id` can open again, or None if they never opened."""
+        return self._ready_at.get(user_id) or self.ready.get(user_id) or self._parked.get(user_id)
+
+    def discard(self, user_id: int):
+        """Park a user; their heap entry goes stale and is skipped like any replaced one."""
+        ready_at = self._ready_at.pop(user_id, None) or self.ready.pop(user_id, None)
+        if ready_at is not None:
+            self._parked[user_id] = ready_at
+
+    def restore(self, user_id: int, now: datetime | None = None):
+        """Undo discard(): back into the heap, or into `ready` if the cooldown ended meanwhile."""
+        ready_at = self._parked.pop(user_id, None)
+        if ready_at is None:
+            return
+        now = now or datetime.now(timezone.utc)
+        if ready_at > now:
+            self._ready_at[user_id] = ready_at
+            heapq.heappush(self._heap, (ready_at, user_id))
+            if self._heap[0][1] == user_id:
+                self._wake()
+            return
+        out_of_order = self.ready and ready_at < next(reversed(self.ready.values()))
+        self.ready[user_id] = ready_at
+        if out_of_order:
+            # `ready` is kept oldest first for ready_since(); restores are rare, so just re-sort.
+            self.ready = dict(sorted(self.ready.items(), key=lambda item: item[1]))
+
+    # ------------
+    # Expiry
+    # ------------
+
+    def _prune(self):
+        while self._heap and self._ready_at.get(self._heap[0][1]) != self._heap[0][0]:
+            heapq.heappop(self._heap)
+
+    def next_due(self):
+        self._prune()
+        return self._heap[0][0] if self._heap else None
+
+    def pop_due(self, now: datetime | None = None):
+        """Pop every user whose cooldown has ended; returns [(user_id, ready_at)]."""
+        now = now or datetime.now(timezone.utc)
+        due = []
+        self._prune()
+        while self._heap and self._heap[0][0] <= now:
+            ready_at, user_id = heapq.heappop(self._heap)
+            del self._ready_at[user_id]
+            self.ready[user_id] = ready_at
+            due.append((user_id, ready_at))
+            self._prune()
+        return due
+
+    async def wait_due(self):
+        """Sleep until the earliest cooldown ends (or an earlier one is added)."""
+        if self._changed is None:
+            self._changed = asyncio.Event()
+        while True:
+            self._changed.clear()
+            due = self.next_due()
+            delay = None if due is None else (due - datetime.now(timezone.utc)).total_seconds()
+            if delay is not None and delay <= 0:
+                return
+            try:
+                await asyncio.wait_for(self._changed.wait(), timeout=delay)
+            except asyncio.TimeoutError:
+                return
+
+    def _wake(self):
+        if self._changed is not None:
+            self._changed.set()
+
+    # ------------
+    # Queries
+    # ------------
+
+    def upcoming(self, within: timedelta, k: int, now: datetime | None = None, keep=None):
+        """Up to k (user_id, ready_at) becoming eligible within `within`, soonest first."""
+        now = now or datetime.now(timezone.utc)
+        horizon = now + within
+        heap = self._heap
+        out = []
+        listed = set()  # a restored user can have a stale twin of their live entry
+        frontier = [(heap[0], 0)] if heap else []
+        # Best-first walk over the heap array: a child is never earlier than its parent.
+        while frontier and len(out) < k:
+            (ready_at, user_id), i = heapq.heappop(frontier)
+            if ready_at > horizon:
+                break
+            if (self._ready_at.get(user_id) == ready_at and user_id not in listed
+                    and (keep is None or keep(user_id))):
+                listed.add(user_id)
+                out.append((user_id, ready_at))
+            for child in (2 * i + 1, 2 * i + 2):
+                if child < len(heap):
+                    heapq.heappush(frontier, (heap[child], child))
+        return out
+
+    def ready_since(self, since: datetime):
+        """(user_id, ready_at) that became eligible after `since`, newest first."""
+        out = []
+        for user_id in reversed(self.ready):
+            ready_at = self.ready[user_id]
+            if ready_at < since:
+                break
+            out.append((user_id, ready_at))
+        return out
+
+    def eligible_now(self, k: int, keep=None):
+        """Up to k (user_id, ready_at) already eligible, longest-waiting first."""
+        out = []
+        for user_id, ready_at in self.ready.items():
+            if keep is not None and not keep(user_id):
+                continue
+            out.append((user_id, ready_at))
+            if len(out) >= k:
+                break
+        return out
@@ -0,0 +1,179 @@
+import asyncio
+import heapq
+import time
+import traceback
+from datetime import datetime
+
+# ----------------------------
+# CONFIG
+# ----------------------------
+
+MIN_REFRESH_SECONDS = 5.0        # fastest any one countdown message is re-rendered
+CHANNEL_EDIT_SPACING = 1.0       # seconds of edit budget per live countdown in a channel
+
+
+def relative_timestamp(when: datetime) -> str:
+    """Discord renders this as a live "in 12 seconds" that the client counts down itself."""
+    return f"<t:{int(when.timestamp())}:R>"
+
+
+# ----------------------------
+# Countdown
+# ----------------------------
+
+class Countdown:
+    __slots__ = ("key", "deadline", "channel_id", "on_expire", "refresh", "next_refresh", "live")
+
+    def __init__(self, key, deadline: float, channel_id, on_expire, refresh):
+        self.key = key
+        self.deadline = deadline
+        self.channel_id = channel_id
+        self.on_expire = on_expire
+        self.refresh = refresh
+        self.next_refresh = None
+        self.live = True
+
+    def remaining(self) -> float:
+        return max(0.0, self.deadline - time.time())
+
+
+# ----------------------------
+# Ticker
+# ----------------------------
+
+class CountdownTicker:
+    """
+    One task drives every live countdown in the bot.
+
+    - start() registers a deadline and an on_expire coroutine; nothing else
+      needs its own sleep loop.
+    - claim(key) is the single point of resolution: whichever of "button
+      pressed" or "deadline passed" claims first wins, the other gets False,
+      so a timeout resolves exactly once.
+    - Optional refresh callbacks are coalesced per channel: a countdown is
+      re-rendered at most every max(MIN_REFRESH_SECONDS, spacing * live
+      countdowns in that channel), so busy channels get fewer edits.
+      Prefer relative_timestamp() in the message and no refresh at all.
+    """
+
+    def __init__(self, min_refresh: float = MIN_REFRESH_SECONDS, channel_spacing: float = CHANNEL_EDIT_SPACING):
+        self.min_refresh = min_refresh
+        self.channel_spacing = channel_spacing
+        self._live = {}           # key -> Countdown
+        self._per_channel = {}    # channel_id -> live count
+        self._heap = []           # (time, seq, kind, Countdown)
+        self._seq = 0
+        self._task = None
+        self._wake = None
+
+    # ------------
+    # Registration
+    # ------------
+
+    def start(self, key, deadline: datetime, on_expire, *, channel_id=None, refresh=None) -> Countdown:
+        self.claim(key)
+        countdown = Countdown(key, deadline.timestamp(), channel_id, on_expire, refresh)
+        self._live[key] = countdown
+        if channel_id is not None:
+            self._per_channel[channel_id] = self._per_channel.get(channel_id, 0) + 1
+        self._push(countdown.deadline, "expire", countdown)
+        if refresh is not None:
+            countdown.next_refresh = time.time() + self._refresh_interval(channel_id)
+            self._push(countdown.next_refresh, "refresh", countdown)
+        self._ensure_started()
+        return countdown
+
+    def claim(self, key) -> bool:
+        """Take ownership of resolving `key`. True only for the first caller."""
+        countdown = self._live.pop(key, None)
+        if countdown is None:
+            return False
+        countdown.live = False
+        if countdown.channel_id is not None:
+            left = self._per_channel.get(countdown.channel_id, 1) - 1
+            if left > 0:
+                self._per_channel[countdown.channel_id] = left
+            else:
+                self._per_channel.pop(countdown.channel_id, None)
+        return True
+
+    def get(self, key):
+        return self._live.get(key)
+
+    def __len__(self):
+        return len(self._live)
+
+    # ------------
+    # Loop
+    # ------------
+
+    def _refresh_interval(self, channel_id) -> float:
+        busy = self._per_channel.get(channel_id, 1) if channel_id is not None else 1
+        return max(self.min_refresh, self.channel_spacing * busy)
+
+    def _push(self, when: float, kind: str, countdown: Countdown):
+        self._seq += 1
+        was_next = self._heap[0][0] if self._heap else None
+        heapq.heappush(self._heap, (when, self._seq, kind, countdown))
+        if self._wake is not None and (was_next is None or when < was_next):
+            self._wake.set()
+
+    def _ensure_started(self):
+        if self._task is not None and not self._task.done():
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        self._wake = asyncio.Event()
+        self._task = loop.create_task(self._run())
+
+    async def _run(self):
+        while True:
+            # Drop entries for countdowns that were claimed elsewhere.
+            while self._heap and not self._heap[0][3].live:
+                heapq.heappop(self._heap)
+
+            if not self._heap:
+                self._wake.clear()
+                await self._wake.wait()
+                continue
+
+            delay = self._heap[0][0] - time.time()
+            if delay > 0:
+                self._wake.clear()
+                try:
+                    await asyncio.wait_for(self._wake.wait(), timeout=delay)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            _, _, kind, countdown = heapq.heappop(self._heap)
+            if kind == "expire":
+                if self.claim(countdown.key):
+                    asyncio.create_task(self._call(countdown.on_expire, countdown))
+            elif countdown.live:
+                countdown.next_refresh = time.time() + self._refresh_interval(countdown.channel_id)
+                if countdown.next_refresh < countdown.deadline:
+                    self._push(countdown.next_refresh, "refresh", countdown)
+                asyncio.create_task(self._call(countdown.refresh, countdown))
+
+    async def _call(self, callback, countdown: Countdown):
+        try:
+            await callback()
+        except Exception as e:
+            print(f"[Countdown] {countdown.key} callback failed: {e}")
+            traceback.print_exc()
+
+    async def shutdown(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+# Shared instance used by every cog.
+ticker = CountdownTicker()
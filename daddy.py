@@ -5,8 +5,8 @@ from discord.ext import commands
 import asyncio
 from datetime import datetime, date
 import random
-import json
-import os
+from storage import db
+from embeds import add_embed_footer
 
 # ---------------------------------
 # CONFIG
@@ -26,7 +26,6 @@ LUNA_AVATAR_URL = (
 )
 
 SESSION_TIMEOUT_SECONDS = 30
-AFFECTION_FILE = "luna_affection.json"
 RARE_EVENT_CHANCE = 0.10
 
 END_CHAT_LABEL = "End Chat ❌"
@@ -89,18 +88,6 @@ LUV_GIFS = [
 ]
 
 
-# ----------------------------
-# Footer Helper
-# ----------------------------
-
-def add_embed_footer(embed: discord.Embed) -> discord.Embed:
-    footer_line = "\n\n*Luna ❀⋆ coded by <@296181275344109568>*"
-    desc = embed.description or ""
-    if footer_line not in desc:
-        embed.description = desc + footer_line
-    return embed
-
-
 # ----------------------------
 # Helper functions
 # ----------------------------
@@ -980,27 +967,24 @@ class LunaDaughter(commands.Cog):
     # Affection persistence
     # -------------------------
     def _load_affection(self):
-        if not os.path.exists(AFFECTION_FILE):
-            self.affection = {}
-            return
         try:
-            with open(AFFECTION_FILE, "r", encoding="utf-8") as f:
-                data = json.load(f)
-            self.affection = {int(k): int(v) for k, v in data.items()}
+            rows = db.query("SELECT user_id, affection FROM luna_affection")
+            self.affection = {int(uid): int(value) for uid, value in rows}
         except Exception:
             self.affection = {}
 
-    def _save_affection(self):
-        try:
-            with open(AFFECTION_FILE, "w", encoding="utf-8") as f:
-                json.dump({str(k): v for k, v in self.affection.items()}, f, indent=2)
-        except Exception:
-            pass
+    def _save_affection(self, user_id: int):
+        db.write(
+            "INSERT INTO luna_affection (user_id, affection) VALUES (?, ?) "
+            "ON CONFLICT(user_id) DO UPDATE SET affection = excluded.affection",
+            (user_id, self.affection[user_id]),
+            key=("luna_affection", user_id),
+        )
 
     def get_affection(self, user_id: int, is_luv: bool) -> int:
         if user_id not in self.affection:
             self.affection[user_id] = -20 if is_luv else 50
-            self._save_affection()
+            self._save_affection(user_id)
         return self.affection[user_id]
 
     def set_affection(self, user_id: int, value: int, is_luv: bool) -> None:
@@ -1016,6 +1000,7 @@ class LunaDaughter(commands.Cog):
 
             self.affection[user_id] = max(-50, min(100, value))
 
+        self._save_affection(user_id)
 
     # -------------------------
     # Session helpers
@@ -1076,7 +1061,7 @@ class LunaDaughter(commands.Cog):
             "luv_strikes": 0,
         }
 
-        asyncio.create_task(self._session_timeout_task(user.id))
+        self.sessions[user.id]["timeout_task"] = asyncio.create_task(self._session_timeout_task(user.id))
 
     async def _end_session(self, user_id: int, reason: str):
         session = self.sessions.get(user_id)
@@ -1124,6 +1109,20 @@ class LunaDaughter(commands.Cog):
 
         self.sessions.pop(user_id, None)
 
+    def cog_unload(self):
+        # A hot reload hands the sessions to the new cog, which starts its own timers.
+        for session in self.sessions.values():
+            task = session.get("timeout_task")
+            if task is not None:
+                task.cancel()
+
+    def adopt_sessions(self, sessions: dict):
+        """Take over live sessions from the previous instance of this cog."""
+        self.sessions = sessions
+        for user_id, session in sessions.items():
+            session["view"].cog = self
+            session["timeout_task"] = asyncio.create_task(self._session_timeout_task(user_id))
+
     async def _session_timeout_task(self, user_id: int):
         while True:
             await asyncio.sleep(SESSION_TIMEOUT_SECONDS)
@@ -1555,3 +1554,14 @@ async def on_message(self, message: discord.Message):
 # -----------------------------
 async def setup(bot: commands.Bot):
     await bot.add_cog(LunaDaughter(bot))
+
+
+def export_state(bot: commands.Bot) -> dict:
+    cog = bot.get_cog("LunaDaughter")
+    return {"sessions": cog.sessions} if cog else {}
+
+
+def import_state(bot: commands.Bot, state: dict):
+    cog = bot.get_cog("LunaDaughter")
+    if cog and state.get("sessions"):
+        cog.adopt_sessions(state["sessions"])
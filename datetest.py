@@ -6,11 +6,14 @@ import json
 import os
 import asyncio
 from datetime import datetime
+from storage import db
+from paginator import CursorPaginator
+from outbound import edit_queue, PRIORITY_FINAL
+from embeds import static_embed
 
 # -----------------------------
 # Config
 # -----------------------------
-DATA_FILE = "battle_data.json"
 IMAGE_FOLDER = "HK-images"
 
 CHARACTERS = [
@@ -87,14 +90,26 @@ ALLOWED_CHANNELS = {1422420786635079701, 1420560553008697474}
 # Utility Functions
 # -----------------------------
 def load_data():
-    if os.path.exists(DATA_FILE):
-        with open(DATA_FILE, "r") as f:
-            return json.load(f)
-    return {"players": {}}
+    rows = db.query("SELECT user_id, data FROM battle_players")
+    return {"players": {user_id: json.loads(raw) for user_id, raw in rows}}
+
+# Per-player change counter; keys the cached !mychars pages.
+player_versions = {}
+
+def save_players(data, *user_ids):
+    """Persist only the given players' rows."""
+    for uid in user_ids:
+        player_versions[uid] = player_versions.get(uid, 0) + 1
+        if uid not in data["players"]:
+            continue
+        db.write(
+            "INSERT OR REPLACE INTO battle_players (user_id, data) VALUES (?, ?)",
+            (uid, json.dumps(data["players"][uid])),
+            key=("battle_players", uid),
+        )
 
-def save_data(data):
-    with open(DATA_FILE, "w") as f:
-        json.dump(data, f, indent=4)
+def save_all_players(data):
+    save_players(data, *data.get("players", {}).keys())
 
 def random_stats():
     return {
@@ -110,6 +125,32 @@ def generate_unique_id(existing_ids):
         new_id = str(random.randint(1000, 9999))
         if new_id not in existing_ids:
             return new_id
+# -----------------------------
+# Static embeds
+# -----------------------------
+@static_embed
+def event_embed():
+    embed = discord.Embed(
+        title="<:NG_3hello:1422427973247832146>  ***Sanrio Battle Fields***",
+        description="*Welcome to Sanrio Battle Fields!*",
+        color=discord.Color.from_str("#f1c6d2 ")
+    )
+    embed.set_thumbnail(url="https://cdn.discordapp.com/attachments/1420560553008697474/1422430311454736434/IMG_9552.gif?ex=68dca4f5&is=68db5375&hm=1dde734d2fe4ad0d80bc170b53bc588fe7a06abfe437c207984865301fa55520&")
+    embed.add_field(
+        name="<a:SanrioComputer:1422418455885250570> **Game Objective:**",
+        value="Drop characters, battle them with friends, and collect as many as you can. "
+              "When you win a battle, you take your opponent's character. "
+              "The ultimate winner is the user with the most characters!",
+        inline=False
+    )
+    embed.add_field(name="**!gacha**", value="<a:4k_HK:1422427249872867488> Roll a random Sanrio character", inline=False)
+    embed.add_field(name="**!battle @user**", value="<a:HelloKittyFight:1422422183598100611> Challenge another user to a battle. They must confirm the battle before it begins.", inline=False)
+    embed.add_field(name="**!mychars**", value="<:hnote1:1420592325817663570> View your characters", inline=False)
+    embed.add_field(name="**!leaderboard**", value="<:hellokittylove:1284655017873379434> View the top users by character count.", inline=False)
+    embed.add_field(name="**!event**", value="<a:SanrioTextBubble:1422418161839378453> Shows this command list and game description.", inline=False)
+    return embed
+
+
 # -----------------------------
 # BattleSystem Cog
 # -----------------------------
@@ -127,7 +168,7 @@ class BattleSystem(commands.Cog):
                 if "stats" not in char:
                     char["stats"] = random_stats()
                 all_ids.add(char["id"])
-        save_data(self.data)
+        save_all_players(self.data)
 
     # -----------------------------
     # Channel Restriction
@@ -173,7 +214,7 @@ class BattleSystem(commands.Cog):
                 "stats": final_stats
             }
             player["characters"].append(new_char)
-            save_data(self.data)
+            save_players(self.data, user_id)
 
         # Animation embed
         embed = discord.Embed(
@@ -192,7 +233,7 @@ class BattleSystem(commands.Cog):
             anim_img = os.path.join(IMAGE_FOLDER, random.choice(CHARACTER_IMAGES[anim_char]))
             file = discord.File(anim_img, filename="char.jpg")
             embed.set_image(url="attachment://char.jpg")
-            await msg.edit(embed=embed, attachments=[file])
+            edit_queue.edit(msg, embed=embed.copy(), attachments=[file])
             await asyncio.sleep(0.3)
 
         # Final result embed
@@ -206,7 +247,7 @@ class BattleSystem(commands.Cog):
         final_img_path = os.path.join(IMAGE_FOLDER, new_char["image"])
         file = discord.File(final_img_path, filename="char.jpg")
         embed.set_image(url="attachment://char.jpg")
-        await msg.edit(embed=embed, attachments=[file])
+        await edit_queue.edit(msg, embed=embed, attachments=[file], priority=PRIORITY_FINAL)
 
 # -----------------------------
 # Give Character (Paginated Dropdown)
@@ -380,7 +421,7 @@ class BattleSystem(commands.Cog):
         async with self.data_lock:
             char_to_give = giver["characters"].pop(view.selected_index)
             receiver["characters"].append(char_to_give)
-            save_data(self.data)
+            save_players(self.data, giver_id, receiver_id)
 
         # -----------------------------
         # Confirmation embed
@@ -586,7 +627,7 @@ class BattleSystem(commands.Cog):
                     1, name=f"{opponent.display_name}'s {opponent_char['name']} (#{opponent_char['id']})", value=hp_bar(o_hp, o_max_hp), inline=True
                 )
                 battle_embed.description = "\n".join(log[-3:])  # cap last 5 lines
-                await battle_message.edit(embed=battle_embed)
+                edit_queue.edit(battle_message, embed=battle_embed.copy())
                 turn += 1
                 await asyncio.sleep(1)
 
@@ -597,13 +638,13 @@ class BattleSystem(commands.Cog):
             async with self.data_lock:
                 self.data["players"][loser_id]["characters"].remove(loser_char)
                 self.data["players"][winner_id]["characters"].append(loser_char)
-                save_data(self.data)
+                save_players(self.data, winner_id, loser_id)
 
             log.append(f"🏆 {ctx.guild.get_member(int(winner_id)).display_name}'s {winner_char['name']} (#{winner_char['id']}) wins the battle!")
             log.append(f"🎁 {ctx.guild.get_member(int(winner_id)).display_name} takes {loser_char['name']} (#{loser_char['id']}) from {ctx.guild.get_member(int(loser_id)).display_name}!")
 
             battle_embed.description = "\n".join(log[-3:])
-            await battle_message.edit(embed=battle_embed)
+            await edit_queue.edit(battle_message, embed=battle_embed, priority=PRIORITY_FINAL)
 
             winner_user = ctx.guild.get_member(int(winner_id))
             loser_user = ctx.guild.get_member(int(loser_id))
@@ -656,75 +697,48 @@ class BattleSystem(commands.Cog):
             return await ctx.send(f"❌ {getattr(user_obj,'display_name',user_id)} has no characters yet.")
 
         characters = player["characters"]
+        display_name = getattr(user_obj, 'display_name', user_id)
+        fallback_img = os.path.join(IMAGE_FOLDER, "Hello-Kitty.jpg")
 
         # -----------------------------
-        # Preload file paths with fallback
+        # Page pieces (resolved one character at a time)
         # -----------------------------
-        preloaded_files = []
-        fallback_img = os.path.join(IMAGE_FOLDER, "Hello-Kitty.jpg")
-        for char in characters:
+        def image_file(page_index):
+            char = characters[page_index] if page_index < len(characters) else {}
             img_file = char.get("image")  # Use stored image
             img_path = os.path.join(IMAGE_FOLDER, img_file) if img_file else fallback_img
             if not os.path.exists(img_path):
                 img_path = fallback_img
-            preloaded_files.append(img_path)
+            return [discord.File(img_path, filename="char.jpg")]
 
-        # -----------------------------
-        # Embed creator
-        # -----------------------------
-        def create_embed(page_index):
-            char = characters[page_index]
+        def create_embed(page_items, page_index, total_pages):
             embed = discord.Embed(
-                title=f"🎀 {getattr(user_obj,'display_name',user_id)}'s Characters (Page {page_index+1}/{len(characters)})",
+                title=f"🎀 {display_name}'s Characters (Page {page_index+1}/{total_pages})",
                 color=discord.Color.blurple()
             )
-            stats_text = "\n".join(f"**{k.title()}**: {v}" for k, v in char["stats"].items())
-            embed.add_field(name=f"{char['name']} (#{char['id']})", value=stats_text, inline=False)
+            for char in page_items:
+                stats_text = "\n".join(f"**{k.title()}**: {v}" for k, v in char["stats"].items())
+                embed.add_field(name=f"{char['name']} (#{char['id']})", value=stats_text, inline=False)
             embed.set_image(url="attachment://char.jpg")
             return embed
 
-        # -----------------------------
-        # Pagination view and the rest below that
-        # -----------------------------
-        class Pagination(View):
-            def __init__(self):
-                super().__init__(timeout=120)
-                self.page = 0
-                self.message = None
-
-            async def send_initial(self):
-                embed = create_embed(0)
-                file_path = preloaded_files[0]
-                file = discord.File(file_path, filename="char.jpg")
-                self.message = await ctx.send(embed=embed, file=file, view=self)
-
-            async def update(self):
-                embed = create_embed(self.page)
-                file_path = preloaded_files[self.page]
-                file = discord.File(file_path, filename="char.jpg")
-                await self.message.edit(embed=embed, attachments=[file])
-
-            @discord.ui.button(label="Previous", style=discord.ButtonStyle.grey)
-            async def prev_button(self, interaction: discord.Interaction, button: discord.ui.Button):
-                if interaction.user.id != ctx.author.id:
-                    return await interaction.response.send_message("❌ This is not yours to press!.", ephemeral=True)
-                self.page = (self.page - 1) % len(characters)
-                await self.update()
-                await interaction.response.defer()
-
-            @discord.ui.button(label="Next", style=discord.ButtonStyle.grey)
-            async def next_button(self, interaction: discord.Interaction, button: discord.ui.Button):
-                if interaction.user.id != ctx.author.id:
-                    return await interaction.response.send_message("❌ This is not yours to press!.", ephemeral=True)
-                self.page = (self.page + 1) % len(characters)
-                await self.update()
-                await interaction.response.defer()
-
         # -----------------------------
         # Send initial message with view
         # -----------------------------
-        view = Pagination()
-        await view.send_initial()
+        view = CursorPaginator(
+            namespace=("mychars", user_id, display_name),
+            count=lambda: len(characters),
+            fetch=lambda start, count: characters[start:start + count],
+            render=create_embed,
+            version=lambda: player_versions.get(user_id, 0),
+            per_page=1,
+            files=image_file,
+            owner_id=ctx.author.id,
+            wrap=True,
+            labels=("Previous", "Next"),
+            style=discord.ButtonStyle.grey,
+        )
+        await view.send(ctx)
 
 
 
@@ -755,25 +769,7 @@ class BattleSystem(commands.Cog):
     # -----------------------------
     @commands.command(name="event")
     async def event(self, ctx):
-        embed = discord.Embed(
-            title="<:NG_3hello:1422427973247832146>  ***Sanrio Battle Fields***",
-            description="*Welcome to Sanrio Battle Fields!*",
-            color=discord.Color.from_str("#f1c6d2 ")
-        )
-        embed.set_thumbnail(url="https://cdn.discordapp.com/attachments/1420560553008697474/1422430311454736434/IMG_9552.gif?ex=68dca4f5&is=68db5375&hm=1dde734d2fe4ad0d80bc170b53bc588fe7a06abfe437c207984865301fa55520&")
-        embed.add_field(
-            name="<a:SanrioComputer:1422418455885250570> **Game Objective:**",
-            value="Drop characters, battle them with friends, and collect as many as you can. "
-                  "When you win a battle, you take your opponent's character. "
-                  "The ultimate winner is the user with the most characters!",
-            inline=False
-        )
-        embed.add_field(name="**!gacha**", value="<a:4k_HK:1422427249872867488> Roll a random Sanrio character", inline=False)
-        embed.add_field(name="**!battle @user**", value="<a:HelloKittyFight:1422422183598100611> Challenge another user to a battle. They must confirm the battle before it begins.", inline=False)
-        embed.add_field(name="**!mychars**", value="<:hnote1:1420592325817663570> View your characters", inline=False)
-        embed.add_field(name="**!leaderboard**", value="<:hellokittylove:1284655017873379434> View the top users by character count.", inline=False)
-        embed.add_field(name="**!event**", value="<a:SanrioTextBubble:1422418161839378453> Shows this command list and game description.", inline=False)
-        await ctx.send(embed=embed)
+        await ctx.send(embed=event_embed())
 
     # -----------------------------
     # Clear Command (Whitelist only)
@@ -799,7 +795,7 @@ class BattleSystem(commands.Cog):
                 return await ctx.send(f"❌ {user.display_name if user else 'User'} has no characters to clear.")
 
             player["characters"].clear()
-            save_data(self.data)
+            save_players(self.data, user_id)
 
         await ctx.send(f"✅ Cleared all characters for {user.display_name if user else 'User'}!")
     
@@ -814,7 +810,7 @@ class BattleSystem(commands.Cog):
         async with self.data_lock:
             for player in self.data.get("players", {}).values():
                 player["characters"].clear()
-            save_data(self.data)
+            save_all_players(self.data)
 
         await ctx.send("✅ Cleared **all characters** for every user in the database!")
 
@@ -840,7 +836,7 @@ class BattleSystem(commands.Cog):
         async with self.data_lock:
             player = self.data["players"].setdefault(user_id, {"characters": [], "last_claim": None})
             player["last_claim"] = None
-            save_data(self.data)
+            save_players(self.data, user_id)
 
         await ctx.send(f"✅ {user.display_name if user else 'User'} can now use `!gacha` again!")
 
@@ -974,7 +970,7 @@ class BattleSystem(commands.Cog):
         # -----------------------------
         async with self.data_lock:
             player["date_points"] += total_score
-            save_data(self.data)
+            save_players(self.data, user_id)
             new_total = player["date_points"]
 
         if total_score >= 10:
@@ -3,48 +3,33 @@ from discord.ext import commands, tasks
 from discord.ui import View, Button, button
 import random
 import json
-import os
 import asyncio
 import copy
 from datetime import datetime, timedelta, timezone
+from storage import db
+from paginator import CursorPaginator
+from sampler import InventorySampler
+from embeds import MIDAS_FOOTER, static_embed, add_embed_footer as _add_footer
 
 
 # ----------------------------
 # Footer Helper
 # ----------------------------
 def add_embed_footer(embed: discord.Embed) -> discord.Embed:
-    footer_line = "*⋆ ˚｡⋆୨ 𝓜𝓲𝓭𝓪𝓼 ୧⋆ ˚｡⋆ coded by <@296181275344109568>*"
+    # Midas footer sits flush against the description, as it always has.
+    return _add_footer(embed, MIDAS_FOOTER, separator="")
 
-    if embed.description:
-        embed.description += footer_line
-    else:
-        embed.description = footer_line
 
-    return embed
-
-
-<<<<<<< HEAD
-
-=======
->>>>>>> 8f48a669246a2c7c9f9e4d09ba5385ee7c1a6989
 # -----------------------------
 # Whitelists and Channels
 # -----------------------------
 WHITELIST = [296181275344109568, 1370076515429253264, 320351249549623297]
-<<<<<<< HEAD
 
 BOX_DROP_CHANNEL_ID = 1284631100609662989  # ONLY spawn boxes here
-=======
-BOX_DROP_CHANNEL_ID = 1284631100609662989  # test channel(s)
->>>>>>> 8f48a669246a2c7c9f9e4d09ba5385ee7c1a6989
 
-DATA_FILE = "deal_data.json"
 BOX_EMOJI = "🎁"
 
-<<<<<<< HEAD
 
-=======
->>>>>>> 8f48a669246a2c7c9f9e4d09ba5385ee7c1a6989
 # -----------------------------
 # Back-to-back / Skip rules
 # -----------------------------
@@ -133,6 +118,58 @@ RARITY_ORDER = {
 }
 
 
+# -----------------------------
+# Static embeds
+# -----------------------------
+@static_embed
+def deal_help_embed():
+    embed = discord.Embed(
+        title="📘 **Mystery Box Event – Help Menu**",
+        description=(
+            "**Concept of the Game:**\n"
+            "A random **mystery box** appears every **1–12 hours** while the "
+            "daily cycle is active.\n"
+            "Each 24-hour cycle (starting from the **first box spawn**) allows "
+            "**2–5 claimed boxes total**.\n\n"
+            f"First to react quickly with {BOX_EMOJI} opens it and claims the prize inside!\n\n"
+            "__Here are all available commands for the Mystery Box mini-event:__"
+        ),
+        color=0x7FB3FF,
+    )
+
+    embed.add_field(
+        name="🎁 **!dealstatus**",
+        value="Shows all available prizes, rarities, and how many remain.",
+        inline=False,
+    )
+
+    embed.add_field(
+        name="📜 **!dealhistory**",
+        value="Shows all previous mystery box winners with rarity stars.",
+        inline=False,
+    )
+
+    embed.add_field(
+        name="ℹ️ **Game Rules**",
+        value=(
+            f"• First to react with {BOX_EMOJI} wins the box.\n"
+            "• If you win a **big prize** (Rewind / Free Mystery Box / Golden Door),\n"
+            "  you must **skip the next drop**.\n"
+            "• Each 24-hour cycle has a random limit of **2–5 claimed boxes**.\n"
+        ),
+        inline=False,
+    )
+
+    embed.set_footer(text="Use !dealhelp anytime for this menu.")
+
+    embed.add_field(
+        name="\u200b",
+        value="*⋆ ˚｡⋆୨ 𝓜𝓲𝓭𝓪𝓼 ୧⋆ ˚｡⋆ coded by <@296181275344109568>*",
+        inline=False,
+    )
+    return embed
+
+
 # -----------------------------
 # Cog
 # -----------------------------
@@ -141,6 +178,8 @@ class DealOrNoDeal(commands.Cog):
         self.bot = bot
         self.prizes = {}
         self.winners = []
+        self.data_version = 0  # bumped on every save; keys cached history pages
+        self._prize_sampler = None  # compiled lazily from self.prizes
 
         self.sent_today: int = 0
         self.max_boxes_today: int | None = None
@@ -157,7 +196,7 @@ class DealOrNoDeal(commands.Cog):
 
     def _purge_retired_prizes(self):
         """
-        Remove retired/forbidden prizes that may still exist in deal_data.json.
+        Remove retired/forbidden prizes that may still be stored in the database.
         Purges by key and by name match (case-insensitive).
         """
         forbidden_keys = {
@@ -186,6 +225,7 @@ class DealOrNoDeal(commands.Cog):
         if to_delete:
             for k in to_delete:
                 self.prizes.pop(k, None)
+            self._invalidate_prize_table()
             print(f"[Deal] Purged retired prizes: {sorted(to_delete)}")
             self._save_data()
 
@@ -193,70 +233,79 @@ class DealOrNoDeal(commands.Cog):
     # Data persistence
     # -------------------------
     def _load_data(self):
-        """Load prize + winner data, plus cycle state, from JSON."""
-        if os.path.exists(DATA_FILE):
-            try:
-                with open(DATA_FILE, "r", encoding="utf-8") as f:
-                    data = json.load(f)
-
-                loaded_prizes = data.get("prizes", {})
-                self.prizes = copy.deepcopy(DEFAULT_PRIZES)
-
-                for key, val in loaded_prizes.items():
-                    if key in self.prizes:
-                        self.prizes[key].update(val)
-                    else:
-                        self.prizes[key] = val
-
-                self.winners = data.get("winners", [])
-
-                meta = data.get("meta", {})
-                self.sent_today = meta.get("sent_today", 0) or 0
-                self.max_boxes_today = meta.get("max_boxes_today")
+        """Load prize + winner data, plus cycle state, from the shared database."""
+        self._invalidate_prize_table()
+        try:
+            prize_rows = db.query("SELECT key, data FROM deal_prizes")
+            winner_rows = db.query(
+                "SELECT user_id, prize_key, prize_name, timestamp, message_id, channel_id "
+                "FROM deal_winners ORDER BY id"
+            )
+            meta_rows = db.query("SELECT key, value FROM deal_meta")
+        except Exception as e:
+            print(f"[Deal] Error loading deal tables: {e}")
+            prize_rows, winner_rows, meta_rows = [], [], []
 
-                fst_ts = meta.get("first_spawn_time")
-                crt_ts = meta.get("cycle_reset_time")
+        if not prize_rows and not meta_rows:
+            self.prizes = copy.deepcopy(DEFAULT_PRIZES)
+            self.winners = []
+            self.sent_today = 0
+            self.max_boxes_today = None
+            self.first_spawn_time = None
+            self.cycle_reset_time = None
+            self._save_data()
+            print("[Deal] No saved data found, created new with defaults.")
+            return
 
-                if isinstance(fst_ts, (int, float)):
-                    self.first_spawn_time = datetime.fromtimestamp(fst_ts, tz=timezone.utc)
-                else:
-                    self.first_spawn_time = None
+        self.prizes = copy.deepcopy(DEFAULT_PRIZES)
+        for key, raw in prize_rows:
+            val = json.loads(raw)
+            if key in self.prizes:
+                self.prizes[key].update(val)
+            else:
+                self.prizes[key] = val
 
-                if isinstance(crt_ts, (int, float)):
-                    self.cycle_reset_time = datetime.fromtimestamp(crt_ts, tz=timezone.utc)
-                else:
-                    self.cycle_reset_time = None
+        self.winners = [
+            {
+                "user_id": user_id,
+                "prize_key": prize_key,
+                "prize_name": prize_name,
+                "timestamp": timestamp,
+                "message_id": message_id,
+                "channel_id": channel_id,
+            }
+            for user_id, prize_key, prize_name, timestamp, message_id, channel_id in winner_rows
+        ]
 
-                print(
-                    f"[Deal] Loaded data. sent_today={self.sent_today}, "
-                    f"max_boxes_today={self.max_boxes_today}, "
-                    f"first_spawn_time={self.first_spawn_time}, "
-                    f"cycle_reset_time={self.cycle_reset_time}"
-                )
+        meta = {key: json.loads(raw) for key, raw in meta_rows}
+        self.sent_today = meta.get("sent_today", 0) or 0
+        self.max_boxes_today = meta.get("max_boxes_today")
 
-                # Remove retired prizes that may still exist in JSON
-                self._purge_retired_prizes()
+        fst_ts = meta.get("first_spawn_time")
+        crt_ts = meta.get("cycle_reset_time")
 
-            except Exception as e:
-                print(f"[Deal] Error loading {DATA_FILE}: {e}")
-                self.prizes = copy.deepcopy(DEFAULT_PRIZES)
-                self.winners = []
-                self.sent_today = 0
-                self.max_boxes_today = None
-                self.first_spawn_time = None
-                self.cycle_reset_time = None
+        if isinstance(fst_ts, (int, float)):
+            self.first_spawn_time = datetime.fromtimestamp(fst_ts, tz=timezone.utc)
         else:
-            self.prizes = copy.deepcopy(DEFAULT_PRIZES)
-            self.winners = []
-            self.sent_today = 0
-            self.max_boxes_today = None
             self.first_spawn_time = None
+
+        if isinstance(crt_ts, (int, float)):
+            self.cycle_reset_time = datetime.fromtimestamp(crt_ts, tz=timezone.utc)
+        else:
             self.cycle_reset_time = None
-            self._save_data()
-            print("[Deal] No data file found, created new with defaults.")
+
+        print(
+            f"[Deal] Loaded data. sent_today={self.sent_today}, "
+            f"max_boxes_today={self.max_boxes_today}, "
+            f"first_spawn_time={self.first_spawn_time}, "
+            f"cycle_reset_time={self.cycle_reset_time}"
+        )
+
+        # Remove retired prizes that may still be stored
+        self._purge_retired_prizes()
 
     def _save_data(self):
-        """Save prize, winners, and cycle metadata to JSON (with UNIX timestamps)."""
+        """Save prize pool and cycle metadata (UNIX timestamps). Winners are stored per row."""
         meta = {
             "sent_today": self.sent_today,
             "max_boxes_today": self.max_boxes_today,
@@ -264,17 +313,51 @@ class DealOrNoDeal(commands.Cog):
             "cycle_reset_time": self.cycle_reset_time.timestamp() if self.cycle_reset_time else None,
         }
 
-        data = {
-            "prizes": self.prizes,
-            "winners": self.winners,
-            "meta": meta,
-        }
+        self.data_version += 1
+        statements = [("DELETE FROM deal_prizes", ())]
+        statements += [
+            ("INSERT INTO deal_prizes (key, data) VALUES (?, ?)", (key, json.dumps(prize)))
+            for key, prize in self.prizes.items()
+        ]
+        statements += [
+            ("INSERT OR REPLACE INTO deal_meta (key, value) VALUES (?, ?)", (key, json.dumps(value)))
+            for key, value in meta.items()
+        ]
+        db.transaction(statements, key="deal_state")
+
+    def _record_winner(self, entry: dict):
+        self.data_version += 1
+        db.write(
+            "INSERT INTO deal_winners (user_id, prize_key, prize_name, timestamp, message_id, channel_id) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (
+                entry["user_id"], entry["prize_key"], entry["prize_name"],
+                entry["timestamp"], entry["message_id"], entry["channel_id"],
+            ),
+        )
 
-        try:
-            with open(DATA_FILE, "w", encoding="utf-8") as f:
-                json.dump(data, f, indent=4)
-        except Exception as e:
-            print(f"[Deal] Error saving {DATA_FILE}: {e}")
+    # -------------------------
+    # Hot reload
+    # -------------------------
+    # Cycle state that is not (or not yet) persisted, plus the cache version so
+    # pages cached by the old instance are never served as the new one's.
+    HANDOVER_FIELDS = (
+        "prizes", "winners", "data_version",
+        "sent_today", "max_boxes_today", "first_spawn_time", "cycle_reset_time",
+        "next_spawn", "active_message_id", "active_lock",
+    )
+
+    def cog_unload(self):
+        # stop(), not cancel(): a box already on screen finishes under the old code.
+        self.deal_loop.stop()
+
+    def export_state(self) -> dict:
+        return {field: getattr(self, field) for field in self.HANDOVER_FIELDS}
+
+    def adopt_state(self, state: dict):
+        for field, value in state.items():
+            setattr(self, field, value)
+        self._invalidate_prize_table()
 
     # -------------------------
     # Helpers
@@ -303,30 +386,19 @@ class DealOrNoDeal(commands.Cog):
     def _available_prizes(self):
         return {k: v for k, v in self.prizes.items() if v.get("remaining", 0) > 0}
 
-    def _pick_random_prize(self):
-        available = self._available_prizes()
-        if not available:
-            return None, None
+    def _prize_table(self) -> InventorySampler:
+        if self._prize_sampler is None:
+            self._prize_sampler = InventorySampler.from_inventory(self.prizes)
+        return self._prize_sampler
 
-        weighted_table = []
-        for key, prize in available.items():
-            chance = prize.get("chance", 0)
-            if chance > 0:
-                weighted_table.append((key, prize, chance))
+    def _invalidate_prize_table(self):
+        self._prize_sampler = None
 
-        if not weighted_table:
+    def _pick_random_prize(self):
+        key = self._prize_table().draw()
+        if key is None:
             return None, None
-
-        total = sum(x[2] for x in weighted_table)
-        r = random.uniform(0, total)
-        upto = 0
-
-        for key, prize, chance in weighted_table:
-            if upto + chance >= r:
-                return key, prize
-            upto += chance
-
-        return weighted_table[-1][0], weighted_table[-1][1]
+        return key, self.prizes[key]
 
     def _can_user_win_now(self, user_id: int) -> bool:
         """
@@ -375,11 +447,6 @@ class DealOrNoDeal(commands.Cog):
             print(f"[Deal] Drop channel {BOX_DROP_CHANNEL_ID} not found.")
             return
 
-<<<<<<< HEAD
-
-
-=======
->>>>>>> 8f48a669246a2c7c9f9e4d09ba5385ee7c1a6989
         # ✅ CHANGED: 10 seconds -> 30 seconds
         embed = discord.Embed(
             title="🎁 A Mystery Box Appears!",
@@ -517,18 +584,20 @@ class DealOrNoDeal(commands.Cog):
 
         prize["remaining"] = max(0, prize.get("remaining", 0) - 1)
         self.prizes[prize_key] = prize
+        if prize["remaining"] == 0:
+            self._prize_table().remove(prize_key)
+
+        winner_entry = {
+            "user_id": winner.id,
+            "prize_key": prize_key,
+            "prize_name": prize["name"],
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "message_id": msg.id,
+            "channel_id": msg.channel.id,
+        }
+        self.winners.append(winner_entry)
 
-        self.winners.append(
-            {
-                "user_id": winner.id,
-                "prize_key": prize_key,
-                "prize_name": prize["name"],
-                "timestamp": datetime.now(timezone.utc).isoformat(),
-                "message_id": msg.id,
-                "channel_id": msg.channel.id,
-            }
-        )
-
+        self._record_winner(winner_entry)
         self._save_data()
 
         prize_info = self.prizes[prize_key]
@@ -575,18 +644,10 @@ class DealOrNoDeal(commands.Cog):
             return
 
         if self.next_spawn is None:
-<<<<<<< HEAD
             self.next_spawn = now + timedelta(hours=random.randint(1, 12))
             print(f"[Deal] Next spawn scheduled at {self.next_spawn.isoformat()} UTC (initial after restart).")
             return
 
-
-=======
-            self.next_spawn = now + timedelta(minutes=random.randint(1, 2))
-            print(f"[Deal] Next spawn scheduled at {self.next_spawn.isoformat()} UTC (initial).")
-            return
-
->>>>>>> 8f48a669246a2c7c9f9e4d09ba5385ee7c1a6989
         if now >= self.next_spawn:
             try:
                 await self._send_box_message()
@@ -661,6 +722,7 @@ class DealOrNoDeal(commands.Cog):
             return await ctx.send("❌ You do not have permission.")
 
         self.prizes = copy.deepcopy(DEFAULT_PRIZES)
+        self._invalidate_prize_table()
         self._save_data()
 
         embed = discord.Embed(
@@ -676,154 +738,61 @@ class DealOrNoDeal(commands.Cog):
         if not self.winners:
             return await ctx.send("📭 No winners recorded yet.")
 
-        history = list(reversed(self.winners))
-        items_per_page = 5
-        total_pages = (len(history) + items_per_page - 1) // items_per_page
-
-        prize_map = copy.deepcopy(DEFAULT_PRIZES)
-        for key, val in self.prizes.items():
-            if key in prize_map:
-                prize_map[key].update(val)
-            else:
-                prize_map[key] = val
-
-        class DealHistoryView(View):
-            def __init__(self):
-                super().__init__(timeout=120)
-                self.current_page = 0
+        def fetch(start, count):
+            # Newest first, straight off the winners list without copying it.
+            last = len(self.winners) - 1 - start
+            return [self.winners[i] for i in range(last, max(-1, last - count), -1)]
 
-            async def update_page(self, interaction):
-                start = self.current_page * items_per_page
-                end = start + items_per_page
-                page_items = history[start:end]
+        def prize_info(key):
+            prize = dict(DEFAULT_PRIZES.get(key, {}))
+            prize.update(self.prizes.get(key, {}))
+            return prize
 
-                lines = []
-                page_color = 0xFFC5D3
-                max_rarity_score = -1
+        def render(page_items, page, total_pages):
+            lines = []
+            page_color = 0xFFC5D3
+            max_rarity_score = -1
 
-                for entry in page_items:
-                    prize = prize_map.get(entry["prize_key"], DEFAULT_PRIZES[entry["prize_key"]])
-                    stars = RARITY_STARS.get(prize["rarity"], "")
+            for entry in page_items:
+                prize = prize_info(entry["prize_key"])
+                stars = RARITY_STARS.get(prize["rarity"], "")
 
-                    rarity = prize.get("rarity", "Common")
-                    rarity_score = RARITY_ORDER.get(rarity, -1)
-                    if rarity_score > max_rarity_score:
-                        max_rarity_score = rarity_score
-                        page_color = prize.get("color", 0xFFC5D3)
+                rarity = prize.get("rarity", "Common")
+                rarity_score = RARITY_ORDER.get(rarity, -1)
+                if rarity_score > max_rarity_score:
+                    max_rarity_score = rarity_score
+                    page_color = prize.get("color", 0xFFC5D3)
 
-                    user = ctx.guild.get_member(entry["user_id"])
-                    mention = user.mention if user else f"<@{entry['user_id']}>"
-
-                    timestamp = datetime.fromisoformat(entry["timestamp"]).strftime(
-                        "%Y-%m-%d %H:%M"
-                    )
+                user = ctx.guild.get_member(entry["user_id"])
+                mention = user.mention if user else f"<@{entry['user_id']}>"
 
-                    lines.append(
-                        f"**{mention}** — {stars} *{prize['name']}* ({prize['rarity']})\n"
-                        f"🕒 {timestamp}\n"
-                    )
-
-                embed = discord.Embed(
-                    title=f"🎉 Mystery Box Winners (Page {self.current_page + 1}/{total_pages})",
-                    description="\n".join(lines),
-                    color=page_color,
+                timestamp = datetime.fromisoformat(entry["timestamp"]).strftime(
+                    "%Y-%m-%d %H:%M"
                 )
-                await interaction.response.edit_message(embed=embed, view=self)
-
-            @button(label="◀️", style=discord.ButtonStyle.secondary)
-            async def previous(self, interaction, btn):
-                if self.current_page > 0:
-                    self.current_page -= 1
-                await self.update_page(interaction)
-
-            @button(label="▶️", style=discord.ButtonStyle.secondary)
-            async def next(self, interaction, btn):
-                if self.current_page < total_pages - 1:
-                    self.current_page += 1
-                await self.update_page(interaction)
-
-        page_items = history[:items_per_page]
-        lines = []
-        page_color = 0xFFC5D3
-        max_rarity_score = -1
-
-        for entry in page_items:
-            prize = prize_map.get(entry["prize_key"], DEFAULT_PRIZES[entry["prize_key"]])
-            stars = RARITY_STARS.get(prize["rarity"], "")
 
-            rarity = prize.get("rarity", "Common")
-            rarity_score = RARITY_ORDER.get(rarity, -1)
-            if rarity_score > max_rarity_score:
-                max_rarity_score = rarity_score
-                page_color = prize.get("color", 0xFFC5D3)
-
-            user = ctx.guild.get_member(entry["user_id"])
-            mention = user.mention if user else f"<@{entry['user_id']}>"
-
-            timestamp = datetime.fromisoformat(entry["timestamp"]).strftime(
-                "%Y-%m-%d %H:%M"
-            )
+                lines.append(
+                    f"**{mention}** — {stars} *{prize['name']}* ({prize['rarity']})\n"
+                    f"🕒 {timestamp}\n"
+                )
 
-            lines.append(
-                f"**{mention}** — {stars} *{prize['name']}* ({prize['rarity']})\n"
-                f"🕒 {timestamp}\n"
+            return discord.Embed(
+                title=f"🎉 Mystery Box Winners (Page {page + 1}/{total_pages})",
+                description="\n".join(lines),
+                color=page_color,
             )
 
-        embed = discord.Embed(
-            title=f"🎉 Mystery Box Winners (Page 1/{total_pages})",
-            description="\n".join(lines),
-            color=page_color,
+        view = CursorPaginator(
+            namespace=("deal_history", ctx.guild.id),
+            count=lambda: len(self.winners),
+            fetch=fetch,
+            render=render,
+            version=lambda: self.data_version,
         )
-        await ctx.send(embed=embed, view=DealHistoryView())
+        await view.send(ctx)
 
     @commands.command(name="dealhelp")
     async def deal_help(self, ctx):
-        embed = discord.Embed(
-            title="📘 **Mystery Box Event – Help Menu**",
-            description=(
-                "**Concept of the Game:**\n"
-                "A random **mystery box** appears every **1–12 hours** while the "
-                "daily cycle is active.\n"
-                "Each 24-hour cycle (starting from the **first box spawn**) allows "
-                "**2–5 claimed boxes total**.\n\n"
-                f"First to react quickly with {BOX_EMOJI} opens it and claims the prize inside!\n\n"
-                "__Here are all available commands for the Mystery Box mini-event:__"
-            ),
-            color=0x7FB3FF,
-        )
-
-        embed.add_field(
-            name="🎁 **!dealstatus**",
-            value="Shows all available prizes, rarities, and how many remain.",
-            inline=False,
-        )
-
-        embed.add_field(
-            name="📜 **!dealhistory**",
-            value="Shows all previous mystery box winners with rarity stars.",
-            inline=False,
-        )
-
-        embed.add_field(
-            name="ℹ️ **Game Rules**",
-            value=(
-                f"• First to react with {BOX_EMOJI} wins the box.\n"
-                "• If you win a **big prize** (Rewind / Free Mystery Box / Golden Door),\n"
-                "  you must **skip the next drop**.\n"
-                "• Each 24-hour cycle has a random limit of **2–5 claimed boxes**.\n"
-            ),
-            inline=False,
-        )
-
-        embed.set_footer(text="Use !dealhelp anytime for this menu.")
-
-        embed.add_field(
-            name="\u200b",
-            value="*⋆ ˚｡⋆୨ 𝓜𝓲𝓭𝓪𝓼 ୧⋆ ˚｡⋆ coded by <@296181275344109568>*",
-            inline=False,
-        )
-
-        await ctx.send(embed=embed)
+        await ctx.send(embed=deal_help_embed())
 
     @commands.command(name="dealwipe")
     async def deal_history_reset(self, ctx):
@@ -832,7 +801,8 @@ class DealOrNoDeal(commands.Cog):
             return await ctx.send("❌ You do not have permission to reset the history.")
 
         self.winners = []
-        self._save_data()
+        self.data_version += 1
+        db.write("DELETE FROM deal_winners")
 
         embed = discord.Embed(
             title="🧹 **Mystery Box – History Reset**",
@@ -1052,3 +1022,14 @@ class DealOrNoDeal(commands.Cog):
 async def setup(bot: commands.Bot):
     print("[Deal] DealOrNoDeal cog loading (Mystery Box mode, 24h cycle from first spawn)...")
     await bot.add_cog(DealOrNoDeal(bot))
+
+
+def export_state(bot: commands.Bot) -> dict:
+    cog = bot.get_cog("DealOrNoDeal")
+    return cog.export_state() if cog else {}
+
+
+def import_state(bot: commands.Bot, state: dict):
+    cog = bot.get_cog("DealOrNoDeal")
+    if cog and state:
+        cog.adopt_state(state)
@@ -0,0 +1,201 @@
+"""
+Offline Monte Carlo simulator for the lootbox economy.
+
+Runs the live LOOT_TABLE / value skew / Double-or-Nothing odds from
+loot_config.py against a population of boosters, fully vectorized with NumPy,
+and reports what each item pays out per period.
+
+    python economy_sim.py                                  # 60 boosters, 30 days, keep vs double
+    python economy_sim.py --boosters 120 --days 90 --trials 20000
+    python economy_sim.py --strategy keep --strategy mixed:0.3 --strategy below:0.25
+    python economy_sim.py --skew 2 --double-chance 0.45    # price a change before shipping it
+
+Strategies (what a player does on the Double or Nothing prompt):
+    keep        always 🍀 Keep (same as letting it time out)
+    double      always 🎲 Double
+    mixed:P     double with probability P
+    below:F     double only when the roll is in the bottom F of the item's range
+"""
+
+import argparse
+import sys
+import time
+
+import numpy as np
+
+from loot_config import COOLDOWN_SECONDS, LOOT_TABLE, VALUE_SKEW_EXP, DOUBLE_WIN_CHANCE
+
+# ----------------------------
+# CONFIG
+# ----------------------------
+
+DAY_SECONDS = 24 * 60 * 60
+CHUNK_OPENS = 4_000_000  # opens simulated per NumPy batch (bounds memory)
+PERCENTILES = (5, 50, 95)
+
+
+# ----------------------------
+# Model
+# ----------------------------
+
+class LootModel:
+    """Array form of a loot table, ready for vectorized rolls."""
+
+    def __init__(self, table=LOOT_TABLE, skew: float = VALUE_SKEW_EXP, double_chance: float = DOUBLE_WIN_CHANCE):
+        self.names = [item for item, _, _ in table]
+        weights = np.array([w for _, _, w in table], dtype=np.float64)
+        self.probs = weights / weights.sum()
+        self.low = np.array([rng[0] for _, rng, _ in table], dtype=np.int64)
+        self.span = np.array([rng[1] - rng[0] for _, rng, _ in table], dtype=np.int64)
+        self.skew = skew
+        self.double_chance = double_chance
+
+    def roll(self, rng: np.random.Generator, shape):
+        """(item_index, value) arrays, same maths as run.roll_loot()."""
+        items = rng.choice(len(self.names), size=shape, p=self.probs)
+        u = rng.random(shape) ** self.skew
+        values = self.low[items] + (u * self.span[items]).astype(np.int64)
+        return items, values
+
+
+def parse_strategy(spec: str):
+    """Return (label, fn(model, rng, items, values) -> bool mask of opens that double)."""
+    name, _, arg = spec.partition(":")
+
+    if name == "keep":
+        return spec, lambda model, rng, items, values: np.zeros(values.shape, dtype=bool)
+    if name == "double":
+        return spec, lambda model, rng, items, values: np.ones(values.shape, dtype=bool)
+    if name == "mixed":
+        p = float(arg or 0.5)
+        return spec, lambda model, rng, items, values: rng.random(values.shape) < p
+    if name == "below":
+        frac = float(arg or 0.5)
+
+        def below(model, rng, items, values):
+            span = np.maximum(model.span[items], 1)
+            return (values - model.low[items]) / span < frac
+        return spec, below
+
+    raise argparse.ArgumentTypeError(f"unknown strategy '{spec}'")
+
+
+def open_counts(rng: np.random.Generator, shape, max_opens: int, period_s: float, lag_s: float):
+    """
+    Opens per booster within the period.
+
+    A booster opens as soon as their cooldown is up, plus an exponential lag
+    with mean `lag_s` (people don't sit on the timer). Returns a bool mask of
+    shape (*shape, max_opens) marking which open slots actually happen.
+    """
+    gaps = np.full((*shape, max_opens), float(COOLDOWN_SECONDS))
+    gaps[..., 0] = 0.0
+    if lag_s > 0:
+        gaps += rng.exponential(lag_s, size=gaps.shape)
+    return np.cumsum(gaps, axis=-1) < period_s
+
+
+# ----------------------------
+# Simulation
+# ----------------------------
+
+def simulate(model: LootModel, strategy, boosters: int, days: float, trials: int,
+             lag_days: float = 0.0, seed: int | None = None):
+    """
+    Payout per item per period for `trials` independent periods.
+
+    Returns (payout[trials, items], opens[trials], doubled[trials]).
+    """
+    rng = np.random.default_rng(seed)
+    period_s = days * DAY_SECONDS
+    max_opens = int(period_s // COOLDOWN_SECONDS) + 1
+    n_items = len(model.names)
+
+    per_trial = boosters * max_opens
+    chunk = max(1, CHUNK_OPENS // max(per_trial, 1))
+
+    payout = np.zeros((trials, n_items), dtype=np.float64)
+    opens = np.zeros(trials, dtype=np.int64)
+    doubled = np.zeros(trials, dtype=np.int64)
+
+    for start in range(0, trials, chunk):
+        n = min(chunk, trials - start)
+        shape = (n, boosters, max_opens)
+
+        opened = open_counts(rng, (n, boosters), max_opens, period_s, lag_days * DAY_SECONDS)
+        items, values = model.roll(rng, shape)
+
+        doubles = strategy(model, rng, items, values) & opened
+        wins = rng.random(shape) < model.double_chance
+        values = np.where(doubles, np.where(wins, values * 2, 0), values)
+        values = np.where(opened, values, 0)
+
+        # One bincount per chunk: bucket = trial * n_items + item.
+        trial_idx = np.arange(n).reshape(n, 1, 1)
+        buckets = (trial_idx * n_items + items).ravel()
+        payout[start:start + n] = np.bincount(
+            buckets, weights=values.ravel(), minlength=n * n_items
+        ).reshape(n, n_items)
+        opens[start:start + n] = opened.reshape(n, -1).sum(axis=1)
+        doubled[start:start + n] = doubles.reshape(n, -1).sum(axis=1)
+
+    return payout, opens, doubled
+
+
+# ----------------------------
+# Report
+# ----------------------------
+
+def report(label: str, model: LootModel, payout, opens, doubled, boosters: int, days: float, elapsed: float):
+    trials = len(opens)
+    total_opens = int(opens.sum())
+    rate = total_opens / elapsed if elapsed > 0 else float("inf")
+    bands = np.percentile(payout, PERCENTILES, axis=0)
+
+    print(f"\n=== Strategy: {label} ===")
+    print(
+        f"{trials:,} periods of {days:g} days x {boosters} boosters | "
+        f"{opens.mean():.1f} opens/period | {doubled.sum() / max(total_opens, 1):.0%} doubled | "
+        f"{total_opens:,} opens in {elapsed:.2f}s ({rate:,.0f}/s)"
+    )
+    header = f"{'Item':<16}{'Mean/period':>14}{'Per booster':>14}{'Per open':>11}"
+    header += "".join(f"{f'p{p}':>12}" for p in PERCENTILES)
+    print(header)
+    print("-" * len(header))
+    for i, name in enumerate(model.names):
+        mean = payout[:, i].mean()
+        line = f"{name:<16}{mean:>14,.1f}{mean / boosters:>14,.2f}{payout[:, i].sum() / max(total_opens, 1):>11,.2f}"
+        line += "".join(f"{bands[j, i]:>12,.0f}" for j in range(len(PERCENTILES)))
+        print(line)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Monte Carlo pricing for the lootbox economy.")
+    parser.add_argument("--boosters", type=int, default=60, help="active boosters opening boxes")
+    parser.add_argument("--days", type=float, default=30, help="length of one period in days")
+    parser.add_argument("--trials", type=int, default=10_000, help="number of periods to simulate")
+    parser.add_argument("--lag-days", type=float, default=0.0,
+                        help="mean delay between cooldown ending and the next !open")
+    parser.add_argument("--strategy", action="append", type=parse_strategy,
+                        help="keep | double | mixed:P | below:F (repeatable)")
+    parser.add_argument("--skew", type=float, default=VALUE_SKEW_EXP, help="value skew exponent (live: %(default)s)")
+    parser.add_argument("--double-chance", type=float, default=DOUBLE_WIN_CHANCE,
+                        help="chance a double pays 2x (live: %(default)s)")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args(argv)
+
+    strategies = args.strategy or [parse_strategy("keep"), parse_strategy("double")]
+    model = LootModel(skew=args.skew, double_chance=args.double_chance)
+
+    print(f"Cooldown {COOLDOWN_SECONDS / DAY_SECONDS:g} days | skew u**{args.skew:g} | "
+          f"double pays {args.double_chance:.0%}")
+    for label, strategy in strategies:
+        started = time.perf_counter()
+        payout, opens, doubled = simulate(
+            model, strategy, args.boosters, args.days, args.trials, args.lag_days, args.seed
+        )
+        report(label, model, payout, opens, doubled, args.boosters, args.days, time.perf_counter() - started)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,181 @@
+import re
+
+import discord
+
+from member_index import member_index
+
+# ----------------------------
+# CONFIG
+# ----------------------------
+
+WORK_PHRASE = "your workers have finished their tasks"
+
+MENTION_REGEX = re.compile(r"<@!?(\d+)>")
+USERNAME_REGEX = re.compile(r"@(\w+)")
+
+# One C-level pass instead of a regex pass plus replaces.
+_STRIP_TABLE = str.maketrans("", "", "*_~>|\n")
+
+
+def strip_markdown(text):
+    if not text:
+        return ""
+    return text.translate(_STRIP_TABLE).strip()
+
+
+# ----------------------------
+# Name resolution
+# ----------------------------
+
+def guild_username_resolver(guild: discord.Guild):
+    """username -> member id through the shared member index (kept current by its cog)."""
+    def resolve(username: str):
+        member = member_index.by_username(guild, username)
+        return member.id if member else None
+    return resolve
+
+
+def snapshot_username_resolver(guild: discord.Guild):
+    """username -> member id from one dict built up front, for bots that don't load member_index."""
+    names = {member.name.lower(): member.id for member in guild.members}
+    return lambda username: names.get(username.lower())
+
+
+# ----------------------------
+# Rules
+# ----------------------------
+
+class Rule:
+    """
+    One kind of message the pipeline recognises.
+
+    match() returns None for "not mine" and anything else as the result, so a
+    rule can hand back user ids, an author, or regex groups as it sees fit.
+    """
+
+    name = "rule"
+    needs_embeds = True
+    bots_only = True
+
+    def match(self, message: discord.Message, resolve):
+        raise NotImplementedError
+
+
+class WorkCompletionRule(Rule):
+    """
+    Karuta "your workers have finished their tasks"; result is the credited
+    user ids, gathered across every matching embed in the message.
+    """
+
+    name = "work_completion"
+
+    def __init__(self, phrase: str = WORK_PHRASE):
+        self.phrase = phrase.lower()
+
+    def match(self, message, resolve):
+        user_ids = None
+        for e in message.embeds:
+            desc = e.description
+            if not desc:
+                continue
+            if self.phrase not in strip_markdown(desc.lower()):
+                continue
+            if user_ids is None:
+                user_ids = []
+            mentions = MENTION_REGEX.findall(desc)
+            if mentions:
+                user_ids.extend(int(uid) for uid in mentions)
+            elif resolve is not None:
+                for username in USERNAME_REGEX.findall(desc):
+                    member_id = resolve(username)
+                    if member_id:
+                        user_ids.append(member_id)
+        return tuple(user_ids) if user_ids is not None else None
+
+
+class ForwardedRule(Rule):
+    """Forwarded messages (event points); result is the author."""
+
+    name = "forwarded"
+    needs_embeds = False
+    bots_only = False
+
+    def match(self, message, resolve):
+        return message.author if getattr(message.flags, "forwarded", False) else None
+
+
+class EmbedPatternRule(Rule):
+    """
+    Generic embed matcher for future Karuta (or other bot) embeds: a
+    precompiled pattern searched in title and description, optionally only
+    from one author. Result is the match's groupdict, or its groups.
+    """
+
+    def __init__(self, name: str, pattern: str, *, author_id: int | None = None, flags=re.IGNORECASE):
+        self.name = name
+        self.pattern = re.compile(pattern, flags)
+        self.author_id = author_id
+
+    def match(self, message, resolve):
+        if self.author_id is not None and message.author.id != self.author_id:
+            return None
+        for e in message.embeds:
+            for text in (e.title, e.description):
+                if not text:
+                    continue
+                found = self.pattern.search(text)
+                if found:
+                    return found.groupdict() or found.groups()
+        return None
+
+
+# ----------------------------
+# Pipeline
+# ----------------------------
+
+class Classifier:
+    """
+    Runs every message through a fixed list of rules, first match wins.
+    Cheap gates (bot author, has embeds) are checked once per message rather
+    than once per rule.
+
+        classifier = Classifier([WorkCompletionRule()], resolve=guild_username_resolver(guild))
+        async for rule_name, message, result in classifier.stream(scanner):
+            ...
+    """
+
+    def __init__(self, rules, resolve=None):
+        self.rules = list(rules)
+        self.resolve = resolve
+        self.counts = {rule.name: 0 for rule in self.rules}
+        self.seen = 0
+
+    def classify(self, message):
+        """(rule name, result) for the first rule that claims `message`, else None."""
+        self.seen += 1
+        is_bot = message.author.bot
+        has_embeds = bool(message.embeds)
+        for rule in self.rules:
+            if rule.bots_only and not is_bot:
+                continue
+            if rule.needs_embeds and not has_embeds:
+                continue
+            result = rule.match(message, self.resolve)
+            if result is not None:
+                self.counts[rule.name] += 1
+                return rule.name, result
+        return None
+
+    def run(self, messages):
+        """Generator over an iterable: yields (rule name, message, result) for matches only."""
+        for message in messages:
+            hit = self.classify(message)
+            if hit is not None:
+                yield hit[0], message, hit[1]
+
+    async def stream(self, messages):
+        """Same as run() over an async iterable (channel.history, HistoryScanner)."""
+        async for message in messages:
+            hit = self.classify(message)
+            if hit is not None:
+                yield hit[0], message, hit[1]
@@ -0,0 +1,148 @@
+import discord
+
+# ----------------------------
+# Footers
+# ----------------------------
+
+LUNA_FOOTER = "*Luna ❀⋆ coded by <@296181275344109568>*"
+MIDAS_FOOTER = "*⋆ ˚｡⋆୨ 𝓜𝓲𝓭𝓪𝓼 ୧⋆ ˚｡⋆ coded by <@296181275344109568>*"
+
+
+def add_embed_footer(embed: discord.Embed, footer: str = LUNA_FOOTER, separator: str = "\n\n") -> discord.Embed:
+    """Append the credit line to the description once; calling it again is a no-op."""
+    desc = embed.description
+    if not desc:
+        embed.description = footer
+    elif not desc.endswith(footer):
+        embed.description = desc + separator + footer
+    return embed
+
+
+# ----------------------------
+# Cheap embed copies
+# ----------------------------
+
+def _copy_embed_dict(data: dict) -> dict:
+    # Embed dicts are at most two levels deep (fields list, author/footer/image dicts).
+    out = {}
+    for key, value in data.items():
+        if isinstance(value, list):
+            out[key] = [dict(item) for item in value]
+        elif isinstance(value, dict):
+            out[key] = dict(value)
+        else:
+            out[key] = value
+    return out
+
+
+def clone_embed(data: dict) -> discord.Embed:
+    return discord.Embed.from_dict(_copy_embed_dict(data))
+
+
+# ----------------------------
+# Static embeds
+# ----------------------------
+
+class StaticEmbed:
+    """
+    An embed whose content never changes (help menus, prize lists).
+
+    The builder runs once on first use; after that each call hands out an
+    independent clone of the frozen dict, so callers may still tweak their copy.
+    """
+
+    def __init__(self, builder):
+        self.builder = builder
+        self._frozen = None
+        self.__doc__ = builder.__doc__
+
+    def __call__(self) -> discord.Embed:
+        if self._frozen is None:
+            self._frozen = self.builder().to_dict()
+        return clone_embed(self._frozen)
+
+    def invalidate(self):
+        self._frozen = None
+
+
+def static_embed(builder) -> StaticEmbed:
+    return StaticEmbed(builder)
+
+
+# ----------------------------
+# Templates
+# ----------------------------
+
+class EmbedTemplate:
+    """
+    Precompiled embed layout with str.format placeholders.
+
+    Everything that does not depend on the values (colour, images, inline
+    flags, the footer line) is fixed at construction, so render() only
+    formats the strings that actually vary.
+    """
+
+    def __init__(self, *, title: str = None, description: str = None, color=None, fields=(),
+                 thumbnail: str = None, image: str = None, footer: str | None = LUNA_FOOTER,
+                 separator: str = "\n\n"):
+        if footer:
+            description = f"{description}{separator}{footer}" if description else footer
+        self.title = title
+        self.description = description
+        self.fields = [(name, value, inline) for name, value, inline in fields]
+        base = {"type": "rich"}
+        if color is not None:
+            base["color"] = int(color)
+        if thumbnail:
+            base["thumbnail"] = {"url": thumbnail}
+        if image:
+            base["image"] = {"url": image}
+        self._base = base
+
+    def render(self, **values) -> discord.Embed:
+        data = _copy_embed_dict(self._base)
+        if self.title is not None:
+            data["title"] = self.title.format(**values)
+        if self.description is not None:
+            data["description"] = self.description.format(**values)
+        if self.fields:
+            data["fields"] = [
+                {"name": name.format(**values), "value": value.format(**values), "inline": inline}
+                for name, value, inline in self.fields
+            ]
+        for key in ("thumbnail", "image"):
+            url = values.get(key)
+            if url:
+                data[key] = {"url": url}
+        return discord.Embed.from_dict(data)
+
+
+# ----------------------------
+# Diffing
+# ----------------------------
+
+def embed_diff(old: dict | None, new: dict) -> list:
+    """
+    Visible differences between two embed dicts, as a list of paths like
+    "title" or "fields[2].value". Empty means an edit would change nothing.
+    """
+    if old is None:
+        return ["*"]
+
+    changed = []
+    for key in set(old) | set(new):
+        if key == "fields":
+            continue
+        if old.get(key) != new.get(key):
+            changed.append(key)
+
+    old_fields = old.get("fields", [])
+    new_fields = new.get("fields", [])
+    for i in range(max(len(old_fields), len(new_fields))):
+        if i >= len(old_fields) or i >= len(new_fields):
+            changed.append(f"fields[{i}]")
+            continue
+        for part in ("name", "value", "inline"):
+            if old_fields[i].get(part) != new_fields[i].get(part):
+                changed.append(f"fields[{i}].{part}")
+    return changed
@@ -0,0 +1,209 @@
+import asyncio
+import csv
+import io
+import multiprocessing
+import sys
+import types
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+
+import discord
+
+# ----------------------------
+# CONFIG
+# ----------------------------
+
+CSV_ROW_THRESHOLD = 20_000   # above this many rows, "auto" exports as CSV
+MAX_WORKERS = 1
+WIDTH_PADDING = 2
+MAX_WIDTH = 80
+
+FORMAT_LABELS = {"xlsx": "Excel", "csv": "CSV"}
+
+# Column formats (plain strings, so specs pickle cheaply into the pool).
+TEXT = "text"        # stored as text, left aligned (ids, commands)
+LEFT = "left"        # left aligned, type kept
+GENERAL = "general"
+
+
+# ----------------------------
+# Spec
+# ----------------------------
+
+class Sheet:
+    """
+    One worksheet as plain data: a header row, value rows, and one format
+    per column. Built on the event loop, rendered in the export process.
+    """
+
+    __slots__ = ("title", "header", "rows", "formats", "padding")
+
+    def __init__(self, title: str, header, rows, formats=(), padding: int = WIDTH_PADDING):
+        self.title = title[:31]  # Excel's sheet name limit
+        self.header = list(header)
+        self.rows = [list(row) for row in rows]
+        self.formats = list(formats)
+        self.padding = padding
+
+
+# ----------------------------
+# Renderers (run in the export process)
+# ----------------------------
+
+def _column_widths(sheet: Sheet):
+    widths = [len(str(value)) for value in sheet.header]
+    for row in sheet.rows:
+        for i, value in enumerate(row):
+            if value is None:
+                continue
+            length = len(str(value))
+            if i >= len(widths):
+                widths.append(length)
+            elif length > widths[i]:
+                widths[i] = length
+    return [min(MAX_WIDTH, w + sheet.padding) for w in widths]
+
+
+def render_xlsx(sheets) -> bytes:
+    """Write-only (streaming) workbook: rows are serialised as they are appended."""
+    from openpyxl import Workbook
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.styles import Alignment, NamedStyle, numbers
+    from openpyxl.utils import get_column_letter
+
+    wb = Workbook(write_only=True)
+
+    # One named style per format, registered once and referenced by every cell.
+    styles = {
+        TEXT: NamedStyle(name="export_text", number_format=numbers.FORMAT_TEXT,
+                         alignment=Alignment(horizontal="left")),
+        LEFT: NamedStyle(name="export_left", alignment=Alignment(horizontal="left")),
+    }
+    for style in styles.values():
+        wb.add_named_style(style)
+
+    for sheet in sheets:
+        ws = wb.create_sheet(title=sheet.title)
+        # Column widths have to be set before the first row in write-only mode.
+        for i, width in enumerate(_column_widths(sheet), start=1):
+            ws.column_dimensions[get_column_letter(i)].width = width
+
+        ws.append(sheet.header)
+        style_names = [styles[f].name if f in styles else None for f in sheet.formats]
+        if not any(style_names):
+            for row in sheet.rows:
+                ws.append(row)
+            continue
+
+        for row in sheet.rows:
+            out = []
+            for i, value in enumerate(row):
+                name = style_names[i] if i < len(style_names) else None
+                if name is None:
+                    out.append(value)
+                    continue
+                if name == "export_text" and value is not None:
+                    value = str(value)
+                cell = WriteOnlyCell(ws, value=value)
+                cell.style = name
+                out.append(cell)
+            ws.append(out)
+
+    buffer = io.BytesIO()
+    wb.save(buffer)
+    return buffer.getvalue()
+
+
+def render_csv(sheets) -> bytes:
+    """Fast path: one CSV, sheets stacked with a title line between them."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for n, sheet in enumerate(sheets):
+        if len(sheets) > 1:
+            if n:
+                writer.writerow([])
+            writer.writerow([f"# {sheet.title}"])
+        writer.writerow(sheet.header)
+        writer.writerows(sheet.rows)
+    # BOM so Excel opens it as UTF-8 (display names are full of emoji).
+    return buffer.getvalue().encode("utf-8-sig")
+
+
+# ----------------------------
+# Service
+# ----------------------------
+
+@contextmanager
+def _bare_main():
+    """
+    A spawned worker re-imports the parent's __main__ (as __mp_main__) before
+    it runs anything. run.py and testy.py build the bot and load the loot
+    history at import, so workers are started with an empty __main__ in its
+    place: the renderers only need this module.
+    """
+    main = sys.modules["__main__"]
+    sys.modules["__main__"] = types.ModuleType("__main__")
+    try:
+        yield
+    finally:
+        sys.modules["__main__"] = main
+
+
+class ExportService:
+    """
+    Builds spreadsheet files off the event loop.
+
+    openpyxl is CPU-bound and holds the GIL, so rendering happens in a
+    separate process; the loop only awaits the finished bytes. "auto" picks
+    CSV once an export passes CSV_ROW_THRESHOLD rows.
+
+    Workers are spawned rather than forked: a fork would copy the running
+    bot (event loop, sockets, sqlite connection) into every worker.
+    """
+
+    def __init__(self, max_workers: int = MAX_WORKERS):
+        self.max_workers = max_workers
+        self._pool = None
+
+    def _executor(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.max_workers, mp_context=multiprocessing.get_context("spawn")
+            )
+        return self._pool
+
+    @staticmethod
+    def pick_format(sheets, fmt: str = "auto") -> str:
+        if fmt != "auto":
+            return fmt
+        rows = sum(len(sheet.rows) for sheet in sheets)
+        return "csv" if rows > CSV_ROW_THRESHOLD else "xlsx"
+
+    async def render(self, sheets, fmt: str = "auto"):
+        """(bytes, "xlsx" | "csv")."""
+        fmt = self.pick_format(sheets, fmt)
+        renderer = render_csv if fmt == "csv" else render_xlsx
+        loop = asyncio.get_running_loop()
+        # Workers are spawned inside submit(), so this is where __main__ has to be hidden.
+        with _bare_main():
+            future = loop.run_in_executor(self._executor(), renderer, list(sheets))
+        data = await future
+        return data, fmt
+
+    async def file(self, sheets, basename: str, fmt: str = "auto") -> discord.File:
+        data, fmt = await self.render(sheets, fmt)
+        return discord.File(io.BytesIO(data), filename=f"{basename}.{fmt}")
+
+    @staticmethod
+    def label(file: discord.File) -> str:
+        """"Excel" or "CSV", from the file's extension, for user-facing messages."""
+        return FORMAT_LABELS.get(file.filename.rsplit(".", 1)[-1], "Excel")
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+
+# Shared instance used by every cog.
+exporter = ExportService()
@@ -0,0 +1,191 @@
+import asyncio
+import time
+from datetime import datetime, timezone
+
+import discord
+
+from outbound import TokenBucket
+
+# ----------------------------
+# CONFIG
+# ----------------------------
+
+DEFAULT_CONCURRENCY = 4
+WINDOWS_PER_WORKER = 4       # more windows than workers, so one busy day can't stall the rest
+PAGE_SIZE = 100              # messages per history request
+REQUEST_RATE = 4.0           # history requests per second across every running scan
+REQUEST_BURST = 4
+QUEUE_SIZE = 1000            # messages buffered ahead of the consumer
+
+# Shared by every scanner, so concurrent scans split REQUEST_RATE instead of each getting it.
+history_bucket = TokenBucket(REQUEST_RATE, REQUEST_BURST)
+
+
+def _snowflake(when) -> int:
+    """A datetime, or an int snowflake that is taken as-is."""
+    if isinstance(when, int):
+        return when
+    return discord.utils.time_snowflake(when, high=False)
+
+
+def progress_bar(fraction: float, length: int = 20) -> str:
+    filled = min(length, int(fraction * length))
+    return "#" * filled + "-" * (length - filled)
+
+
+# ----------------------------
+# Windows
+# ----------------------------
+
+class _Window:
+    __slots__ = ("index", "start", "end", "reached", "done")
+
+    def __init__(self, index: int, start: int, end: int):
+        self.index = index
+        self.start = start      # snowflake, inclusive
+        self.end = end          # snowflake, exclusive
+        self.reached = start - 1  # newest snowflake handed to the caller
+        self.done = False
+
+    def covered(self) -> int:
+        return (self.end if self.done else self.reached + 1) - self.start
+
+
+# ----------------------------
+# Scanner
+# ----------------------------
+
+class HistoryScanner:
+    """
+    Reads channel history between two points in time with several requests
+    in flight instead of one long newest-to-oldest stream.
+
+    The range is cut into snowflake-bounded windows. Workers take windows off
+    a shared queue, read each one oldest first, and feed one bounded queue
+    that the caller iterates. Every history page costs a token from a bucket
+    shared with every other scan (history_bucket unless one is passed in), on
+    top of discord.py's own 429 handling.
+
+    Messages arrive in no particular order across windows. Two things are
+    tracked while the scan runs:
+
+      - progress:      fraction of the time range already read
+      - covered_until: every message with an id up to this one has been
+                       handed out, so an incremental scan can resume after it
+
+        scanner = HistoryScanner(channel, after=since)
+        async for message in scanner:
+            ...
+    """
+
+    def __init__(self, channel, *, after, before=None,
+                 concurrency: int = DEFAULT_CONCURRENCY, windows: int | None = None,
+                 bucket: TokenBucket | None = None):
+        # after/before: datetimes or snowflakes; after is inclusive, before exclusive.
+        before = before or datetime.now(timezone.utc)
+        self.channel = channel
+        self.start = _snowflake(after)
+        self.end = _snowflake(before)
+        self.concurrency = max(1, concurrency)
+        self.scanned = 0
+        self._bucket = bucket or history_bucket
+
+        count = max(1, windows or self.concurrency * WINDOWS_PER_WORKER)
+        span = max(1, self.end - self.start)
+        bounds = [self.start + span * i // count for i in range(count)] + [self.end]
+        self._windows = [
+            _Window(i, bounds[i], bounds[i + 1])
+            for i in range(count)
+            if bounds[i] < bounds[i + 1]
+        ]
+
+    # ------------
+    # Progress
+    # ------------
+
+    @property
+    def progress(self) -> float:
+        span = self.end - self.start
+        if span <= 0:
+            return 1.0
+        return min(1.0, sum(w.covered() for w in self._windows) / span)
+
+    @property
+    def covered_until(self) -> int:
+        for window in self._windows:
+            if not window.done:
+                return window.reached
+        return self.end - 1
+
+    # ------------
+    # Workers
+    # ------------
+
+    async def _take_token(self):
+        while True:
+            now = time.monotonic()
+            wait = self._bucket.wait_time(now)
+            if wait <= 0:
+                self._bucket.take(now)
+                return
+            await asyncio.sleep(wait)
+
+    async def _read_window(self, window: _Window, out: asyncio.Queue):
+        # `after` is exclusive, so step back one id to include the window's first millisecond.
+        history = self.channel.history(
+            limit=None,
+            after=discord.Object(id=window.start - 1),
+            before=discord.Object(id=window.end),
+            oldest_first=True,
+        )
+        count = 0
+        await self._take_token()
+        async for message in history:
+            await out.put((window, message))
+            count += 1
+            if count % PAGE_SIZE == 0:
+                await self._take_token()  # the next message comes from a new page
+        await out.put((window, None))
+
+    async def _worker(self, pending: asyncio.Queue, out: asyncio.Queue):
+        while True:
+            try:
+                window = pending.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            await self._read_window(window, out)
+
+    async def __aiter__(self):
+        pending = asyncio.Queue()
+        for window in self._windows:
+            pending.put_nowait(window)
+        out = asyncio.Queue(maxsize=QUEUE_SIZE)
+        workers = [
+            asyncio.create_task(self._worker(pending, out))
+            for _ in range(min(self.concurrency, len(self._windows)))
+        ]
+        finished = asyncio.gather(*workers, return_exceptions=True)
+        try:
+            while True:
+                if out.empty() and finished.done():
+                    break
+                getter = asyncio.ensure_future(out.get())
+                await asyncio.wait({getter, finished}, return_when=asyncio.FIRST_COMPLETED)
+                if not getter.done():
+                    getter.cancel()
+                    continue
+                window, message = getter.result()
+                # Window state moves as the caller consumes, so covered_until
+                # never runs ahead of messages still sitting in the queue.
+                if message is None:
+                    window.done = True
+                    continue
+                window.reached = message.id
+                self.scanned += 1
+                yield message
+            for result in finished.result():
+                if isinstance(result, BaseException):
+                    raise result  # surface a worker's failure
+        finally:
+            for task in workers:
+                task.cancel()
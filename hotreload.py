@@ -0,0 +1,67 @@
+import sys
+import time
+import traceback
+
+from discord.ext import commands
+
+# ----------------------------
+# State hand-over
+# ----------------------------
+#
+# An extension opts in by defining two module-level hooks:
+#
+#     def export_state(bot) -> dict      # runs on the old module, before unload
+#     def import_state(bot, state: dict)  # runs on the new module, after setup()
+#
+# Anything not handed over is rebuilt by setup() as on a cold start.
+
+EXPORT_HOOK = "export_state"
+IMPORT_HOOK = "import_state"
+
+
+def _export(bot: commands.Bot, name: str):
+    module = sys.modules.get(name)
+    hook = getattr(module, EXPORT_HOOK, None)
+    if hook is None:
+        return None
+    try:
+        return hook(bot)
+    except Exception:
+        print(f"[HotReload] {name}.{EXPORT_HOOK} failed; reloading without state.")
+        traceback.print_exc()
+        return None
+
+
+def _import(bot: commands.Bot, name: str, state):
+    module = sys.modules.get(name)
+    hook = getattr(module, IMPORT_HOOK, None)
+    if hook is None or state is None:
+        return False
+    try:
+        hook(bot, state)
+        return True
+    except Exception:
+        print(f"[HotReload] {name}.{IMPORT_HOOK} failed; extension starts cold.")
+        traceback.print_exc()
+        return False
+
+
+async def reload_with_state(bot: commands.Bot, name: str):
+    """
+    bot.reload_extension(name), carrying live state from the old module to the
+    new one. The gateway connection and every other extension stay untouched.
+
+    If the new code fails to load, discord.py puts the old module back; its
+    state is handed back to it the same way before the error is re-raised.
+
+    Returns (elapsed seconds, whether state was handed over).
+    """
+    started = time.perf_counter()
+    state = _export(bot, name)
+    try:
+        await bot.reload_extension(name)
+    except Exception:
+        _import(bot, name, state)
+        raise
+    handed = _import(bot, name, state)
+    return time.perf_counter() - started, handed
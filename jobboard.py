@@ -1,6 +1,10 @@
 import discord
 from discord.ext import commands
-import os, json, datetime, asyncio, traceback
+import os, json, datetime, asyncio, traceback, bisect
+from storage import db
+from member_index import member_index
+from embeds import add_embed_footer
+from ticket_lifecycle import ticket_manager, TicketLimitReached
 
 # ----------------------------
 # CONFIG
@@ -49,22 +53,11 @@ MILESTONE_PING_ROLE_ID = 1445526242949332993
 CLAN_HELP_PING_ROLE_ID = 1286451226937917488
 
 active_ticket_cache = {}
-MILESTONE_CLAIMS_FILE = "milestone_claim_history.json"
 
 # ----------------------------
 # FOOTERS
 # ----------------------------
 
-def add_embed_footer(embed: discord.Embed) -> discord.Embed:
-    """Normal embeds keep the Luna footer."""
-    footer_line = "*Luna ❀⋆ coded by <@296181275344109568>*"
-    if embed.description:
-        embed.description = embed.description.replace(f"\n\n{footer_line}", "")
-        embed.description += f"\n\n{footer_line}"
-    else:
-        embed.description = footer_line
-    return embed
-
 def set_milestone_footer(embed: discord.Embed, owner_id: int, milestone: str):
     """ONLY used for reward embeds. This DOES NOT show Luna footer."""
     embed.set_footer(text=f"OwnerID: {owner_id} | Milestone: {milestone}")
@@ -87,32 +80,72 @@ def extract_footer_meta(embed: discord.Embed):
 # Load / Save Claims
 # ----------------------------
 
+class ClaimIndex:
+    """
+    Milestone claims grouped by user, each user's list kept in timestamp
+    order, plus the set of milestones they have claimed. Claim checks are a
+    dict lookup instead of a pass over every claim.
+    """
+
+    def __init__(self, claims=()):
+        self.by_user = {}      # user_id -> [claim], oldest first
+        self.milestones = {}   # user_id -> {milestone}
+        self.count = 0
+        for entry in claims:
+            self.add(entry)
+
+    def __len__(self):
+        return self.count
+
+    def add(self, entry: dict):
+        user_claims = self.by_user.setdefault(entry["user_id"], [])
+        ts = entry.get("timestamp") or ""
+        if not user_claims or ts >= (user_claims[-1].get("timestamp") or ""):
+            user_claims.append(entry)
+        else:
+            bisect.insort(user_claims, entry, key=lambda c: c.get("timestamp") or "")
+        if entry.get("milestone"):
+            self.milestones.setdefault(entry["user_id"], set()).add(entry["milestone"])
+        self.count += 1
+
+    def for_user(self, user_id: int) -> list:
+        return self.by_user.get(user_id, [])
+
+    def claimed(self, user_id: int) -> set:
+        return self.milestones.get(user_id, set())
+
+    def remove_user(self, user_id: int) -> int:
+        removed = len(self.by_user.pop(user_id, []))
+        self.milestones.pop(user_id, None)
+        self.count -= removed
+        return removed
+
+
 def load_claim_history():
     print("[load_claim_history] Loading claim history...")
-    if os.path.exists(MILESTONE_CLAIMS_FILE):
-        try:
-            with open(MILESTONE_CLAIMS_FILE, "r") as f:
-                data = json.load(f)
-                print(f"[load_claim_history] Loaded {len(data.get('claims', []))} claims.")
-                return data
-        except Exception as e:
-            print(f"[load_claim_history] ERROR reading file: {e}")
-            traceback.print_exc()
-            return {"claims": []}
-    print("[load_claim_history] File not found, starting fresh.")
-    return {"claims": []}
-
-def save_claim_history():
-    print(f"[save_claim_history] Saving {len(claim_history.get('claims', []))} claims...")
     try:
-        with open(MILESTONE_CLAIMS_FILE, "w") as f:
-            json.dump(claim_history, f, indent=4)
-        print("[save_claim_history] Save successful.")
+        rows = db.query(
+            "SELECT user_id, milestone, timestamp, reward_type, reward_amount "
+            "FROM milestone_claims ORDER BY id"
+        )
     except Exception as e:
-        print(f"[save_claim_history] ERROR saving file: {e}")
+        print(f"[load_claim_history] ERROR reading database: {e}")
         traceback.print_exc()
+        return ClaimIndex()
+
+    index = ClaimIndex(
+        {
+            "user_id": user_id,
+            "milestone": milestone,
+            "timestamp": timestamp,
+            "reward": {"type": reward_type, "amount": reward_amount},
+        }
+        for user_id, milestone, timestamp, reward_type, reward_amount in rows
+    )
+    print(f"[load_claim_history] Loaded {len(index)} claims for {len(index.by_user)} users.")
+    return index
 
-claim_history = load_claim_history()
+claim_index = load_claim_history()
 
 def log_milestone_completion(user_id: int, milestone: str, reward_type: str, reward_amount: int | None):
     print(
@@ -125,48 +158,130 @@ def log_milestone_completion(user_id: int, milestone: str, reward_type: str, rew
         "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(),
         "reward": {"type": reward_type, "amount": reward_amount},
     }
-    claim_history["claims"].append(entry)
-    save_claim_history()
+    claim_index.add(entry)
+    db.write(
+        "INSERT INTO milestone_claims (user_id, milestone, timestamp, reward_type, reward_amount) "
+        "VALUES (?, ?, ?, ?, ?)",
+        (user_id, milestone, entry["timestamp"], reward_type, reward_amount),
+    )
 
 def get_confirmed_milestones_for_user(user_id: int):
-    print(f"[get_confirmed_milestones_for_user] Checking confirmed milestones for user_id={user_id}")
-    results = set()
-    for entry in claim_history.get("claims", []):
-        if entry.get("user_id") != user_id:
-            continue
-        milestone = entry.get("milestone")
-        if milestone:
-            results.add(milestone)
-    print(f"[get_confirmed_milestones_for_user] User {user_id} has {len(results)} completed milestones.")
-    return results
+    return claim_index.claimed(user_id)
+
+# ----------------------------
+# Ticket State
+# ----------------------------
+
+class TicketState:
+    __slots__ = ("message_id", "channel_id", "owner_id", "milestone", "reward_type", "reward_amount", "confirmed")
+
+    def __init__(self, message_id: int, channel_id: int, owner_id: int, milestone: str,
+                 reward_type: str | None = None, reward_amount: int | None = None, confirmed: bool = False):
+        self.message_id = message_id
+        self.channel_id = channel_id
+        self.owner_id = owner_id
+        self.milestone = milestone
+        self.reward_type = reward_type
+        self.reward_amount = reward_amount
+        self.confirmed = confirmed
+
+
+class TicketStore:
+    """
+    One TicketState per reward message, mirrored to milestone_tickets.
+
+    The persistent MilestoneTicketView is a single instance shared by every
+    ticket, so it keeps no state of its own; each button press looks its
+    ticket up here by message id.
+    """
+
+    def __init__(self):
+        self.tickets = {}  # message id -> TicketState
+
+    def load(self):
+        try:
+            rows = db.query(
+                "SELECT message_id, channel_id, owner_id, milestone, reward_type, reward_amount, confirmed "
+                "FROM milestone_tickets"
+            )
+        except Exception as e:
+            print(f"[TicketStore] ERROR reading database: {e}")
+            traceback.print_exc()
+            return
+        self.tickets = {
+            row[0]: TicketState(*row[:6], confirmed=bool(row[6]))
+            for row in rows
+        }
+        print(f"[TicketStore] Loaded {len(self.tickets)} open milestone tickets.")
+
+    def get(self, message_id: int) -> TicketState | None:
+        return self.tickets.get(message_id)
+
+    def save(self, state: TicketState):
+        self.tickets[state.message_id] = state
+        db.write(
+            "INSERT OR REPLACE INTO milestone_tickets "
+            "(message_id, channel_id, owner_id, milestone, reward_type, reward_amount, confirmed) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (state.message_id, state.channel_id, state.owner_id, state.milestone,
+             state.reward_type, state.reward_amount, int(state.confirmed)),
+            key=("milestone_tickets", state.message_id),
+        )
+
+    def remove(self, message_id: int):
+        self.tickets.pop(message_id, None)
+        db.write(
+            "DELETE FROM milestone_tickets WHERE message_id = ?",
+            (message_id,),
+            key=("milestone_tickets", message_id),
+        )
+
+    def remove_channel(self, channel_id: int):
+        """Drop every ticket message in a channel that was closed or deleted."""
+        for message_id in [m for m, state in self.tickets.items() if state.channel_id == channel_id]:
+            self.remove(message_id)
+
+    def resolve(self, message: discord.Message) -> TicketState | None:
+        """State for a ticket message; tickets opened before the store existed are migrated from their footer once."""
+        state = self.tickets.get(message.id)
+        if state is not None or not message.embeds:
+            return state
+        owner, milestone = extract_footer_meta(message.embeds[0])
+        if not owner or not milestone:
+            return None
+        state = TicketState(message.id, message.channel.id, owner, milestone)
+        self.save(state)
+        return state
+
+
+# Shared instance used by every cog.
+ticket_store = TicketStore()
+ticket_store.load()
+
+
+def forget_ticket_channel(channel_id: int):
+    # Looks the store up at call time: import_state may swap in a handed-over one.
+    ticket_store.remove_channel(channel_id)
 
 # ----------------------------
 # Milestone Ticket View (Persistent)
 # ----------------------------
 
 class MilestoneTicketView(discord.ui.View):
-    def __init__(self, ticket_owner_id: int | None = None, milestone: str | None = None):
+    """Stateless: every handler works on the TicketState for interaction.message."""
+
+    def __init__(self):
         super().__init__(timeout=None)
-        self.ticket_owner_id = ticket_owner_id
-        self.milestone = milestone or ""
-        self.chosen_reward_type = None
-        self.chosen_reward_amount = None
-        self.confirmed = False
 
     # ------------
     # Helper
     # ------------
 
-    def restore_from_footer(self, embed: discord.Embed):
-        """If bot restarted, rehydrate ticket_owner + milestone."""
-        owner, milestone = extract_footer_meta(embed)
-        if owner:
-            self.ticket_owner_id = owner
-        if milestone:
-            self.milestone = milestone
-
-    def _user_is_owner(self, user):
-        return user.id == self.ticket_owner_id
+    async def _state(self, interaction: discord.Interaction) -> TicketState | None:
+        state = ticket_store.resolve(interaction.message)
+        if state is None:
+            await interaction.response.send_message("⚠️ This ticket's data could not be found.", ephemeral=True)
+        return state
 
     def _user_is_staff(self, member):
         return any(role.id in MILESTONE_STAFF_ROLES for role in member.roles)
@@ -177,94 +292,112 @@ class MilestoneTicketView(discord.ui.View):
 
     @discord.ui.button(label="💠 Bits", style=discord.ButtonStyle.primary, custom_id="milestone_bits")
     async def pick_bits(self, interaction: discord.Interaction, btn):
-        embed = interaction.message.embeds[0]
-        self.restore_from_footer(embed)
+        state = await self._state(interaction)
+        if state is None:
+            return
 
-        if interaction.user.id != self.ticket_owner_id:
+        if interaction.user.id != state.owner_id:
             return await interaction.response.send_message("❌ Only the ticket owner can choose.", ephemeral=True)
+        if state.confirmed:
+            return await interaction.response.send_message("⚠️ This milestone is already confirmed.", ephemeral=True)
 
-        self.chosen_reward_type = "bits"
+        state.reward_type = "bits"
+        state.reward_amount = None
+        ticket_store.save(state)
 
         await interaction.response.defer(ephemeral=True)
-        await self._update_reward_embed(interaction)
+        await self._update_reward_embed(interaction, state)
 
     @discord.ui.button(label="🎟️ Tickets", style=discord.ButtonStyle.success, custom_id="milestone_tickets")
     async def pick_tickets(self, interaction: discord.Interaction, btn):
-        embed = interaction.message.embeds[0]
-        self.restore_from_footer(embed)
+        state = await self._state(interaction)
+        if state is None:
+            return
 
-        if interaction.user.id != self.ticket_owner_id:
+        if interaction.user.id != state.owner_id:
             return await interaction.response.send_message("❌ Only the ticket owner can choose.", ephemeral=True)
+        if state.confirmed:
+            return await interaction.response.send_message("⚠️ This milestone is already confirmed.", ephemeral=True)
 
-        tickets = REWARD_OPTIONS.get(self.milestone, {}).get("tickets", None)
-        self.chosen_reward_type = "tickets"
-        self.chosen_reward_amount = tickets
+        state.reward_type = "tickets"
+        state.reward_amount = REWARD_OPTIONS.get(state.milestone, {}).get("tickets", None)
+        ticket_store.save(state)
 
         await interaction.response.defer(ephemeral=True)
-        await self._update_reward_embed(interaction)
+        await self._update_reward_embed(interaction, state)
 
-    async def _update_reward_embed(self, interaction):
+    async def _update_reward_embed(self, interaction, state: TicketState):
         msg = interaction.message
         embed = msg.embeds[0]
 
         embed.description = (
-            f"You are claiming milestone **{self.milestone}**.\n\n"
+            f"You are claiming milestone **{state.milestone}**.\n\n"
             f"Current chosen reward:\n"
-            f"{'💠 Bits' if self.chosen_reward_type=='bits' else f'🎟️ {self.chosen_reward_amount} Tickets' if self.chosen_reward_type else 'None'}\n\n"
+            f"{'💠 Bits' if state.reward_type=='bits' else f'🎟️ {state.reward_amount} Tickets' if state.reward_type else 'None'}\n\n"
             "Staff will press **✔️ Confirm Milestone** after manually trading the reward."
         )
 
-        embed.set_footer(text=f"OwnerID: {self.ticket_owner_id} | Milestone: {self.milestone}")
-
         await msg.edit(embed=embed, view=self)
 
     @discord.ui.button(label="✔️ Confirm Milestone", style=discord.ButtonStyle.secondary, custom_id="milestone_confirm")
     async def confirm_milestone(self, interaction: discord.Interaction, btn):
-        embed = interaction.message.embeds[0]
-        self.restore_from_footer(embed)
+        state = await self._state(interaction)
+        if state is None:
+            return
 
         if not self._user_is_staff(interaction.user):
             return await interaction.response.send_message("❌ Only staff may confirm.", ephemeral=True)
 
-        if not self.chosen_reward_type:
+        if state.confirmed:
+            return await interaction.response.send_message("⚠️ This milestone is already confirmed.", ephemeral=True)
+
+        if not state.reward_type:
             return await interaction.response.send_message("⚠️ User must choose a reward first.", ephemeral=True)
 
+        # Mark before any await so a second staff click can't log the claim twice.
+        state.confirmed = True
+        ticket_store.save(state)
+
         log_milestone_completion(
-            user_id=self.ticket_owner_id,
-            milestone=self.milestone,
-            reward_type=self.chosen_reward_type,
-            reward_amount=self.chosen_reward_amount,
+            user_id=state.owner_id,
+            milestone=state.milestone,
+            reward_type=state.reward_type,
+            reward_amount=state.reward_amount,
         )
 
-        reward_text = "Bits" if self.chosen_reward_type == "bits" else f"{self.chosen_reward_amount} Tickets"
+        reward_text = "Bits" if state.reward_type == "bits" else f"{state.reward_amount} Tickets"
 
         await interaction.response.send_message(
-            f"✅ Milestone **{self.milestone}** confirmed for <@{self.ticket_owner_id}> — Reward: **{reward_text}**.",
+            f"✅ Milestone **{state.milestone}** confirmed for <@{state.owner_id}> — Reward: **{reward_text}**.",
             ephemeral=True,
         )
 
         await interaction.channel.send(
-            f"📘 Milestone **{self.milestone}** confirmed for <@{self.ticket_owner_id}> — Reward: **{reward_text}**."
+            f"📘 Milestone **{state.milestone}** confirmed for <@{state.owner_id}> — Reward: **{reward_text}**."
         )
 
-
-        for child in self.children:
+        # A fresh copy: the shared instance's buttons must stay enabled for other tickets.
+        done = MilestoneTicketView()
+        for child in done.children:
             if child.custom_id in ("milestone_bits", "milestone_tickets", "milestone_confirm"):
                 child.disabled = True
 
-        await interaction.message.edit(view=self)
+        await interaction.message.edit(view=done)
 
     @discord.ui.button(label="🔒 Close Ticket", style=discord.ButtonStyle.danger, custom_id="milestone_close")
     async def close_ticket(self, interaction: discord.Interaction, btn):
-        embed = interaction.message.embeds[0]
-        self.restore_from_footer(embed)
+        state = await self._state(interaction)
+        if state is None:
+            return
 
-        if not (self._user_is_owner(interaction.user) or self._user_is_staff(interaction.user)):
+        if not (interaction.user.id == state.owner_id or self._user_is_staff(interaction.user)):
             return await interaction.response.send_message("❌ You cannot close this ticket.", ephemeral=True)
 
         if interaction.channel:
             await interaction.response.defer(ephemeral=True)
-            await interaction.channel.delete()
+            await interaction.channel.send(f"🔒 Ticket closed by {interaction.user.mention}. Archiving…")
+            await ticket_manager.close(interaction.channel, owner_id=state.owner_id,
+                                       reason=f"closed by {interaction.user}")
 
 # ----------------------------
 # Milestone Select View
@@ -327,7 +460,8 @@ async def handle_milestone_selection(interaction, member, milestone_name):
             ephemeral=True,
         )
 
-    active_ticket_cache.setdefault(member.id, []).append(milestone_name)
+    # Channel creation may queue behind other claims; acknowledge inside the 3 second window.
+    await interaction.response.defer(ephemeral=True, thinking=True)
 
     category = channel.category
     overwrites = {
@@ -341,11 +475,26 @@ async def handle_milestone_selection(interaction, member, milestone_name):
     }
 
     ticket_channel_name = f"ticket-{member.name.lower()}-{milestone_name.split()[0]}"
-    ticket_channel = await guild.create_text_channel(
-        name=ticket_channel_name,
-        category=category,
-        overwrites=overwrites
-    )
+    try:
+        ticket_channel = await ticket_manager.open(
+            guild, member, ticket_channel_name,
+            category=category,
+            overwrites=overwrites,
+        )
+    except TicketLimitReached:
+        return await interaction.followup.send(
+            "⏳ Too many tickets are open right now. Please try again later.",
+            ephemeral=True,
+        )
+    except discord.HTTPException as e:
+        print(f"[milestone] Ticket channel creation failed: {e}")
+        return await interaction.followup.send(
+            "❌ Could not create your ticket channel. Please try again later.",
+            ephemeral=True,
+        )
+
+    # Only once the channel exists, so a refused or failed open leaves nothing behind.
+    active_ticket_cache.setdefault(member.id, []).append(milestone_name)
 
     milestone_instructions = ""
     for _, (name, instructions) in MILESTONE_EMOJIS.items():
@@ -386,10 +535,10 @@ async def handle_milestone_selection(interaction, member, milestone_name):
     )
     reward_embed = set_milestone_footer(reward_embed, member.id, milestone_name)
 
-    view = MilestoneTicketView(ticket_owner_id=member.id, milestone=milestone_name)
-    await ticket_channel.send(embed=reward_embed, view=view)
+    reward_message = await ticket_channel.send(embed=reward_embed, view=MilestoneTicketView())
+    ticket_store.save(TicketState(reward_message.id, ticket_channel.id, member.id, milestone_name))
 
-    await interaction.response.send_message(
+    await interaction.followup.send(
         f"📩 Ticket created in {ticket_channel.mention} for **{milestone_name}**!",
         ephemeral=True,
     )
@@ -403,36 +552,17 @@ async def jobreward(ctx, *, query=None):
     if not query:
         return await ctx.send("❌ Usage: `!jobreward USER`")
 
-    query_l = query.lower().strip()
-    target = None
-
-    if query_l.startswith("<@") and query_l.endswith(">"):
-        try:
-            uid = int(query_l.replace("<", "").replace(">", "").replace("@", "").replace("!", ""))
-            target = ctx.guild.get_member(uid)
-        except:
-            pass
-
-    if not target and query_l.isdigit():
-        target = ctx.guild.get_member(int(query_l))
-
-    if not target:
-        for m in ctx.guild.members:
-            if query_l in m.display_name.lower() or query_l in m.name.lower():
-                target = m
-                break
+    target = member_index.find(ctx.guild, query)
 
     if not target:
         return await ctx.send(f"❌ Could not find `{query}`")
 
-    user_claims = [c for c in claim_history["claims"] if c.get("user_id") == target.id]
+    user_claims = claim_index.for_user(target.id)
     if not user_claims:
         return await ctx.send(f"📭 No milestone claims found for {target.mention}.")
 
-    user_claims.sort(key=lambda x: x.get("timestamp", ""), reverse=True)
-
     lines = []
-    for c in user_claims:
+    for c in reversed(user_claims):
         ts = c.get("timestamp")
         try:
             dt = datetime.datetime.fromisoformat(ts).astimezone(datetime.timezone.utc)
@@ -641,14 +771,8 @@ async def milestonereset(ctx, target: discord.Member = None):
     if target is None:
         target = ctx.author
 
-    global claim_history
-    old_count = len(claim_history["claims"])
-
-    new_claims = [c for c in claim_history["claims"] if c.get("user_id") != target.id]
-    removed = old_count - len(new_claims)
-
-    claim_history["claims"] = new_claims
-    save_claim_history()
+    removed = claim_index.remove_user(target.id)
+    db.write("DELETE FROM milestone_claims WHERE user_id = ?", (target.id,))
 
     if target.id in active_ticket_cache:
         active_ticket_cache.pop(target.id, None)
@@ -668,4 +792,32 @@ async def setup(bot: commands.Bot):
     bot.add_command(clanrequest_command)
     bot.add_command(jobreward)
     bot.add_command(milestonereset)
+    ticket_manager.listeners.append(forget_ticket_channel)
     print("[milestone/clanrequest] Extension loaded.")
+
+
+async def teardown(bot: commands.Bot):
+    if forget_ticket_channel in ticket_manager.listeners:
+        ticket_manager.listeners.remove(forget_ticket_channel)
+
+
+# ----------------------------
+# HOT RELOAD
+# ----------------------------
+
+def export_state(bot: commands.Bot) -> dict:
+    return {"claim_index": claim_index, "active_ticket_cache": active_ticket_cache, "ticket_store": ticket_store}
+
+
+def import_state(bot: commands.Bot, state: dict):
+    global claim_index, active_ticket_cache, ticket_store
+    if "claim_index" in state:
+        claim_index = state["claim_index"]
+    else:
+        # Handed over by a build that still kept a flat claim list.
+        claim_index = ClaimIndex(state["claim_history"]["claims"])
+    active_ticket_cache = state["active_ticket_cache"]
+    if "ticket_store" in state:
+        ticket_store = state["ticket_store"]
+    # Route the persistent ticket buttons to the reloaded class.
+    bot.add_view(MilestoneTicketView())
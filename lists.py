@@ -1,26 +1,10 @@
 import discord
 from discord.ext import commands
-import json
-import os
-import openpyxl
-from openpyxl.styles import Alignment
-from io import BytesIO
-
-LISTS_FILE = "lists.json"
-
-
-# ----------------------------
-# Footer Helper
-# ----------------------------
-def add_embed_footer(embed: discord.Embed) -> discord.Embed:
-    footer_line = "\n\n*Luna ❀⋆ coded by <@296181275344109568>*"
-
-    if embed.description:
-        embed.description += footer_line
-    else:
-        embed.description = footer_line
-
-    return embed
+from exporter import exporter, Sheet
+from storage import db
+from paginator import CursorPaginator
+from member_index import member_index
+from embeds import add_embed_footer, static_embed
 
 
 # ---------------------------------
@@ -38,20 +22,86 @@ def is_whitelisted():
 # Load / Save Functions
 # ---------------------------
 def load_lists():
-    if not os.path.exists(LISTS_FILE):
-        with open(LISTS_FILE, "w") as f:
-            json.dump({}, f)
+    data = {name: [] for (name,) in db.query("SELECT name FROM lists")}
+    for list_name, user_id in db.query("SELECT list_name, user_id FROM list_members ORDER BY rowid"):
+        data.setdefault(list_name, []).append(user_id)
+    return data
+
+
+def save_list_created(listname):
+    db.write("INSERT OR IGNORE INTO lists (name) VALUES (?)", (listname,))
+
+
+def save_list_deleted(listname):
+    db.transaction([
+        ("DELETE FROM list_members WHERE list_name = ?", (listname,)),
+        ("DELETE FROM lists WHERE name = ?", (listname,)),
+    ])
+
 
-    with open(LISTS_FILE, "r") as f:
-        try:
-            return json.load(f)
-        except json.JSONDecodeError:
-            return {}
+def save_member_added(listname, user_id):
+    db.write("INSERT OR IGNORE INTO list_members (list_name, user_id) VALUES (?, ?)", (listname, user_id))
 
 
-def save_lists(data):
-    with open(LISTS_FILE, "w") as f:
-        json.dump(data, f, indent=4)
+def save_member_removed(listname, user_id):
+    db.write("DELETE FROM list_members WHERE list_name = ? AND user_id = ?", (listname, user_id))
+
+
+# ---------------------------
+# Static embeds
+# ---------------------------
+@static_embed
+def list_help_embed():
+    embed = discord.Embed(
+        title="📚 List System Commands",
+        description="Manage lists, prize tiers, and user groups:",
+        color=0xF1DBB6
+    )
+
+    embed.add_field(
+        name="📁 List Management",
+        value=(
+            "**!createlist `<name>`** — Create a new list\n"
+            "**!deletelist `<name>`** — Delete a list"
+        ),
+        inline=False,
+    )
+
+    embed.add_field(
+        name="➕ User Management",
+        value=(
+            "**!listadd `<list>` `<user>`** — Add user to list\n"
+            "**!listremove `<list>` `<user>`** — Remove user from list"
+        ),
+        inline=False,
+    )
+
+    embed.add_field(
+        name="📄 Viewing Lists",
+        value=(
+            "**!showlist `<name>`** — Show users in a list\n"
+            "**!listall** — Scroll through using ◀️ ▶️\n"
+            "**!listexport** — Export lists to Excel"
+        ),
+        inline=False,
+    )
+
+    embed.add_field(
+        name="ℹ️ Help",
+        value="**!listhelp** — Show this help menu",
+        inline=False
+    )
+
+    embed.set_thumbnail(
+        url="https://cdn.discordapp.com/emojis/1044329271182995506.gif?size=96&quality=lossless"
+    )
+
+    embed.add_field(
+        name="\u200b",
+        value="*Luna ❀⋆ coded by <@296181275344109568>*",
+        inline=False
+    )
+    return embed
 
 
 # ---------------------------
@@ -61,27 +111,10 @@ class ListManager(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
         self.lists = load_lists()
+        self.version = 0  # bumped on every change; keys cached list pages
 
     def find_member(self, guild, query):
-        query = str(query).strip()
-
-        if query.startswith("<@") and query.endswith(">"):
-            try:
-                return guild.get_member(int(query.strip("<@!>")))
-            except:
-                pass
-
-        if query.isdigit():
-            member = guild.get_member(int(query))
-            if member:
-                return member
-
-        query_lower = query.lower()
-        for m in guild.members:
-            if query_lower in m.display_name.lower() or query_lower in m.name.lower():
-                return m
-
-        return None
+        return member_index.find(guild, query)
 
 
     # ---------------------------
@@ -96,7 +129,8 @@ class ListManager(commands.Cog):
             return await ctx.send(f"❌ The list **{listname}** already exists.")
 
         self.lists[listname] = []
-        save_lists(self.lists)
+        save_list_created(listname)
+        self.version += 1
 
         await ctx.send(f"✅ Created list **{listname}**.")
 
@@ -113,7 +147,8 @@ class ListManager(commands.Cog):
             return await ctx.send("❌ That list does not exist.")
 
         del self.lists[listname]
-        save_lists(self.lists)
+        save_list_deleted(listname)
+        self.version += 1
 
         await ctx.send(f"🗑️ Deleted list **{listname}**.")
 
@@ -146,7 +181,8 @@ class ListManager(commands.Cog):
             )
         )
 
-        save_lists(self.lists)
+        save_member_added(listname, member.id)
+        self.version += 1
         await ctx.send(f"➕ Added {member.mention} to **{listname}**.")
 
 
@@ -169,7 +205,8 @@ class ListManager(commands.Cog):
             return await ctx.send(f"⚠️ {member.mention} is not in **{listname}**.")
 
         self.lists[listname].remove(member.id)
-        save_lists(self.lists)
+        save_member_removed(listname, member.id)
+        self.version += 1
 
         await ctx.send(f"➖ Removed {member.mention} from **{listname}**.")
 
@@ -225,66 +262,57 @@ class ListManager(commands.Cog):
         if not self.lists:
             return await ctx.send("📭 No lists exist yet.")
 
-        list_names = sorted(self.lists.keys())
-        total_pages = len(list_names)
-        parent = self
-
-        class ListScrollView(discord.ui.View):
-            def __init__(self):
-                super().__init__(timeout=120)
-                self.index = 0
-
-            def build_embed(self):
-                listname = list_names[self.index]
-                user_ids = parent.lists[listname]
-
-                sorted_members = sorted(
-                    user_ids,
-                    key=lambda uid: (
-                        ctx.guild.get_member(uid).display_name.lower()
-                        if ctx.guild.get_member(uid) else "zzzzz"
-                    )
-                )
-
-                if not sorted_members:
-                    users_text = "*(empty)*"
-                else:
-                    lines = []
-                    for uid in sorted_members:
-                        m = ctx.guild.get_member(uid)
-                        if m:
-                            lines.append(f"- {m.mention}")
-                        else:
-                            lines.append(f"- <@{uid}> (left server)")
-                    users_text = "\n".join(lines)
-
-                embed = discord.Embed(
-                    title=f"📚 List Viewer ({self.index + 1}/{total_pages})",
-                    description=f"**List:** `{listname}`\n\n{users_text}",
-                    color=0xFFD1DC,
-                )
-                embed = add_embed_footer(embed)
-                return embed
+        sorted_names = {}
 
-            async def update(self, interaction):
-                embed = self.build_embed()
-                await interaction.response.edit_message(embed=embed, view=self)
+        def list_names():
+            # Re-sorted only when the lists actually change, not on every click.
+            if self.version not in sorted_names:
+                sorted_names.clear()
+                sorted_names[self.version] = sorted(self.lists.keys())
+            return sorted_names[self.version]
 
-            @discord.ui.button(label="◀️", style=discord.ButtonStyle.secondary)
-            async def previous(self, interaction, button):
-                if self.index > 0:
-                    self.index -= 1
-                    await self.update(interaction)
+        def render(page_items, page, total_pages):
+            listname = page_items[0] if page_items else None
+            user_ids = self.lists.get(listname, [])
 
-            @discord.ui.button(label="▶️", style=discord.ButtonStyle.secondary)
-            async def next(self, interaction, button):
-                if self.index < total_pages - 1:
-                    self.index += 1
-                    await self.update(interaction)
+            sorted_members = sorted(
+                user_ids,
+                key=lambda uid: (
+                    ctx.guild.get_member(uid).display_name.lower()
+                    if ctx.guild.get_member(uid) else "zzzzz"
+                )
+            )
 
-        view = ListScrollView()
-        embed = view.build_embed()
-        await ctx.send(embed=embed, view=view)
+            if not sorted_members:
+                users_text = "*(empty)*"
+            else:
+                lines = []
+                for uid in sorted_members:
+                    m = ctx.guild.get_member(uid)
+                    if m:
+                        lines.append(f"- {m.mention}")
+                    else:
+                        lines.append(f"- <@{uid}> (left server)")
+                users_text = "\n".join(lines)
+
+            embed = discord.Embed(
+                title=f"📚 List Viewer ({page + 1}/{total_pages})",
+                description=f"**List:** `{listname}`\n\n{users_text}",
+                color=0xFFD1DC,
+            )
+            embed = add_embed_footer(embed)
+            return embed
+
+        view = CursorPaginator(
+            namespace=("list_lists", ctx.guild.id),
+            count=lambda: len(self.lists),
+            fetch=lambda start, count: list_names()[start:start + count],
+            render=render,
+            # Pages show display names and "(left server)", so member changes invalidate them too.
+            version=lambda: (self.version, member_index.generation(ctx.guild.id)),
+            per_page=1,
+        )
+        await view.send(ctx)
 
 
     # ---------------------------
@@ -296,18 +324,11 @@ class ListManager(commands.Cog):
         if not self.lists:
             return await ctx.send("📭 No lists exist to export.")
 
-        wb = openpyxl.Workbook()
-        ws = wb.active
-        ws.title = "Lists"
-
         sorted_listnames = sorted(self.lists.keys())
 
-        col_index = 1
-
+        # One column per list; rows are filled across, shorter lists padded with blanks.
+        columns = []
         for listname in sorted_listnames:
-            col_letter = openpyxl.utils.get_column_letter(col_index)
-            ws[f"{col_letter}1"] = listname
-
             user_ids = self.lists[listname]
             sorted_users = sorted(
                 user_ids,
@@ -318,28 +339,25 @@ class ListManager(commands.Cog):
                 )
             )
 
-            row = 2
+            column = []
             for uid in sorted_users:
                 member = ctx.guild.get_member(uid)
                 if member:
-                    text = f"{member.display_name} ({uid})"
+                    column.append(f"{member.display_name} ({uid})")
                 else:
-                    text = f"(left server) ({uid})"
-
-                ws[f"{col_letter}{row}"] = text
-                row += 1
-
-            max_length = max(len(str(ws[f"{col_letter}{r}"].value)) for r in range(1, row))
-            ws.column_dimensions[col_letter].width = max_length + 2
+                    column.append(f"(left server) ({uid})")
+            columns.append(column)
 
-            col_index += 1
+        depth = max((len(column) for column in columns), default=0)
+        rows = [
+            [column[r] if r < len(column) else None for column in columns]
+            for r in range(depth)
+        ]
+        sheet = Sheet("Lists", sorted_listnames, rows)
 
-        buffer = BytesIO()
-        wb.save(buffer)
-        buffer.seek(0)
-
-        file = discord.File(buffer, filename="all_lists.xlsx")
-        await ctx.send("✅ Exported all lists to Excel!", file=file)
+        async with ctx.typing():
+            file = await exporter.file([sheet], "all_lists")
+        await ctx.send(f"✅ Exported all lists to {exporter.label(file)}!", file=file)
 
 
     # ---------------------------
@@ -348,56 +366,7 @@ class ListManager(commands.Cog):
     @commands.command(name="listhelp")
     @is_whitelisted()
     async def list_help(self, ctx):
-        embed = discord.Embed(
-            title="📚 List System Commands",
-            description="Manage lists, prize tiers, and user groups:",
-            color=0xF1DBB6
-        )
-
-        embed.add_field(
-            name="📁 List Management",
-            value=(
-                "**!createlist `<name>`** — Create a new list\n"
-                "**!deletelist `<name>`** — Delete a list"
-            ),
-            inline=False,
-        )
-
-        embed.add_field(
-            name="➕ User Management",
-            value=(
-                "**!listadd `<list>` `<user>`** — Add user to list\n"
-                "**!listremove `<list>` `<user>`** — Remove user from list"
-            ),
-            inline=False,
-        )
-
-        embed.add_field(
-            name="📄 Viewing Lists",
-            value=(
-                "**!showlist `<name>`** — Show users in a list\n"
-                "**!listall** — Scroll through using ◀️ ▶️\n"
-                "**!listexport** — Export lists to Excel"
-            ),
-            inline=False,
-        )
-
-        embed.add_field(
-            name="ℹ️ Help",
-            value="**!listhelp** — Show this help menu",
-            inline=False
-        )
-
-        embed.set_thumbnail(
-            url="https://cdn.discordapp.com/emojis/1044329271182995506.gif?size=96&quality=lossless"
-        )
-
-        embed.add_field(
-        name="\u200b",
-        value="*Luna ❀⋆ coded by <@296181275344109568>*",
-        inline=False
-    )
-        await ctx.send(embed=embed)
+        await ctx.send(embed=list_help_embed())
 
 
     @commands.command(name="listrandom")
@@ -452,28 +421,14 @@ class ListManager(commands.Cog):
         embed = add_embed_footer(embed)
         await ctx.send(embed=embed)
 
-        wb = openpyxl.Workbook()
-        ws = wb.active
-        ws.title = f"{listname} Pairs"
-
-        ws.append(["Partner A", "Partner B"])
-
-        for a, b in pairs:
-            ws.append([f"{a[0]} ({a[1]})", f"{b[0]} ({b[1]})"])
-
-
-        for col in ws.columns:
-            max_len = 0
-            for cell in col:
-                max_len = max(max_len, len(str(cell.value)))
-            ws.column_dimensions[col[0].column_letter].width = max_len + 3
-
-
-        buffer = BytesIO()
-        wb.save(buffer)
-        buffer.seek(0)
-
-        file = discord.File(buffer, filename=f"{listname}_pairings.xlsx")
+        sheet = Sheet(
+            f"{listname} Pairs",
+            ["Partner A", "Partner B"],
+            [(f"{a[0]} ({a[1]})", f"{b[0]} ({b[1]})") for a, b in pairs],
+            padding=3,
+        )
+        async with ctx.typing():
+            file = await exporter.file([sheet], f"{listname}_pairings")
         await ctx.send("📄 Download your pairing sheet:", file=file)
 
 
@@ -489,3 +444,16 @@ class ListManager(commands.Cog):
 # ---------------------------
 async def setup(bot):
     await bot.add_cog(ListManager(bot))
+
+
+def export_state(bot) -> dict:
+    cog = bot.get_cog("ListManager")
+    # The version keeps counting so pages cached before the reload stay unreachable.
+    return {"lists": cog.lists, "version": cog.version} if cog else {}
+
+
+def import_state(bot, state: dict):
+    cog = bot.get_cog("ListManager")
+    if cog and state:
+        cog.lists = state["lists"]
+        cog.version = state["version"] + 1
@@ -0,0 +1,24 @@
+# ----------------------------
+# Lootbox economy tunables
+# ----------------------------
+# Shared by run.py (live bot) and economy_sim.py (offline pricing), so a
+# simulated table is always the table that actually ships.
+
+COOLDOWN_SECONDS = 14 * 24 * 60 * 60
+
+# (item, (low, high), weight)
+LOOT_TABLE = [
+    ("Tickets", (1, 5), 5),
+    ("Bits", (500, 1000), 30),
+    ("Gold", (500, 1000), 15),
+    ("Excellent Dust", (5, 15), 23),
+    ("Mint Dust", (5, 15), 22),
+    ("Unopened Dye", (1, 3), 5)
+]
+
+# roll_loot() value skew: value = low + int(u ** VALUE_SKEW_EXP * (high - low)).
+# Higher exponent pushes rolls toward the low end of each range.
+VALUE_SKEW_EXP = 3
+
+# Double or Nothing: chance that 🎲 Double pays 2x instead of 0.
+DOUBLE_WIN_CHANCE = 0.5
@@ -0,0 +1,143 @@
+import re
+from array import array
+from datetime import datetime, timezone
+
+# ----------------------------
+# Interning
+# ----------------------------
+
+# History labels look like "🎉 Doubled — 500 Bits": an outcome tag, the value,
+# and the item name. Outcome tags and item names repeat constantly, so each one
+# is stored once and rows only keep small integer codes.
+_LABEL_RE = re.compile(r"^(.+?) — (?:(\d+) )?(.+)$")
+
+_outcome_codes = {"": 0}
+_outcomes = [""]
+_item_codes = {}
+_items = []
+
+FLAG_VALUE_IN_LABEL = 1
+
+
+def _intern(value: str, codes: dict, table: list) -> int:
+    code = codes.get(value)
+    if code is None:
+        code = len(table)
+        codes[value] = code
+        table.append(value)
+    return code
+
+
+def encode_label(label: str, value: int):
+    """Split a history label into (outcome_code, item_code, flags)."""
+    match = _LABEL_RE.match(label)
+    if match:
+        outcome, number, item = match.groups()
+        if number is None or int(number) == value:
+            flags = FLAG_VALUE_IN_LABEL if number is not None else 0
+            return (
+                _intern(outcome, _outcome_codes, _outcomes),
+                _intern(item, _item_codes, _items),
+                flags,
+            )
+    # Anything else (plain "Bits", old formats) is kept verbatim as an item name.
+    return 0, _intern(label, _item_codes, _items), 0
+
+
+def decode_label(outcome_code: int, item_code: int, flags: int, value: int) -> str:
+    item = _items[item_code]
+    if not outcome_code:
+        return item
+    outcome = _outcomes[outcome_code]
+    if flags & FLAG_VALUE_IN_LABEL:
+        return f"{outcome} — {value} {item}"
+    return f"{outcome} — {item}"
+
+
+def to_epoch_us(ts: datetime) -> int:
+    return int(ts.timestamp() * 1_000_000)
+
+
+def from_epoch_us(us: int) -> datetime:
+    return datetime.fromtimestamp(us / 1_000_000, tz=timezone.utc)
+
+
+# ----------------------------
+# Per-user history
+# ----------------------------
+
+class UserLootHistory:
+    """One user's loot history as parallel typed arrays (oldest first)."""
+
+    __slots__ = ("outcomes", "items", "flags", "values", "times")
+
+    def __init__(self):
+        self.outcomes = array("H")
+        self.items = array("H")
+        self.flags = array("B")
+        self.values = array("q")
+        self.times = array("q")  # epoch microseconds, UTC
+
+    def __len__(self):
+        return len(self.values)
+
+    def append(self, label: str, value: int, epoch_us: int):
+        outcome_code, item_code, flags = encode_label(label, value)
+        self.outcomes.append(outcome_code)
+        self.items.append(item_code)
+        self.flags.append(flags)
+        self.values.append(value)
+        self.times.append(epoch_us)
+
+    def entry(self, index: int):
+        """(label, value, datetime) for one row; the datetime is built here, not at load."""
+        value = self.values[index]
+        label = decode_label(self.outcomes[index], self.items[index], self.flags[index], value)
+        return label, value, from_epoch_us(self.times[index])
+
+    def newest_first(self, start: int, count: int):
+        """Rows `start`..`start+count` counting back from the newest entry."""
+        last = len(self) - 1 - start
+        first = max(-1, last - count)
+        return [self.entry(i) for i in range(last, first, -1)]
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self.entry(i)
+
+
+# ----------------------------
+# All users
+# ----------------------------
+
+class LootHistoryStore:
+    """user_id -> UserLootHistory, with the small dict interface run.py needs."""
+
+    __slots__ = ("_users",)
+
+    def __init__(self):
+        self._users = {}
+
+    def __contains__(self, user_id):
+        return user_id in self._users
+
+    def __getitem__(self, user_id) -> UserLootHistory:
+        return self._users[user_id]
+
+    def __len__(self):
+        return len(self._users)
+
+    def get(self, user_id, default=None):
+        return self._users.get(user_id, default)
+
+    def items(self):
+        return self._users.items()
+
+    def append(self, user_id: int, label: str, value: int, ts: datetime):
+        self.append_epoch(user_id, label, value, to_epoch_us(ts))
+
+    def append_epoch(self, user_id: int, label: str, value: int, epoch_us: int):
+        history = self._users.get(user_id)
+        if history is None:
+            history = self._users[user_id] = UserLootHistory()
+        history.append(label, value, epoch_us)
@@ -0,0 +1,279 @@
+import bisect
+
+import discord
+from discord.ext import commands
+
+# ----------------------------
+# CONFIG
+# ----------------------------
+
+DEFAULT_LIMIT = 5
+
+# Match ranks (lower is better).
+RANK_EXACT = 0
+RANK_PREFIX = 1
+RANK_SUBSTRING = 2
+
+
+def _trigrams(text: str):
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+# ----------------------------
+# Per-guild index
+# ----------------------------
+
+class GuildMemberIndex:
+    """
+    Lowercased name / display_name of every member of one guild, indexed for
+    exact, prefix and substring lookup.
+
+      - exact:     dict key -> member ids
+      - prefix:    sorted list of (key, id), bisected
+      - substring: trigram -> member ids, candidates intersected then verified
+    """
+
+    def __init__(self, guild: discord.Guild):
+        self.guild = guild
+        self._keys = {}       # member id -> tuple of lowered keys
+        self._exact = {}      # key -> set(member id)
+        self._names = {}      # lowered account name -> set(member id)
+        self._sorted = []     # [(key, member id)]
+        self._grams = {}      # trigram -> set(member id)
+        for member in guild.members:
+            self._index(member, sort=False)
+        self._sorted.sort()
+
+    # ------------
+    # Maintenance
+    # ------------
+
+    def _index(self, member: discord.Member, sort: bool = True):
+        name = member.name.lower()
+        keys = (name,) if member.display_name.lower() == name else (name, member.display_name.lower())
+        self._keys[member.id] = keys
+        self._names.setdefault(name, set()).add(member.id)
+        for key in keys:
+            self._exact.setdefault(key, set()).add(member.id)
+            if sort:
+                bisect.insort(self._sorted, (key, member.id))
+            else:
+                self._sorted.append((key, member.id))
+            for gram in _trigrams(key):
+                self._grams.setdefault(gram, set()).add(member.id)
+
+    def _discard(self, table: dict, key, member_id: int):
+        ids = table.get(key)
+        if ids is not None:
+            ids.discard(member_id)
+            if not ids:
+                del table[key]
+
+    def remove(self, member_id: int):
+        keys = self._keys.pop(member_id, None)
+        if keys is None:
+            return
+        self._discard(self._names, keys[0], member_id)
+        for key in keys:
+            self._discard(self._exact, key, member_id)
+            i = bisect.bisect_left(self._sorted, (key, member_id))
+            if i < len(self._sorted) and self._sorted[i] == (key, member_id):
+                del self._sorted[i]
+            for gram in _trigrams(key):
+                self._discard(self._grams, gram, member_id)
+
+    def upsert(self, member: discord.Member) -> bool:
+        """True if the member's names changed (or the member is new)."""
+        name = member.name.lower()
+        display = member.display_name.lower()
+        keys = (name,) if display == name else (name, display)
+        if self._keys.get(member.id) == keys:
+            return False
+        self.remove(member.id)
+        self._index(member)
+        return True
+
+    # ------------
+    # Lookup
+    # ------------
+
+    def _prefix_ids(self, query: str, limit: int):
+        out = []
+        i = bisect.bisect_left(self._sorted, (query,))
+        while i < len(self._sorted) and len(out) < limit:
+            key, member_id = self._sorted[i]
+            if not key.startswith(query):
+                break
+            out.append((key, member_id))
+            i += 1
+        return out
+
+    def _substring_ids(self, query: str):
+        grams = _trigrams(query)
+        if grams:
+            postings = sorted((self._grams.get(g, set()) for g in grams), key=len)
+            candidates = set(postings[0]).intersection(*postings[1:])
+        else:
+            # One- or two-letter queries have no trigrams; check the cached keys.
+            candidates = self._keys.keys()
+        return [
+            (key, member_id)
+            for member_id in candidates
+            for key in self._keys[member_id]
+            if query in key
+        ]
+
+    def search(self, query: str, limit: int = DEFAULT_LIMIT):
+        """Ranked members matching `query`: exact, then prefix, then substring."""
+        query = query.lower().strip()
+        if not query:
+            return []
+
+        ranked = {}
+        for member_id in self._exact.get(query, ()):
+            ranked[member_id] = (RANK_EXACT, 0, query)
+        for key, member_id in self._prefix_ids(query, limit * 4):
+            ranked.setdefault(member_id, (RANK_PREFIX, len(key), key))
+        if len(ranked) < limit:
+            for key, member_id in self._substring_ids(query):
+                ranked.setdefault(member_id, (RANK_SUBSTRING, len(key), key))
+
+        members = []
+        for member_id in sorted(ranked, key=ranked.get):
+            member = self.guild.get_member(member_id)
+            if member is not None:
+                members.append(member)
+                if len(members) >= limit:
+                    break
+        return members
+
+    def by_username(self, username: str):
+        """Member whose account name equals `username` (case-insensitive)."""
+        for member_id in self._names.get(username.lower(), ()):
+            member = self.guild.get_member(member_id)
+            if member is not None:
+                return member
+        return None
+
+
+# ----------------------------
+# All guilds
+# ----------------------------
+
+class MemberIndex:
+    """
+    guild id -> GuildMemberIndex, built on first use and kept current by
+    MemberIndexCog.
+
+    generation(guild_id) counts joins, leaves and name changes in a guild,
+    whether or not its index is built yet, so anything cached from member
+    names can put it in its key.
+    """
+
+    def __init__(self):
+        self._guilds = {}
+        self._generations = {}  # guild id -> int
+
+    def generation(self, guild_id: int) -> int:
+        return self._generations.get(guild_id, 0)
+
+    def _bump(self, guild_id: int):
+        self._generations[guild_id] = self._generations.get(guild_id, 0) + 1
+
+    def for_guild(self, guild: discord.Guild) -> GuildMemberIndex:
+        index = self._guilds.get(guild.id)
+        if index is None:
+            index = self._guilds[guild.id] = GuildMemberIndex(guild)
+        return index
+
+    def drop(self, guild_id: int):
+        self._guilds.pop(guild_id, None)
+        self._bump(guild_id)
+
+    def search(self, guild: discord.Guild, query: str, limit: int = DEFAULT_LIMIT):
+        return self.for_guild(guild).search(query, limit)
+
+    def find(self, guild: discord.Guild, query: str):
+        """Mention, raw ID, or best-ranked name match. None if nothing fits."""
+        query = str(query).strip()
+
+        if query.startswith("<@") and query.endswith(">"):
+            try:
+                return guild.get_member(int(query.strip("<@!>")))
+            except ValueError:
+                return None
+
+        if query.isdigit():
+            member = guild.get_member(int(query))
+            if member:
+                return member
+
+        matches = self.search(guild, query, limit=1)
+        return matches[0] if matches else None
+
+    def by_username(self, guild: discord.Guild, username: str):
+        return self.for_guild(guild).by_username(username)
+
+    # ------------
+    # Event hooks
+    # ------------
+
+    def upsert(self, member: discord.Member):
+        index = self._guilds.get(member.guild.id)
+        # Without a built index there is nothing to compare against, so assume a change.
+        if index is None or index.upsert(member):
+            self._bump(member.guild.id)
+
+    def remove(self, guild_id: int, member_id: int):
+        index = self._guilds.get(guild_id)
+        if index is not None:
+            index.remove(member_id)
+        self._bump(guild_id)
+
+
+# Shared instance used by every cog.
+member_index = MemberIndex()
+
+
+# ----------------------------
+# Listener cog
+# ----------------------------
+
+class MemberIndexCog(commands.Cog):
+    """Keeps member_index in step with joins, leaves, nickname and username changes."""
+
+    def __init__(self, bot: commands.Bot):
+        self.bot = bot
+
+    @commands.Cog.listener()
+    async def on_member_join(self, member: discord.Member):
+        member_index.upsert(member)
+
+    @commands.Cog.listener()
+    async def on_member_update(self, before: discord.Member, after: discord.Member):
+        member_index.upsert(after)
+
+    @commands.Cog.listener()
+    async def on_user_update(self, before: discord.User, after: discord.User):
+        # Account names are global, so every guild that has this user needs a refresh.
+        for guild in after.mutual_guilds:
+            member = guild.get_member(after.id)
+            if member is not None:
+                member_index.upsert(member)
+
+    @commands.Cog.listener()
+    async def on_raw_member_remove(self, payload: discord.RawMemberRemoveEvent):
+        member_index.remove(payload.guild_id, payload.user.id)
+
+    @commands.Cog.listener()
+    async def on_guild_available(self, guild: discord.Guild):
+        # Fresh member cache after a (re)connect; rebuild on next lookup.
+        member_index.drop(guild.id)
+
+    @commands.Cog.listener()
+    async def on_guild_remove(self, guild: discord.Guild):
+        member_index.drop(guild.id)
+
+
+async def setup(bot: commands.Bot):
+    await bot.add_cog(MemberIndexCog(bot))
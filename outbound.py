@@ -0,0 +1,261 @@
+import asyncio
+import time
+from collections import OrderedDict
+
+import discord
+
+from embeds import embed_diff
+
+# ----------------------------
+# CONFIG
+# ----------------------------
+
+# Priorities (lower goes first).
+PRIORITY_FINAL = 0      # results the user is waiting on
+PRIORITY_NORMAL = 1
+PRIORITY_COSMETIC = 2   # animation / progress frames
+
+# Discord allows roughly 5 message edits per 5 seconds per channel.
+CHANNEL_RATE = 1.0       # tokens per second
+CHANNEL_BURST = 5
+MESSAGE_RATE = 1.0
+MESSAGE_BURST = 2
+MAX_COSMETIC_AGE = 4.0   # seconds a cosmetic frame may wait before it is dropped
+LAST_SENT_CACHE = 512    # messages whose last sent embed is remembered for diffing
+
+
+# ----------------------------
+# Token bucket
+# ----------------------------
+
+class TokenBucket:
+    __slots__ = ("rate", "capacity", "tokens", "updated")
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, now: float) -> float:
+        self._refill(now)
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+    def take(self, now: float):
+        self._refill(now)
+        self.tokens -= 1
+
+    def idle(self, now: float) -> bool:
+        self._refill(now)
+        return self.tokens >= self.capacity
+
+
+# ----------------------------
+# Edit queue
+# ----------------------------
+
+def _close_files(kwargs: dict, keys=None):
+    """discord.File opens its file on creation; close the ones a merge or drop discards."""
+    for key in ("attachments", "file", "files"):
+        if keys is not None and key not in keys:
+            continue
+        value = kwargs.get(key)
+        for item in (value if isinstance(value, (list, tuple)) else [value]):
+            if isinstance(item, discord.File):
+                item.close()
+
+
+class _PendingEdit:
+    __slots__ = ("message", "kwargs", "priority", "enqueued", "futures")
+
+    def __init__(self, message, kwargs, priority, future):
+        self.message = message
+        self.kwargs = kwargs
+        self.priority = priority
+        self.enqueued = time.monotonic()
+        self.futures = [future]
+
+
+class EditQueue:
+    """
+    Every message.edit in a hot loop goes through here instead of straight to
+    the API.
+
+    - At most one edit per message is queued. A newer edit replaces the
+      queued one field by field, so only the latest state is ever sent.
+    - Each channel and each message has its own token bucket; the worker
+      sends the best-priority edit whose buckets allow it, so a final result
+      jumps ahead of queued animation frames.
+    - Cosmetic frames that can't be sent within MAX_COSMETIC_AGE are dropped.
+    - One edit per message is in flight at a time, so edits never reorder.
+    - An embed-only edit whose embed matches the last one sent for that
+      message (field by field) is skipped without touching the API.
+
+    edit() returns a future. FINAL edits raise like message.edit would;
+    other priorities just log failures.
+    """
+
+    def __init__(self):
+        self._pending = {}        # message id -> _PendingEdit
+        self._in_flight = set()   # message ids
+        self._channel_buckets = {}
+        self._message_buckets = {}
+        self._last_sent = OrderedDict()  # message id -> embed dict
+        self._task = None
+        self._wake = None
+        self.metrics = {"submitted": 0, "sent": 0, "merged": 0, "dropped": 0, "skipped": 0, "failed": 0}
+
+    # ------------
+    # Public API
+    # ------------
+
+    def edit(self, message: discord.Message, *, priority: int = PRIORITY_COSMETIC, **kwargs) -> asyncio.Future:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self.metrics["submitted"] += 1
+
+        pending = self._pending.get(message.id)
+        if pending is not None:
+            _close_files(pending.kwargs, keys=kwargs.keys())
+            pending.kwargs.update(kwargs)
+            pending.priority = min(pending.priority, priority)
+            pending.futures.append(future)
+            self.metrics["merged"] += 1
+        else:
+            self._pending[message.id] = _PendingEdit(message, dict(kwargs), priority, future)
+
+        self._ensure_started(loop)
+        self._wake.set()
+        return future
+
+    def stats(self) -> str:
+        m = self.metrics
+        return (
+            f"submitted={m['submitted']} sent={m['sent']} merged={m['merged']} "
+            f"dropped={m['dropped']} skipped={m['skipped']} failed={m['failed']} queued={len(self._pending)}"
+        )
+
+    # ------------
+    # Worker
+    # ------------
+
+    def _bucket(self, table: dict, key, rate: float, burst: float) -> TokenBucket:
+        bucket = table.get(key)
+        if bucket is None:
+            bucket = table[key] = TokenBucket(rate, burst)
+        return bucket
+
+    def _ensure_started(self, loop):
+        if self._task is not None and not self._task.done():
+            return
+        self._wake = asyncio.Event()
+        self._task = loop.create_task(self._run())
+
+    def _resolve(self, pending: _PendingEdit, result=None, error=None):
+        for future in pending.futures:
+            if future.done():
+                continue
+            if error is not None and pending.priority == PRIORITY_FINAL:
+                future.set_exception(error)
+            else:
+                future.set_result(result)
+
+    async def _run(self):
+        while True:
+            if not self._pending:
+                self._wake.clear()
+                await self._wake.wait()
+                continue
+
+            now = time.monotonic()
+            next_wait = None
+            order = sorted(self._pending.values(), key=lambda p: (p.priority, p.enqueued))
+
+            for pending in order:
+                message_id = pending.message.id
+                if message_id in self._in_flight:
+                    continue
+
+                if self._unchanged(pending):
+                    del self._pending[message_id]
+                    self.metrics["skipped"] += len(pending.futures)
+                    self._resolve(pending, result=pending.message)
+                    continue
+
+                if pending.priority == PRIORITY_COSMETIC and now - pending.enqueued > MAX_COSMETIC_AGE:
+                    del self._pending[message_id]
+                    self.metrics["dropped"] += len(pending.futures)
+                    _close_files(pending.kwargs)
+                    self._resolve(pending)
+                    continue
+
+                channel_bucket = self._bucket(
+                    self._channel_buckets, pending.message.channel.id, CHANNEL_RATE, CHANNEL_BURST
+                )
+                message_bucket = self._bucket(self._message_buckets, message_id, MESSAGE_RATE, MESSAGE_BURST)
+                wait = max(channel_bucket.wait_time(now), message_bucket.wait_time(now))
+                if wait > 0:
+                    next_wait = wait if next_wait is None else min(next_wait, wait)
+                    continue
+
+                channel_bucket.take(now)
+                message_bucket.take(now)
+                del self._pending[message_id]
+                self._in_flight.add(message_id)
+                asyncio.create_task(self._send(pending))
+
+            self._prune_buckets(now)
+            self._wake.clear()
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=next_wait)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _send(self, pending: _PendingEdit):
+        message_id = pending.message.id
+        try:
+            result = await pending.message.edit(**pending.kwargs)
+            self.metrics["sent"] += 1
+            self._remember(message_id, pending.kwargs)
+            self._resolve(pending, result=result)
+        except Exception as e:
+            self.metrics["failed"] += 1
+            if pending.priority != PRIORITY_FINAL:
+                print(f"[EditQueue] Edit of message {message_id} failed: {e}")
+            self._resolve(pending, error=e)
+        finally:
+            self._in_flight.discard(message_id)
+            if self._wake is not None:
+                self._wake.set()
+
+    def _unchanged(self, pending: _PendingEdit) -> bool:
+        embed = pending.kwargs.get("embed")
+        if set(pending.kwargs) != {"embed"} or embed is None:
+            return False
+        return not embed_diff(self._last_sent.get(pending.message.id), embed.to_dict())
+
+    def _remember(self, message_id: int, kwargs: dict):
+        if "embed" not in kwargs:
+            return
+        embed = kwargs["embed"]
+        if embed is None:
+            self._last_sent.pop(message_id, None)
+            return
+        self._last_sent[message_id] = embed.to_dict()
+        self._last_sent.move_to_end(message_id)
+        while len(self._last_sent) > LAST_SENT_CACHE:
+            self._last_sent.popitem(last=False)
+
+    def _prune_buckets(self, now: float):
+        # Full buckets carry no state worth keeping.
+        if len(self._message_buckets) > 256:
+            for key in [k for k, b in self._message_buckets.items() if b.idle(now) and k not in self._pending]:
+                del self._message_buckets[key]
+
+
+# Shared instance used by every cog.
+edit_queue = EditQueue()
@@ -0,0 +1,165 @@
+from collections import OrderedDict
+
+import discord
+from discord import Interaction
+from discord.ui import View, Button, button
+
+# ----------------------------
+# CONFIG
+# ----------------------------
+
+PAGE_CACHE_SIZE = 256
+
+
+# ----------------------------
+# Rendered page cache
+# ----------------------------
+
+class PageCache:
+    """
+    Small LRU of rendered page embeds shared by every paginator.
+
+    Keys carry the data version of whatever the page was built from, so a
+    change to the underlying store never needs an explicit purge: the next
+    lookup simply misses and the stale entry ages out.
+    """
+
+    def __init__(self, maxsize: int = PAGE_CACHE_SIZE):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        embed = self._entries.get(key)
+        if embed is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return embed
+
+    def put(self, key, embed: discord.Embed):
+        self._entries[key] = embed
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        self._entries.clear()
+
+
+# Shared instance used by every cog.
+page_cache = PageCache()
+
+
+# ----------------------------
+# Cursor paginator
+# ----------------------------
+
+class CursorPaginator(View):
+    """
+    ◀️ / ▶️ pager over any store that can hand out one page at a time.
+
+    The caller supplies callables instead of a pre-built list:
+      - count()                      -> number of rows right now
+      - fetch(start, count)          -> just the rows for one page
+      - render(rows, page, pages)    -> discord.Embed for that page
+      - version()                    -> anything hashable that changes when the data does
+      - files(page) (optional)       -> fresh discord.File attachments for a page
+
+    Flipping a page costs one fetch of `per_page` rows plus a render, or nothing
+    at all when the page is already in the shared LRU for the current version.
+    """
+
+    def __init__(
+        self,
+        *,
+        namespace,
+        count,
+        fetch,
+        render,
+        version,
+        per_page: int = 5,
+        files=None,
+        owner_id: int | None = None,
+        wrap: bool = False,
+        labels=("◀️", "▶️"),
+        style: discord.ButtonStyle = discord.ButtonStyle.secondary,
+        timeout: float = 120,
+        cache: PageCache = page_cache,
+    ):
+        super().__init__(timeout=timeout)
+        self.namespace = namespace
+        self.count = count
+        self.fetch = fetch
+        self.render = render
+        self.version = version
+        self.per_page = per_page
+        self.files = files
+        self.owner_id = owner_id
+        self.wrap = wrap
+        self.cache = cache
+        self.page = 0
+
+        self.previous.label, self.next.label = labels
+        self.previous.style = self.next.style = style
+
+    # ------------
+    # Pages
+    # ------------
+
+    def total_pages(self) -> int:
+        return max(1, (self.count() + self.per_page - 1) // self.per_page)
+
+    def page_embed(self, page: int) -> discord.Embed:
+        total = self.total_pages()
+        key = (self.namespace, self.version(), self.per_page, page, total)
+        embed = self.cache.get(key)
+        if embed is None:
+            rows = self.fetch(page * self.per_page, self.per_page)
+            embed = self.render(rows, page, total)
+            self.cache.put(key, embed)
+        return embed
+
+    def _sync_buttons(self, total: int):
+        if self.wrap:
+            return
+        self.previous.disabled = self.page == 0
+        self.next.disabled = self.page >= total - 1
+
+    # ------------
+    # Sending / editing
+    # ------------
+
+    async def send(self, ctx):
+        total = self.total_pages()
+        self._sync_buttons(total)
+        kwargs = {"embed": self.page_embed(0), "view": self}
+        if self.files is not None:
+            kwargs["files"] = self.files(0)
+        return await ctx.send(**kwargs)
+
+    async def _turn(self, interaction: Interaction, step: int):
+        if self.owner_id is not None and interaction.user.id != self.owner_id:
+            return await interaction.response.send_message("❌ This is not yours to press!", ephemeral=True)
+
+        total = self.total_pages()
+        if self.wrap:
+            self.page = (self.page + step) % total
+        else:
+            self.page = max(0, min(self.page + step, total - 1))
+        self._sync_buttons(total)
+
+        kwargs = {"embed": self.page_embed(self.page), "view": self}
+        if self.files is not None:
+            kwargs["attachments"] = self.files(self.page)
+        await interaction.response.edit_message(**kwargs)
+
+    @button(label="◀️", style=discord.ButtonStyle.secondary)
+    async def previous(self, interaction: Interaction, button: Button):
+        await self._turn(interaction, -1)
+
+    @button(label="▶️", style=discord.ButtonStyle.secondary)
+    async def next(self, interaction: Interaction, button: Button):
+        await self._turn(interaction, 1)
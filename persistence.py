@@ -0,0 +1,118 @@
+import asyncio
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+
+# ----------------------------
+# CONFIG
+# ----------------------------
+
+FLUSH_INTERVAL_SECONDS = 2.0
+
+
+# ----------------------------
+# Write-behind scheduler
+# ----------------------------
+
+class PersistenceScheduler:
+    """
+    Dirty-flag write-behind for anything that gets saved to disk.
+
+    A target is registered once with two callables:
+      - snapshot(): runs on the event loop, returns the payload to write
+      - write(payload): runs on the worker thread, does the actual I/O
+
+    Handlers only call mark_dirty(name). A background task flushes every dirty
+    target once per interval, so a burst of mutations becomes a single write.
+    There is exactly one worker thread, so writes to the same file can never
+    overlap or land out of order.
+
+    A failed write leaves the target dirty. write() is responsible for
+    keeping its payload around for the retry (Database puts failed groups
+    back into its queue; snapshot targets simply snapshot again).
+    """
+
+    def __init__(self, interval: float = FLUSH_INTERVAL_SECONDS):
+        self.interval = interval
+        self._targets = {}
+        self._dirty = set()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="hotbox-persist")
+        self._task = None
+        self._flush_lock = None
+
+    def register(self, name: str, snapshot, write):
+        self._targets[name] = (snapshot, write)
+
+    def mark_dirty(self, name: str):
+        self._dirty.add(name)
+        self._ensure_started()
+
+    # ------------
+    # Flushing
+    # ------------
+
+    async def flush(self):
+        """Write every dirty target now. Safe to call from any coroutine."""
+        if self._flush_lock is None:
+            self._flush_lock = asyncio.Lock()
+
+        async with self._flush_lock:
+            loop = asyncio.get_running_loop()
+            dirty, self._dirty = self._dirty, set()
+            for name in dirty:
+                snapshot, write = self._targets[name]
+                try:
+                    payload = snapshot()
+                    await loop.run_in_executor(self._executor, write, payload)
+                except Exception as e:
+                    print(f"[Persistence] Flush of {name} failed: {e}")
+                    traceback.print_exc()
+                    self._dirty.add(name)
+
+    def flush_sync(self):
+        """Blocking flush for when no event loop is running (scripts, final exit)."""
+        dirty, self._dirty = self._dirty, set()
+        for name in dirty:
+            snapshot, write = self._targets[name]
+            try:
+                self._executor.submit(write, snapshot()).result()
+            except Exception as e:
+                print(f"[Persistence] Flush of {name} failed: {e}")
+                traceback.print_exc()
+                self._dirty.add(name)
+
+    # ------------
+    # Lifecycle
+    # ------------
+
+    def _ensure_started(self):
+        if self._task is not None and not self._task.done():
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return  # Nothing running yet; start() or flush_sync() will pick it up.
+        self._task = loop.create_task(self._run())
+
+    def start(self):
+        self._ensure_started()
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            if self._dirty:
+                await self.flush()
+
+    async def shutdown(self):
+        """Stop the background task and force a final flush."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+
+
+# Shared instance used by every module.
+scheduler = PersistenceScheduler()
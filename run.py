@@ -11,35 +11,28 @@ import asyncio
 import sys
 import re
 import traceback
-import openpyxl
-from io import BytesIO
-from openpyxl.styles import numbers, Alignment
-
-# ----------------------------
-# Footer Helper
-# ----------------------------
-
-def add_embed_footer(embed: discord.Embed) -> discord.Embed:
-    footer_line = "*Luna ❀⋆ coded by <@296181275344109568>*"
-
-
-    if embed.description:
-        embed.description = embed.description.replace(f"\n\n{footer_line}", "")
-
-
-    if embed.description:
-        embed.description += f"\n\n{footer_line}"
-    else:
-        embed.description = footer_line
-
-    return embed
-
+from exporter import exporter
+from storage import db
+from loot_history import LootHistoryStore, to_epoch_us
+from paginator import CursorPaginator
+from sampler import AliasTable
+from cooldown_index import CooldownIndex
+from member_index import member_index
+from countdown import ticker, relative_timestamp
+from outbound import edit_queue, PRIORITY_FINAL
+from embeds import add_embed_footer, static_embed, EmbedTemplate
+from loot_config import COOLDOWN_SECONDS, LOOT_TABLE, VALUE_SKEW_EXP, DOUBLE_WIN_CHANCE
+from persistence import scheduler
+from hotreload import reload_with_state
+from work_index import work_index
+from work_board import LeaderboardView, preview_lines, preview_top
 
 # -------------------------------
 # LOAD ENVIRONMENT VARIABLES
 # -------------------------------
 load_dotenv()
 TOKEN = os.getenv("DISCORD_TOKEN")
+DEAL_EVENT = os.getenv("DEAL_EVENT") == "1"  # mystery box event; off between events
 
 # -------------------------------
 # CONFIG
@@ -47,8 +40,6 @@ TOKEN = os.getenv("DISCORD_TOKEN")
 
 TARGET_CHANNEL_IDS = [1420560553008697474, 1420601193222111233, 1422420786635079701]
 COMMAND_PREFIX = "!"
-COOLDOWN_SECONDS = 14 * 24 * 60 * 60
-DATA_FILE = "loot_data.json"
 LOOT_EMOJIS = {
     "Tickets": "🎟️",
     "Bits": "💠",
@@ -58,16 +49,13 @@ LOOT_EMOJIS = {
     "Unopened Dye": "🎨"
 }
 
+DOUBLE_OR_NOTHING_SECONDS = 30
+
 COOLDOWN_BYPASS_USERS = {296181275344109568, 1370076515429253264, 547733449818243084}
 
-LOOT_TABLE = [
-    ("Tickets", (1, 5), 5),
-    ("Bits", (500, 1000), 30),
-    ("Gold", (500, 1000), 15),
-    ("Excellent Dust", (5, 15), 23),
-    ("Mint Dust", (5, 15), 22),
-    ("Unopened Dye", (1, 3), 5)
-]
+# "Your lootbox is ready" reminders: DM first, ping here if DMs are closed.
+REMINDER_CHANNEL_ID = 1420601193222111233
+REMINDER_GRACE = timedelta(days=1)  # don't remind for cooldowns that ended longer ago (e.g. after downtime)
 
 # -------------------------------
 # BOT SETUP
@@ -89,83 +77,92 @@ bot = commands.Bot(
 # DATA STORAGE
 # -------------------------------
 user_cooldowns = {}
-user_loot_history = {}
+user_loot_history = LootHistoryStore()
+cooldown_index = CooldownIndex(COOLDOWN_SECONDS)
+reminded = {}  # user_id -> ready_at (ISO) of the last reminder sent
+double_session_rows = []  # Double or Nothing prompts to restore once the bot is ready
 
 def load_data():
+    """Load cooldowns + history from the shared SQLite store into memory."""
     global user_cooldowns, user_loot_history
-    if os.path.exists(DATA_FILE):
-        try:
-            with open(DATA_FILE, "r") as f:
-                raw_data = f.read()
-                data = json.loads(raw_data)
-                
-            user_cooldowns = {
-                int(k): datetime.fromisoformat(v).astimezone(timezone.utc)
-                for k, v in data.get("cooldowns", {}).items()
-            }
-            user_loot_history = {
-                int(k): [
-                    (i, v, datetime.fromisoformat(t).astimezone(timezone.utc))
-                    for i, v, t in v_list
-                ]
-                for k, v_list in data.get("history", {}).items()
-            }
-
-        except json.JSONDecodeError as e:
-            print(f"[WARNING] loot_data.json is corrupted: {e}. Attempting recovery...")
-            try:
-                recovered_data = None
-                for line in raw_data.splitlines():
-                    try:
-                        recovered_data = json.loads(line)
-                        break
-                    except:
-                        continue
-
-                if recovered_data:
-                    user_cooldowns = {
-                        int(k): datetime.fromisoformat(v).astimezone(timezone.utc)
-                        for k, v in recovered_data.get("cooldowns", {}).items()
-                    }
-                    user_loot_history = {
-                        int(k): [
-                            (i, v, datetime.fromisoformat(t).astimezone(timezone.utc))
-                            for i, v, t in v_list
-                        ]
-                        for k, v_list in recovered_data.get("history", {}).items()
-                    }
-                    print("[INFO] Partial data restored.")
-                else:
-                    print("[ERROR] Could not recover any data.")
-            except Exception as ex:
-                print(f"[ERROR] Failed recovery: {ex}")
-
-def save_data():
-    data = {
-        "cooldowns": {str(k): v.isoformat() for k, v in user_cooldowns.items()},
-        "history": {
-            str(k): [(i, v, t.isoformat()) for i, v, t in v_list]
-            for k, v_list in user_loot_history.items()
-        },
+    try:
+        cooldown_rows = db.query("SELECT user_id, last_open FROM loot_cooldowns")
+        history_rows = db.query("SELECT user_id, item, value, ts FROM loot_history ORDER BY id")
+        reminder_rows = db.query("SELECT user_id, ready_at FROM loot_reminders")
+        session_rows = db.query(
+            "SELECT session_id, user_id, item, value, opened_at, deadline, channel_id, message_id "
+            "FROM loot_double_sessions"
+        )
+    except Exception as e:
+        print(f"[ERROR] Failed to load loot data: {e}")
+        traceback.print_exc()
+        return
+
+    user_cooldowns = {
+        int(uid): datetime.fromisoformat(ts).astimezone(timezone.utc)
+        for uid, ts in cooldown_rows
     }
-    with open(DATA_FILE, "w") as f:
-        json.dump(data, f, indent=4)
+    cooldown_index.load(user_cooldowns)
+    reminded.clear()
+    reminded.update({int(uid): ts for uid, ts in reminder_rows})
+    double_session_rows[:] = session_rows
+    # Rows become compact array columns; datetimes are only rebuilt for rendered pages.
+    user_loot_history = LootHistoryStore()
+    for uid, item, value, ts in history_rows:
+        user_loot_history.append_epoch(int(uid), item, value, to_epoch_us(datetime.fromisoformat(ts)))
+
+def record_cooldown(user_id: int, when: datetime):
+    user_cooldowns[user_id] = when
+    cooldown_index.set(user_id, when)
+    db.write(
+        "INSERT INTO loot_cooldowns (user_id, last_open) VALUES (?, ?) "
+        "ON CONFLICT(user_id) DO UPDATE SET last_open = excluded.last_open",
+        (user_id, when.isoformat()),
+        key=("loot_cooldowns", user_id),
+    )
+
+def record_loot(user_id: int, hist_item: str, value: int, timestamp: datetime):
+    user_loot_history.append(user_id, hist_item, value, timestamp)
+    db.write(
+        "INSERT INTO loot_history (user_id, item, value, ts) VALUES (?, ?, ?, ?)",
+        (user_id, hist_item, value, timestamp.isoformat()),
+    )
+
+def save_double_session(view):
+    db.write(
+        "INSERT OR REPLACE INTO loot_double_sessions "
+        "(session_id, user_id, item, value, opened_at, deadline, channel_id, message_id) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+        (
+            view.session_id, view.user_id, view.item, view.value, view.timestamp.isoformat(),
+            view.deadline.isoformat(), view.channel_id,
+            view.interaction_message.id if view.interaction_message else None,
+        ),
+        key=("loot_double_sessions", view.session_id),
+    )
+
+def end_double_session(session_id: int):
+    # Same key as the insert, so a session that never reached disk costs no writes.
+    db.write(
+        "DELETE FROM loot_double_sessions WHERE session_id = ?",
+        (session_id,),
+        key=("loot_double_sessions", session_id),
+    )
 
 load_data()
 
 # -------------------------------
 # LOOT FUNCTION
 # -------------------------------
-def roll_loot():
-    items = [item for item, _, _ in LOOT_TABLE]
-    ranges = {item: rng for item, rng, _ in LOOT_TABLE}
-    weights = [chance for _, _, chance in LOOT_TABLE]
+# Compiled once; each roll is an O(1) alias draw.
+LOOT_SAMPLER = AliasTable([item for item, _, _ in LOOT_TABLE], [chance for _, _, chance in LOOT_TABLE])
+LOOT_RANGES = {item: rng for item, rng, _ in LOOT_TABLE}
 
-    reward_item = random.choices(items, weights=weights, k=1)[0]
-    low, high = ranges[reward_item]
+def roll_loot():
+    reward_item = LOOT_SAMPLER.draw()
+    low, high = LOOT_RANGES[reward_item]
 
-    exp = 3
-    u = random.random() ** exp
+    u = random.random() ** VALUE_SKEW_EXP
     reward_value = low + int(u * (high - low))
 
     return reward_item, reward_value
@@ -173,13 +170,33 @@ def roll_loot():
 # -------------------------------
 # EVENTS
 # -------------------------------
+def restore_double_sessions():
+    """Re-attach Double or Nothing prompts that were pending when the bot last stopped."""
+    for session_id, user_id, item, value, opened_at, deadline, channel_id, message_id in double_session_rows:
+        view = DoubleOrNothingView(
+            session_id, user_id, channel_id, item, value,
+            datetime.fromisoformat(opened_at),
+            deadline=datetime.fromisoformat(deadline),
+        )
+        if message_id is not None:
+            view.interaction_message = bot.get_partial_messageable(channel_id).get_partial_message(message_id)
+            bot.add_view(view, message_id=message_id)
+        else:
+            bot.add_view(view)
+        view.start_timer()  # Deadlines already passed fire straight away.
+    if double_session_rows:
+        print(f"[DoubleOrNothing] Restored {len(double_session_rows)} pending session(s).")
+    double_session_rows.clear()
+
+
 @bot.event
 async def on_ready():
     # Register persistent views once (for tickets)
     if not getattr(bot, "persistent_views_registered", False):
         from jobboard import MilestoneTicketView
         print("[PersistentViews] Registering MilestoneTicketView globally...")
-        bot.add_view(MilestoneTicketView())  # No args; metadata comes from embed footer
+        bot.add_view(MilestoneTicketView())  # Stateless; each ticket's state lives in jobboard.ticket_store
+        restore_double_sessions()
         bot.persistent_views_registered = True
         print("[PersistentViews] Registered.")
 
@@ -197,94 +214,80 @@ async def on_ready():
 # COMMAND HELPERS
 # -------------------------------
 def find_member_by_name_or_id(guild, query: str):
-    query_lower = query.lower()
-
-    if query.startswith("<@") and query.endswith(">"):
-        try:
-            user_id = int(query.strip("<@!>"))
-            return guild.get_member(user_id)
-        except ValueError:
-            return None
-
-    if query.isdigit():
-        return guild.get_member(int(query))
-
-    for member in guild.members:
-        if query_lower in member.display_name.lower() or query_lower in member.name.lower():
-            return member
-
-    return None
+    return member_index.find(guild, query)
 
 # -------------------------------
 # MINI GAME
 # -------------------------------
+DON_PROMPT = EmbedTemplate(
+    title="🎰 Double or Nothing?",
+    description=(
+        "{mention}, you won **{value} {item}!**\n\n"
+        "Do you want to risk it?\n\n"
+        "Pick one: 🎲 (Double) | 🍀 (Keep)\n"
+        "⏳ **Time runs out** {deadline}\n\n"
+        "**Prize:** {value} {item}"
+    ),
+    color=0xFFC5D3,
+)
+DON_RESULT = EmbedTemplate(title="Double or Nothing Result", description="{text}", color=0xFFC5D3)
+DON_CLAIM_TEXT = "\n\nCreate a ticket to claim your prize in <#1412934283613700136>"
+
 class DoubleOrNothingView(View):
-    def __init__(self, ctx, user_id, item, value, timestamp):
-        super().__init__(timeout=30)
-        self.ctx = ctx
+    """
+    One pending Double or Nothing prompt.
+
+    The buttons carry the session id in their custom_id and the session is
+    mirrored to loot_double_sessions until it resolves, so after a restart
+    restore_double_sessions() rebuilds the view with its original deadline.
+    """
+
+    def __init__(self, session_id, user_id, channel_id, item, value, timestamp, deadline=None):
+        super().__init__(timeout=None)  # Expiry is driven by the ticker.
+        self.session_id = session_id
         self.user_id = user_id
+        self.channel_id = channel_id
         self.item = item
         self.value = value
         self.timestamp = timestamp
         self.interaction_message = None
-        self.remaining = 30
-        self.ended = False  
+        self.deadline = deadline or datetime.now(timezone.utc) + timedelta(seconds=DOUBLE_OR_NOTHING_SECONDS)
+        self.timer_key = ("double_or_nothing", session_id)
+        self.ended = False
+        self.double_button.custom_id = f"don:double:{session_id}"
+        self.safe_button.custom_id = f"don:keep:{session_id}"
 
-    async def start_timer(self):
-        try:
-            while self.remaining > 0:
-                await asyncio.sleep(1)
-                self.remaining -= 1
-                if self.ended:
-                    return
-                if self.interaction_message and any(not child.disabled for child in self.children):
-                    embed = self.build_embed()
-                    embed = add_embed_footer(embed)
-                    await self.interaction_message.edit(embed=embed, view=self)
-
-            if not self.ended and self.interaction_message:
-                self.ended = True
-                for child in self.children:
-                    child.disabled = True
-                await self.interaction_message.edit(view=self)
-
-                result_text = f"{self.ctx.author.mention} safely kept **{self.value} {self.item}** (Auto Timeout)."
-                gif_url = "https://cdn.discordapp.com/attachments/1420560553008697474/1422085281632489514/CFB31F85-BD99-423B-9BE8-7973659FC0C7.gif"
-
-                timeout_embed = discord.Embed(
-                    title="Double or Nothing Result",
-                    description=result_text + "\n\nCreate a ticket to claim your prize in <#1412934283613700136>",
-                    color=0xFFC5D3
-                )
-                timeout_embed.set_image(url=gif_url)
-                timeout_embed = add_embed_footer(timeout_embed)
-                await self.interaction_message.edit(embed=timeout_embed, view=None)
-
-                emoji = "⏳"
-                label = "Timeout Keep"
-                hist_item = f"{emoji} {label} — {self.value} {self.item}"
-
-                user_loot_history.setdefault(self.user_id, []).append(
-                    (hist_item, self.value, self.timestamp)
-                )
-                save_data()
+    def start_timer(self):
+        # The embed counts down client-side via <t:R>; the shared ticker only fires the timeout.
+        ticker.start(self.timer_key, self.deadline, self.resolve_timeout, channel_id=self.channel_id)
 
-        except Exception as e:
-            print(f"[Timer error] {e}")
+    def finish(self, hist_item: str):
+        self.ended = True
+        self.stop()
+        record_loot(self.user_id, hist_item, self.value, self.timestamp)
+        end_double_session(self.session_id)
+
+    async def resolve_timeout(self):
+        emoji = "⏳"
+        label = "Timeout Keep"
+        hist_item = f"{emoji} {label} — {self.value} {self.item}"
+        self.finish(hist_item)
+        if not self.interaction_message:
+            return
+
+        result_text = f"<@{self.user_id}> safely kept **{self.value} {self.item}** (Auto Timeout)."
+        gif_url = "https://cdn.discordapp.com/attachments/1420560553008697474/1422085281632489514/CFB31F85-BD99-423B-9BE8-7973659FC0C7.gif"
+
+        timeout_embed = DON_RESULT.render(text=result_text + DON_CLAIM_TEXT, image=gif_url)
+        await edit_queue.edit(self.interaction_message, embed=timeout_embed, view=None, priority=PRIORITY_FINAL)
 
     def build_embed(self):
-        embed = discord.Embed(
-            title="🎰 Double or Nothing?",
-            description=(
-                f"{self.ctx.author.mention}, you won **{self.value} {self.item}!**\n\n"
-                f"Do you want to risk it?\n\n"
-                f"Pick one: 🎲 (Double) | 🍀 (Keep)\n"
-                f"⏳ **Time remaining:** {self.remaining} seconds\n\n"
-                f"**Prize:** {self.value} {self.item}"
-            ),
-            color=0xFFC5D3
+        return DON_PROMPT.render(
+            mention=f"<@{self.user_id}>",
+            value=self.value,
+            item=self.item,
+            deadline=relative_timestamp(self.deadline),
         )
-        return add_embed_footer(embed)
 
     async def show_result_embed(self, interaction: Interaction, result_text: str, gif_url: str, outcome_tag: str):
         """
@@ -294,39 +297,28 @@ class DoubleOrNothingView(View):
         🍀 Kept
         ⏳ Timeout Keep
         """
-        self.ended = True
-        for child in self.children:
-            child.disabled = True
-        await interaction.message.edit(view=self)
-
-        result_embed = discord.Embed(
-            title="Double or Nothing Result",
-            description=result_text + (
-                "\n\nCreate a ticket to claim your prize in <#1412934283613700136>"
-                if self.value > 0 else ""
-            ),
-            color=0xFFC5D3
-        )
-        result_embed.set_image(url=gif_url)
-        result_embed = add_embed_footer(result_embed)
-        await interaction.response.edit_message(embed=result_embed, view=None)
-
         emoji = outcome_tag.split()[0]
         label = outcome_tag.split(maxsplit=1)[1]
 
         hist_item = f"{emoji} {label} — {self.value} {self.item}"
 
-        user_loot_history.setdefault(self.user_id, []).append(
-            (hist_item, self.value, self.timestamp)
+        # Recorded before the edit, so a failed edit can't lose the reward.
+        self.finish(hist_item)
+
+        result_embed = DON_RESULT.render(
+            text=result_text + (DON_CLAIM_TEXT if self.value > 0 else ""),
+            image=gif_url,
         )
-        save_data()
+        await interaction.response.edit_message(embed=result_embed, view=None)
 
     @button(label="🎲 Double", style=discord.ButtonStyle.success)
     async def double_button(self, interaction: Interaction, button: Button):
         if interaction.user.id != self.user_id:
             return await interaction.response.send_message("❌ This isn’t your lootbox!", ephemeral=True)
+        if not ticker.claim(self.timer_key):
+            return await interaction.response.defer()  # Already resolved (timeout or other button).
 
-        if random.random() < 0.5:
+        if random.random() < DOUBLE_WIN_CHANCE:
             self.value *= 2
             result_text = f"🎉 {interaction.user.mention} doubled their reward! Now **{self.value} {self.item}**"
             gif_url = "https://cdn.discordapp.com/attachments/1420560553008697474/1422038487569268747/120AEC33-8409-4DDF-9EA3-D6C95DC0D030.gif"
@@ -343,6 +335,8 @@ class DoubleOrNothingView(View):
     async def safe_button(self, interaction: Interaction, button: Button):
         if interaction.user.id != self.user_id:
             return await interaction.response.send_message("❌ This isn’t your lootbox!", ephemeral=True)
+        if not ticker.claim(self.timer_key):
+            return await interaction.response.defer()  # Already resolved (timeout or other button).
 
         result_text = f"{interaction.user.mention} safely kept **{self.value} {self.item}**."
         gif_url = "https://cdn.discordapp.com/attachments/1420560553008697474/1422085281632489514/CFB31F85-BD99-423B-9BE8-7973659FC0C7.gif"
@@ -375,17 +369,14 @@ async def open_lootbox(ctx):
         if user_id in pending_retries:
             pending_retries.remove(user_id)
         elif user_id not in COOLDOWN_BYPASS_USERS and user_id in user_cooldowns:
-            last_open = user_cooldowns[user_id]
-            elapsed = (now - last_open).total_seconds()
-            if elapsed < COOLDOWN_SECONDS:
+            if now < cooldown_index.ready_at(user_id):
                 await ctx.send("⏳ You are on cooldown!")
                 await check_cooldown(ctx)
                 await loot_history(ctx)
                 return
 
         item, value = roll_loot()
-        user_cooldowns[user_id] = now
-        save_data()
+        record_cooldown(user_id, now)
 
         praying_embed = discord.Embed(
             title="🌸 Praying ♡",
@@ -398,25 +389,28 @@ async def open_lootbox(ctx):
         await asyncio.sleep(0.5)
 
         spin_embed = discord.Embed(title="🎰 Spinning...", description="| 🎲 💎 💰 |", color=0xFFC5D3)
-        await message.edit(embed=spin_embed)
+        edit_queue.edit(message, embed=spin_embed.copy())
 
         final_emoji = LOOT_EMOJIS[item]
 
         for _ in range(3):
             reels = [random.choice(list(LOOT_EMOJIS.values())) for _ in range(3)]
             spin_embed.description = f"| {reels[0]}   {reels[1]}   {reels[2]} |"
-            await message.edit(embed=spin_embed)
+            edit_queue.edit(message, embed=spin_embed.copy())
             await asyncio.sleep(0.2)
 
         spin_embed.description = f"| {final_emoji}   {final_emoji}   {final_emoji} |"
-        await message.edit(embed=spin_embed)
+        await edit_queue.edit(message, embed=spin_embed.copy(), priority=PRIORITY_FINAL)
         await asyncio.sleep(0.5)
 
-        view = DoubleOrNothingView(ctx, user_id, item, value, now)
+        # The command message id doubles as a unique session id.
+        view = DoubleOrNothingView(ctx.message.id, user_id, ctx.channel.id, item, value, now)
         don_embed = view.build_embed()
-        don_embed = add_embed_footer(don_embed)
+        save_double_session(view)
+        view.start_timer()  # Before sending, so a fast click can already claim the timer.
         view.interaction_message = await ctx.send(embed=don_embed, view=view)
-        asyncio.create_task(view.start_timer())
+        if not view.ended:
+            save_double_session(view)  # Now with the message id.
 
     except Exception:
         traceback.print_exc()
@@ -437,60 +431,28 @@ async def loot_history(ctx, *, query: str = None):
         await ctx.send(f"{target.mention} hasn't opened any lootboxes yet!")
         return
 
-    history = list(reversed(user_loot_history[user_id]))
-    items_per_page = 5
-    total_pages = (len(history) + items_per_page - 1) // items_per_page
+    history = user_loot_history[user_id]
     thumbnail_url = "https://cdn.discordapp.com/attachments/1321372597572599869/1420595192150622409/IMG_9439.gif"
 
-    class LootHistoryView(View):
-        def __init__(self):
-            super().__init__(timeout=120)
-            self.current_page = 0
-
-        async def update_message(self, interaction: Interaction):
-            start_index = self.current_page * items_per_page
-            end_index = start_index + items_per_page
-            page_items = history[start_index:end_index]
-
-            lines = [f"{ts.strftime('%Y-%m-%d %H:%M:%S')}: {item}"
-                     for item, value, ts in page_items]
-
-            embed = discord.Embed(
-                title=f"{target.display_name}'s Loot History (Page {self.current_page + 1}/{total_pages})",
-                description="\n".join(lines),
-                color=0xFFDBE5,
-            )
-            embed.set_thumbnail(url=thumbnail_url)
-            embed = add_embed_footer(embed)
-            self.previous.disabled = self.current_page == 0
-            self.next.disabled = self.current_page == total_pages - 1
-
-            await interaction.response.edit_message(embed=embed, view=self)
-
-        @button(label="◀️", style=discord.ButtonStyle.secondary)
-        async def previous(self, interaction: Interaction, button: Button):
-            if self.current_page > 0:
-                self.current_page -= 1
-                await self.update_message(interaction)
-
-        @button(label="▶️", style=discord.ButtonStyle.secondary)
-        async def next(self, interaction: Interaction, button: Button):
-            if self.current_page < total_pages - 1:
-                self.current_page += 1
-                await self.update_message(interaction)
-
-    view = LootHistoryView()
-    page_items = history[:items_per_page]
-    lines = [f"{ts.strftime('%Y-%m-%d %H:%M:%S')}: {item}" for item, value, ts in page_items]
+    def render(page_items, page, total_pages):
+        lines = [f"{ts.strftime('%Y-%m-%d %H:%M:%S')}: {item}" for item, value, ts in page_items]
+        embed = discord.Embed(
+            title=f"{target.display_name}'s Loot History (Page {page + 1}/{total_pages})",
+            description="\n".join(lines),
+            color=0xFFDBE5,
+        )
+        embed.set_thumbnail(url=thumbnail_url)
+        return add_embed_footer(embed)
 
-    embed = discord.Embed(
-        title=f"{target.display_name}'s Loot History (Page 1/{total_pages})",
-        description="\n".join(lines),
-        color=0xFFDBE5,
+    # History is append-only, so its length doubles as the data version.
+    view = CursorPaginator(
+        namespace=("loot_history", user_id, target.display_name),
+        count=lambda: len(history),
+        fetch=history.newest_first,
+        render=render,
+        version=lambda: len(history),
     )
-    embed.set_thumbnail(url=thumbnail_url)
-    embed = add_embed_footer(embed)
-    await ctx.send(embed=embed, view=view)
+    await view.send(ctx)
 
 
 @bot.command(name="cooldown", aliases=["cd"])
@@ -506,17 +468,11 @@ async def check_cooldown(ctx, *, query: str = None):
         target = ctx.author
 
     user_id = target.id
-    if user_id not in user_cooldowns:
-        await ctx.send(f"{target.mention} can open a lootbox right now!")
-        return
-
-    last_open = user_cooldowns[user_id]
-    elapsed = (now - last_open).total_seconds()
+    next_time = cooldown_index.ready_at(user_id)
 
-    if elapsed >= COOLDOWN_SECONDS:
+    if next_time is None or next_time <= now:
         await ctx.send(f"{target.mention} can open a lootbox right now!")
     else:
-        next_time = last_open + timedelta(seconds=COOLDOWN_SECONDS)
         unix_time = int(next_time.timestamp())
         formatted_time = f"<t:{unix_time}:f>"
 
@@ -537,8 +493,143 @@ async def check_cooldown(ctx, *, query: str = None):
         await ctx.send(embed=embed)
 
 
-@bot.command(name="help")
-async def help_command(ctx):
+# -------------------------------
+# COOLDOWN REMINDERS
+# -------------------------------
+def _reminder_member(user_id: int):
+    """The member to remind, or None if they can't use !open anyway."""
+    if user_id in COOLDOWN_BYPASS_USERS:
+        return None
+    channel = bot.get_channel(REMINDER_CHANNEL_ID)
+    member = channel.guild.get_member(user_id) if channel else None
+    if member is None or not member.premium_since:
+        return None
+    return member
+
+
+async def send_ready_reminder(user_id: int, ready_at: datetime):
+    ready_iso = ready_at.isoformat()
+    if reminded.get(user_id) == ready_iso:
+        return
+    member = _reminder_member(user_id)
+    if member is None:
+        return
+
+    text = f"🎁 {member.mention} your lootbox is ready! Use `!open` in <#{REMINDER_CHANNEL_ID}>."
+    try:
+        await member.send(text)
+    except discord.HTTPException:
+        channel = bot.get_channel(REMINDER_CHANNEL_ID)
+        if channel is None:
+            return
+        await channel.send(text)
+
+    reminded[user_id] = ready_iso
+    db.write(
+        "INSERT INTO loot_reminders (user_id, ready_at) VALUES (?, ?) "
+        "ON CONFLICT(user_id) DO UPDATE SET ready_at = excluded.ready_at",
+        (user_id, ready_iso),
+        key=("loot_reminders", user_id),
+    )
+
+
+async def cooldown_reminder_loop():
+    """The only reminder task: sleeps until the next cooldown ends, then pings everyone due."""
+    await bot.wait_until_ready()
+
+    # Park everyone who can't open right now, so ticks and !eligible never walk past them.
+    for user_id in list(user_cooldowns):
+        if _reminder_member(user_id) is None:
+            cooldown_index.discard(user_id)
+
+    # Cooldowns that ended while the bot was offline (recently enough to still matter).
+    for user_id, ready_at in cooldown_index.ready_since(datetime.now(timezone.utc) - REMINDER_GRACE):
+        try:
+            await send_ready_reminder(user_id, ready_at)
+        except Exception as e:
+            print(f"[Reminders] Failed for {user_id}: {e}")
+
+    while not bot.is_closed():
+        await cooldown_index.wait_due()
+        for user_id, ready_at in cooldown_index.pop_due():
+            try:
+                await send_ready_reminder(user_id, ready_at)
+            except Exception as e:
+                print(f"[Reminders] Failed for {user_id}: {e}")
+
+
+def _in_reminder_guild(guild_id: int) -> bool:
+    channel = bot.get_channel(REMINDER_CHANNEL_ID)
+    return channel is not None and channel.guild.id == guild_id
+
+
+@bot.listen("on_member_update")
+async def track_boost_changes(before: discord.Member, after: discord.Member):
+    if not _in_reminder_guild(after.guild.id):
+        return
+    if before.premium_since and not after.premium_since:
+        cooldown_index.discard(after.id)
+    elif after.premium_since and not before.premium_since:
+        cooldown_index.restore(after.id)
+
+
+@bot.listen("on_raw_member_remove")
+async def forget_departed_booster(payload: discord.RawMemberRemoveEvent):
+    if _in_reminder_guild(payload.guild_id):
+        cooldown_index.discard(payload.user.id)
+
+
+@bot.command(name="eligible")
+async def eligible_command(ctx, hours: float = 1.0, limit: int = 20):
+    """Admin: boosters who can open now, and who becomes eligible in the next `hours`."""
+    if ctx.author.id not in RETRY_WHITELIST:
+        return await ctx.send("❌ You are not allowed to use this command.")
+
+    limit = max(1, min(limit, 50))
+    is_booster = lambda uid: _reminder_member(uid) is not None
+
+    ready_now = cooldown_index.eligible_now(limit, keep=is_booster)
+    soon = cooldown_index.upcoming(timedelta(hours=hours), limit, keep=is_booster)
+
+    now_text = "\n".join(f"<@{uid}> — since <t:{int(ts.timestamp())}:R>" for uid, ts in ready_now) or "*Nobody*"
+    soon_text = "\n".join(f"<@{uid}> — <t:{int(ts.timestamp())}:R>" for uid, ts in soon) or "*Nobody*"
+
+    embed = discord.Embed(title="🎁 Lootbox Eligibility", color=0xF1DBB6)
+    embed.add_field(name=f"Ready now (up to {limit})", value=now_text[:1024], inline=False)
+    embed.add_field(name=f"Ready within {hours:g}h", value=soon_text[:1024], inline=False)
+    embed = add_embed_footer(embed)
+    await ctx.send(embed=embed)
+
+
+@bot.command(name="editstats")
+async def edit_stats_command(ctx):
+    """Admin: counters for the shared outbound edit queue."""
+    if ctx.author.id not in RETRY_WHITELIST:
+        return await ctx.send("❌ You are not allowed to use this command.")
+    await ctx.send(f"📨 Edit queue: `{edit_queue.stats()}`")
+
+
+@bot.command(name="reload")
+async def reload_command(ctx, name: str):
+    """Admin: reload one extension in place, keeping its live state and the gateway session."""
+    if ctx.author.id not in RETRY_WHITELIST:
+        return await ctx.send("❌ You are not allowed to use this command.")
+    if name not in bot.extensions:
+        loaded = ", ".join(f"`{ext}`" for ext in sorted(bot.extensions))
+        return await ctx.send(f"❌ `{name}` is not loaded. Loaded: {loaded}")
+
+    try:
+        elapsed, handed = await reload_with_state(bot, name)
+    except Exception as e:
+        traceback.print_exc()
+        return await ctx.send(f"❌ Reload of `{name}` failed, old code kept running: `{e}`")
+
+    state_note = "state handed over" if handed else "no state to hand over"
+    await ctx.send(f"♻️ Reloaded `{name}` in {elapsed * 1000:.0f} ms ({state_note}).")
+
+
+@static_embed
+def help_embed():
     embed = discord.Embed(
         title="<a:hnote3:1420614028514033685> Bot Commands",
         description="Here are all the commands you can use:",
@@ -550,12 +641,16 @@ async def help_command(ctx):
     embed.add_field(name="!help", value="Show this help message with all available commands.", inline=False)
     embed.add_field(name="!prize", value="This shows list of available prizes.", inline=False)
     embed.set_thumbnail(url="https://cdn.discordapp.com/attachments/1420560553008697474/1420613932288180265/IMG_9442.jpg")
-    embed = add_embed_footer(embed)
-    await ctx.send(embed=embed)
+    return add_embed_footer(embed)
 
 
-@bot.command(name="prize")
-async def prize_command(ctx):
+@bot.command(name="help")
+async def help_command(ctx):
+    await ctx.send(embed=help_embed())
+
+
+@static_embed
+def prize_embed():
     embed = discord.Embed(
         title="<a:BunnyBook:1420995026741104804> List of Prizes",
         description="\n",
@@ -570,88 +665,23 @@ async def prize_command(ctx):
     embed.set_thumbnail(
         url="https://cdn.discordapp.com/attachments/1420560553008697474/1420993021972840468/IMG_9468.gif"
     )
-    embed = add_embed_footer(embed)
-    await ctx.send(embed=embed)
+    return add_embed_footer(embed)
+
+
+@bot.command(name="prize")
+async def prize_command(ctx):
+    await ctx.send(embed=prize_embed())
 
 
 # ------------------------------- 
 # Work mechanic 
 # ------------------------------- 
-MENTION_REGEX = r"<@!?(\d+)>"
-USERNAME_REGEX = r"@(\w+)"
-
-def strip_markdown(text):
-    if not text:
-        return "" 
-    text = re.sub(r"[*_~>|]", "", text) 
-    text = text.replace("", "")
-    text = text.replace("\n", "").strip()
-    return text
-
-class LeaderboardView(View):
-    def __init__(self, leaderboard_data: list[tuple]):
-        """
-        leaderboard_data: list of tuples -> [(username, user_id, times_worked), ...]
-        """
-        super().__init__(timeout=None)
-        self.leaderboard_data = leaderboard_data
-        self.ALLOWED_USERS = {296181275344109568, 1370076515429253264}
-
-    @button(label="📋 Download Excel", style=discord.ButtonStyle.primary)
-    async def download_excel(self, interaction: discord.Interaction, button: Button):
-        if interaction.user.id not in self.ALLOWED_USERS:
-            return await interaction.response.send_message(
-                "❌ You are not allowed to download this file.", ephemeral=True
-            )
-        try:
-            wb = openpyxl.Workbook()
-            ws = wb.active
-            ws.title = "Leaderboard"
-
-            ws.append(["Discord User", "User ID", "Times Worked", "Add Command"])
-
-            for username, user_id, times in self.leaderboard_data:
-                clean_username = strip_markdown(username)
-                command = f"/add name: clanlottery tickets: {times} user: <@{user_id}>"
-                ws.append([username, str(user_id), times, command])
-
-                cmd_cell = ws.cell(row=ws.max_row, column=4)
-                cmd_cell.number_format = "@"
-
-            for row in ws.iter_rows(min_row=2, min_col=2, max_col=2):
-                for cell in row:
-                    cell.number_format = numbers.FORMAT_TEXT
-                    cell.alignment = Alignment(horizontal="left")
-
-            for col in [3, 4]:
-                for row in ws.iter_rows(min_row=2, min_col=col, max_col=col):
-                    for cell in row:
-                        cell.alignment = Alignment(horizontal="left")
-
-            buffer = BytesIO()
-            wb.save(buffer)
-            buffer.seek(0)
-
-            file = discord.File(fp=buffer, filename="work_leaderboard.xlsx")
-            await interaction.response.send_message(
-                "✅ Excel file with RaffleBot commands generated!", file=file, ephemeral=True
-            )
-
-        except Exception as e:
-            print("Excel generation failed:", e)
-            await interaction.response.send_message(
-                "❌ Failed to generate Excel file.", ephemeral=True
-            )
-
-
 # -------------------------------------
 # WORKED COMMAND
 # -------------------------------------
 @bot.command(name="worked")
 async def worked_command(ctx, days: int = 30):
     ALLOWED_USERS = {1370076515429253264, 296181275344109568}
-    WORK_CHANNEL_ID = 1455637507000762571
-    TARGET_PHRASE = "your workers have finished their tasks"
 
     if ctx.author.id not in ALLOWED_USERS:
         return await ctx.send("❌ You do not have permission to use this command.")
@@ -659,124 +689,32 @@ async def worked_command(ctx, days: int = 30):
     if not (1 <= days <= 90):
         return await ctx.send("❌ Please provide a number between 1 and 90.")
 
-    channel = ctx.guild.get_channel(WORK_CHANNEL_ID)
-    if not channel:
-        return await ctx.send("❌ Could not find the target work channel.")
-
-    since = datetime.now(timezone.utc) - timedelta(days=days)
-
-    user_counts = {}
-    total_scanned = 0
-    total_matched = 0
+    # Answered from the completion index's day rollups (rolling N x 24h); no channel history is read here.
+    window = work_index.window(days)
+    # One per completion message; a message with several work embeds counts once.
+    completion_messages = window.completions
+    catching_up = "" if work_index.backfilled.is_set() else "\n⏳ Index is still catching up on missed messages."
 
-    PROGRESS_BAR_LENGTH = 20
-    HEARTBEAT_INTERVAL = 50
-
-    progress_embed = discord.Embed(
-        title="🏗️ Scanning Messages...",
-        description=f"⏳ Scanning messages from the past {days} days...\nScanned: 0\nMatches: 0",
-        color=discord.Color.orange(),
-    )
-    progress_msg = await ctx.send(embed=progress_embed)
-
-    scanned_since_last_update = 0
-
-    async for message in channel.history(limit=None, oldest_first=False):
-
-        if message.created_at < since:
-            break
-
-        total_scanned += 1
-        scanned_since_last_update += 1
-
-        if not message.embeds:
-            continue
-
-        if message.author.bot:
-            for e in message.embeds:
-                desc = strip_markdown(e.description.lower() if e.description else "")
-                if TARGET_PHRASE.lower() in desc:
-                    total_matched += 1
-                    original_desc = e.description or ""
-
-                    mentions = re.findall(MENTION_REGEX, original_desc)
-                    if mentions:
-                        for uid in mentions:
-                            uid = int(uid)
-                            user_counts[uid] = user_counts.get(uid, 0) + 1
-                    else:
-                        usernames = re.findall(USERNAME_REGEX, original_desc)
-                        for username in usernames:
-                            member = discord.utils.find(
-                                lambda m: m.name.lower() == username.lower(),
-                                ctx.guild.members
-                            )
-                            if member:
-                                user_counts[member.id] = user_counts.get(member.id, 0) + 1
-
-        if scanned_since_last_update >= HEARTBEAT_INTERVAL:
-            scanned_since_last_update = 0
-            filled = min(PROGRESS_BAR_LENGTH, (total_scanned % 1000) // 50)
-            bar = "#" * filled + "-" * (PROGRESS_BAR_LENGTH - filled)
-
-            progress_embed.description = (
-                f"⏳ Scanning messages...\n"
-                f"**Progress:** [{bar}] Scanned: {total_scanned} messages\n"
-                f"**Matches:** {total_matched}"
-            )
-            await progress_msg.edit(embed=progress_embed)
-
-    bar = "#" * PROGRESS_BAR_LENGTH
-    progress_embed.description = (
-        f"✅ Scan complete!\n"
-        f"Scanned {total_scanned} messages.\n"
-        f"Found {total_matched} successful completions."
-    )
-    await progress_msg.edit(embed=progress_embed)
-
-    if total_matched == 0:
+    if completion_messages == 0:
         embed = discord.Embed(
             title="📭 No Work Completions Found",
-            description=f"Scanned **{total_scanned}** messages.\nNo matches found.",
+            description=f"No completions in the past {days} days.{catching_up}",
             color=discord.Color.red(),
         )
         return await ctx.send(embed=embed)
 
-    filtered_counts = {}
-    for user_id, count in user_counts.items():
-        if ctx.guild.get_member(user_id):
-            filtered_counts[user_id] = count
-
-    user_counts = filtered_counts
-
-    sorted_users = sorted(user_counts.items(), key=lambda x: x[1], reverse=True)
-
-    leaderboard_data = []
-    preview_lines = []
-
-    for i, (user_id, count) in enumerate(sorted_users, start=1):
-        member = ctx.guild.get_member(user_id)
-        username = member.display_name if member else f"<@{user_id}>"
-
-        leaderboard_data.append((username, user_id, count))
-
-        if i <= 10:
-            preview_lines.append(f"**#{i}** {username} — {count} times")
-
-    preview_text = "\n".join(preview_lines) or "No valid users found."
+    preview_text = "\n".join(preview_lines(ctx.guild, preview_top(ctx.guild, days))) or "No valid users found."
 
     final_embed = discord.Embed(
         title=f"🏆 Work Leaderboard (Past {days} Days)",
         description=(
-            f"✅ Scan complete!\n"
-            f"Scanned **{total_scanned}** messages.\n"
-            f"Found **{total_matched}** completions.\n\n"
+            f"Found **{completion_messages}** completion messages.{catching_up}\n\n"
             f"{preview_text}"
         ),
         color=discord.Color.green(),
     )
 
-    view = LeaderboardView(leaderboard_data)
+    view = LeaderboardView(days)
     final_embed = add_embed_footer(final_embed)
     await ctx.send(embed=final_embed, view=view)
 
@@ -820,14 +758,29 @@ async def inspect_karuta(ctx):
 
 # -------------------------------
 # RUN BOT
-# Event: Deal / over : await bot.load_extension("deal")
+# Event: Deal / set DEAL_EVENT=1 to run the mystery box event
 # -------------------------------
 async def main():
     async with bot:
+        await bot.load_extension("member_index")
+        await bot.load_extension("work_index")
+        await bot.load_extension("work_board")
+        await bot.load_extension("ticket_lifecycle")
         await bot.load_extension("jobboard")
         await bot.load_extension("lists")
         await bot.load_extension("daddy")
-        await bot.start(TOKEN)
+        if DEAL_EVENT:
+            await bot.load_extension("deal")
+        scheduler.start()
+        reminder_task = asyncio.create_task(cooldown_reminder_loop())
+        try:
+            await bot.start(TOKEN)
+        finally:
+            reminder_task.cancel()
+            await ticker.shutdown()
+            exporter.shutdown()
+            await scheduler.shutdown()
+            db.close()
 
         print("Tree Commands Loaded:", [cmd.name for cmd in bot.tree.get_commands()])
 
@@ -0,0 +1,123 @@
+import random
+
+# ----------------------------
+# Alias table (Walker / Vose)
+# ----------------------------
+
+class AliasTable:
+    """
+    Weighted sampler compiled once, then O(1) per draw.
+
+    Built with Vose's variant of Walker's alias method: every column holds
+    at most two outcomes, so a draw is one random column plus one coin flip,
+    no matter how many items there are.
+    """
+
+    __slots__ = ("items", "weights", "_prob", "_alias")
+
+    def __init__(self, items, weights):
+        self.items = list(items)
+        self.weights = [float(w) for w in weights]
+        if len(self.items) != len(self.weights):
+            raise ValueError("items and weights must be the same length")
+        self._compile()
+
+    def _compile(self):
+        n = len(self.items)
+        self._prob = [0.0] * n
+        self._alias = [0] * n
+        total = sum(self.weights)
+        if n == 0 or total <= 0:
+            self._prob = []
+            self._alias = []
+            return
+
+        scaled = [w * n / total for w in self.weights]
+        small = [i for i, p in enumerate(scaled) if p < 1.0]
+        large = [i for i, p in enumerate(scaled) if p >= 1.0]
+
+        while small and large:
+            s = small.pop()
+            l = large.pop()
+            self._prob[s] = scaled[s]
+            self._alias[s] = l
+            scaled[l] -= 1.0 - scaled[s]
+            (small if scaled[l] < 1.0 else large).append(l)
+
+        # Whatever is left is 1.0 up to float error.
+        for i in small + large:
+            self._prob[i] = 1.0
+            self._alias[i] = i
+
+    def __len__(self):
+        return len(self._prob)
+
+    def __bool__(self):
+        return bool(self._prob)
+
+    def draw_index(self, rng=random) -> int:
+        column = int(rng.random() * len(self._prob))
+        return column if rng.random() < self._prob[column] else self._alias[column]
+
+    def draw(self, rng=random):
+        return self.items[self.draw_index(rng)]
+
+    def draw_many(self, k: int, rng=random) -> list:
+        """k independent draws (with replacement)."""
+        n = len(self._prob)
+        prob, alias, items = self._prob, self._alias, self.items
+        rand = rng.random
+        out = []
+        for _ in range(k):
+            column = int(rand() * n)
+            out.append(items[column] if rand() < prob[column] else items[alias[column]])
+        return out
+
+
+# ----------------------------
+# Inventory-backed sampler
+# ----------------------------
+
+class InventorySampler:
+    """
+    Alias table over stocked items (key -> weight).
+
+    Only in-stock items with a positive weight are compiled in. When an item
+    sells out, remove(key) drops it and recompiles from the cached weights, so
+    the source inventory never has to be rescanned between draws.
+    """
+
+    __slots__ = ("_weights", "_table")
+
+    def __init__(self, weights: dict):
+        self._weights = {key: w for key, w in weights.items() if w > 0}
+        self._table = AliasTable(self._weights.keys(), self._weights.values())
+
+    @classmethod
+    def from_inventory(cls, inventory: dict, weight_key: str = "chance", stock_key: str = "remaining"):
+        return cls({
+            key: entry.get(weight_key, 0)
+            for key, entry in inventory.items()
+            if entry.get(stock_key, 0) > 0
+        })
+
+    def __contains__(self, key):
+        return key in self._weights
+
+    def __bool__(self):
+        return bool(self._table)
+
+    def remove(self, key):
+        if self._weights.pop(key, None) is not None:
+            self._table = AliasTable(self._weights.keys(), self._weights.values())
+
+    def draw(self, rng=random):
+        if not self._table:
+            return None
+        return self._table.draw(rng)
+
+    def draw_many(self, k: int, rng=random) -> list:
+        """k draws against the current stock; nothing is decremented."""
+        if not self._table:
+            return []
+        return self._table.draw_many(k, rng)
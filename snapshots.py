@@ -0,0 +1,136 @@
+import glob
+import hashlib
+import json
+import os
+import re
+
+# ----------------------------
+# CONFIG
+# ----------------------------
+
+KEEP_GENERATIONS = 5
+SNAPSHOT_SUFFIX = ".snap"
+
+# In-process cache of the last generation written per path.
+_generations = {}
+
+
+# ----------------------------
+# Helpers
+# ----------------------------
+
+def _generation_paths(path: str):
+    """All generation files for `path`, newest first, as (generation, file) pairs."""
+    pattern = re.compile(re.escape(os.path.basename(path)) + r"\.(\d+)" + re.escape(SNAPSHOT_SUFFIX) + "$")
+    found = []
+    for candidate in glob.glob(glob.escape(path) + ".*" + SNAPSHOT_SUFFIX):
+        match = pattern.search(os.path.basename(candidate))
+        if match:
+            found.append((int(match.group(1)), candidate))
+    found.sort(reverse=True)
+    return found
+
+
+def _fsync_dir(directory: str):
+    try:
+        fd = os.open(directory or ".", os.O_RDONLY)
+    except OSError:
+        return  # Not supported on this platform (e.g. Windows).
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+# ----------------------------
+# Write
+# ----------------------------
+
+def write_snapshot(path: str, data, keep: int = KEEP_GENERATIONS) -> int:
+    """
+    Crash-safe snapshot of `data` as a new generation of `path`.
+
+    File layout: one JSON header line {"generation", "sha256", "length"} followed
+    by the payload. The payload goes to a temp file, is fsync'd, then atomically
+    renamed into place, so a generation is either complete or absent.
+    Returns the generation number written.
+    """
+    generation = _generations.get(path)
+    if generation is None:
+        existing = _generation_paths(path)
+        generation = existing[0][0] if existing else 0
+    generation += 1
+
+    payload = json.dumps(data, separators=(",", ":")).encode("utf-8")
+    header = json.dumps({
+        "generation": generation,
+        "sha256": hashlib.sha256(payload).hexdigest(),
+        "length": len(payload),
+    }).encode("utf-8")
+
+    final_path = f"{path}.{generation:06d}{SNAPSHOT_SUFFIX}"
+    tmp_path = final_path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(header + b"\n" + payload)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, final_path)
+    _fsync_dir(os.path.dirname(os.path.abspath(final_path)))
+    _generations[path] = generation
+
+    for _, old in _generation_paths(path)[keep:]:
+        try:
+            os.remove(old)
+        except OSError:
+            pass
+
+    return generation
+
+
+# ----------------------------
+# Read
+# ----------------------------
+
+def _read_generation(file_path: str):
+    with open(file_path, "rb") as f:
+        raw = f.read()
+    header_raw, sep, payload = raw.partition(b"\n")
+    if not sep:
+        raise ValueError("missing header")
+    header = json.loads(header_raw)
+    if len(payload) != header["length"]:
+        raise ValueError(f"truncated ({len(payload)}/{header['length']} bytes)")
+    if hashlib.sha256(payload).hexdigest() != header["sha256"]:
+        raise ValueError("checksum mismatch")
+    return header["generation"], json.loads(payload)
+
+
+def load_snapshot(path: str, default=None):
+    """
+    Return the data from the newest generation of `path` that validates.
+
+    Each candidate is checked in a single pass (length + sha256, then one
+    json.loads). If no generation exists yet, the legacy plain JSON file at
+    `path` is read once so old data migrates on the next write.
+    """
+    candidates = _generation_paths(path)
+    if candidates:
+        # Never reuse a number, even one that belongs to a broken file.
+        _generations[path] = max(_generations.get(path, 0), candidates[0][0])
+
+    for generation, file_path in candidates:
+        try:
+            _, data = _read_generation(file_path)
+        except Exception as e:
+            print(f"[snapshots] Generation {generation} of {path} is invalid ({e}); trying older.")
+            continue
+        return data
+
+    if os.path.exists(path):
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except json.JSONDecodeError as e:
+            print(f"[snapshots] Legacy file {path} is corrupted: {e}")
+
+    return default
@@ -0,0 +1,522 @@
+import asyncio
+import itertools
+import json
+import os
+import sqlite3
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from persistence import scheduler
+from snapshots import load_snapshot
+
+# ----------------------------
+# CONFIG
+# ----------------------------
+
+DB_FILE = "hotbox.db"
+MAX_WRITE_ATTEMPTS = 5  # a staged write that keeps failing is dropped after this many flushes
+
+# Legacy per-cog JSON files, imported once into the database.
+LOOT_JSON = "loot_data.json"
+DEAL_JSON = "deal_data.json"
+CLAIMS_JSON = "milestone_claim_history.json"
+LISTS_JSON = "lists.json"
+AFFECTION_JSON = "luna_affection.json"
+BATTLE_JSON = "battle_data.json"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key   TEXT PRIMARY KEY,
+    value TEXT
+);
+
+-- run.py: lootbox
+CREATE TABLE IF NOT EXISTS loot_cooldowns (
+    user_id   INTEGER PRIMARY KEY,
+    last_open TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS loot_history (
+    id      INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id INTEGER NOT NULL,
+    item    TEXT NOT NULL,
+    value   INTEGER NOT NULL,
+    ts      TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_loot_history_user ON loot_history (user_id, id);
+CREATE TABLE IF NOT EXISTS loot_reminders (
+    user_id  INTEGER PRIMARY KEY,
+    ready_at TEXT NOT NULL
+);
+-- Double or Nothing prompts still waiting on a button press or timeout.
+CREATE TABLE IF NOT EXISTS loot_double_sessions (
+    session_id INTEGER PRIMARY KEY,
+    user_id    INTEGER NOT NULL,
+    item       TEXT NOT NULL,
+    value      INTEGER NOT NULL,
+    opened_at  TEXT NOT NULL,
+    deadline   TEXT NOT NULL,
+    channel_id INTEGER NOT NULL,
+    message_id INTEGER
+);
+
+-- work_index.py: Karuta work completions in the work channel
+CREATE TABLE IF NOT EXISTS work_completions (
+    message_id INTEGER PRIMARY KEY,
+    channel_id INTEGER NOT NULL,
+    user_ids   TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_work_completions_channel ON work_completions (channel_id, message_id);
+CREATE TABLE IF NOT EXISTS work_index_cursor (
+    channel_id      INTEGER PRIMARY KEY,
+    last_message_id INTEGER NOT NULL
+);
+
+-- work_board.py: opt-in live leaderboard messages
+CREATE TABLE IF NOT EXISTS work_live_boards (
+    message_id INTEGER PRIMARY KEY,
+    channel_id INTEGER NOT NULL,
+    days       INTEGER NOT NULL
+);
+
+-- deal.py: mystery box
+CREATE TABLE IF NOT EXISTS deal_prizes (
+    key  TEXT PRIMARY KEY,
+    data TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS deal_winners (
+    id         INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id    INTEGER NOT NULL,
+    prize_key  TEXT NOT NULL,
+    prize_name TEXT,
+    timestamp  TEXT NOT NULL,
+    message_id INTEGER,
+    channel_id INTEGER
+);
+CREATE INDEX IF NOT EXISTS idx_deal_winners_user ON deal_winners (user_id);
+CREATE TABLE IF NOT EXISTS deal_meta (
+    key   TEXT PRIMARY KEY,
+    value TEXT
+);
+
+-- jobboard.py: milestone claims
+CREATE TABLE IF NOT EXISTS milestone_claims (
+    id            INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id       INTEGER NOT NULL,
+    milestone     TEXT NOT NULL,
+    timestamp     TEXT NOT NULL,
+    reward_type   TEXT,
+    reward_amount INTEGER
+);
+CREATE INDEX IF NOT EXISTS idx_milestone_claims_user ON milestone_claims (user_id);
+CREATE TABLE IF NOT EXISTS milestone_tickets (
+    message_id    INTEGER PRIMARY KEY,
+    channel_id    INTEGER NOT NULL,
+    owner_id      INTEGER NOT NULL,
+    milestone     TEXT NOT NULL,
+    reward_type   TEXT,
+    reward_amount INTEGER,
+    confirmed     INTEGER NOT NULL DEFAULT 0
+);
+
+-- ticket_lifecycle.py: ticket channels, open and archived
+CREATE TABLE IF NOT EXISTS ticket_channels (
+    channel_id    INTEGER PRIMARY KEY,
+    guild_id      INTEGER NOT NULL,
+    owner_id      INTEGER NOT NULL,
+    opened_at     TEXT NOT NULL,
+    last_activity TEXT NOT NULL,
+    archived_at   TEXT
+);
+
+-- lists.py
+CREATE TABLE IF NOT EXISTS lists (
+    name TEXT PRIMARY KEY
+);
+CREATE TABLE IF NOT EXISTS list_members (
+    list_name TEXT NOT NULL,
+    user_id   INTEGER NOT NULL,
+    PRIMARY KEY (list_name, user_id)
+);
+CREATE INDEX IF NOT EXISTS idx_list_members_user ON list_members (user_id);
+
+-- daddy.py: Luna affection
+CREATE TABLE IF NOT EXISTS luna_affection (
+    user_id   INTEGER PRIMARY KEY,
+    affection INTEGER NOT NULL
+);
+
+-- datetest.py: Sanrio battle players (one JSON blob per player)
+CREATE TABLE IF NOT EXISTS battle_players (
+    user_id TEXT PRIMARY KEY,
+    data    TEXT NOT NULL
+);
+"""
+
+
+# ----------------------------
+# Database
+# ----------------------------
+
+class Database:
+    """
+    One SQLite connection owned by a single worker thread.
+
+    Writes are write-behind: write()/write_many()/transaction() only stage the
+    statement, and the persistence scheduler flushes everything staged during
+    an interval as one transaction on the database thread. Passing a key
+    coalesces repeated writes to the same row, so only the latest one runs.
+
+    Each staged group runs in its own savepoint: a group that fails is rolled
+    back on its own and put back in the queue for the next flush (unless the
+    same key was staged again since), and the rest still commit.
+
+      - fetchall()/fetchone() are awaitable reads (staged writes land first)
+      - query() is a blocking read for start-up loads (cog __init__, import time)
+    """
+
+    def __init__(self, path: str = DB_FILE):
+        self.path = path
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="hotbox-db")
+        self._conn = None
+        self._pending = {}
+        self._pending_lock = threading.Lock()
+        self._seq = itertools.count()
+        self._failures = {}  # key -> failed flush attempts (database thread only)
+        scheduler.register("sqlite", self._take_pending, self._apply)
+
+    # ------------
+    # Worker-thread side
+    # ------------
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(SCHEMA)
+            conn.commit()
+            import_json_files(conn)
+            self._conn = conn
+        return self._conn
+
+    def _apply_groups(self, groups):
+        """
+        Run staged groups in one transaction, each inside its own savepoint,
+        so a failing group is rolled back alone. Returns the groups that failed.
+        """
+        if not groups:
+            return []
+        conn = self._connection()
+        failed = []
+        conn.execute("BEGIN")
+        try:
+            for key, statements in groups:
+                conn.execute("SAVEPOINT staged")
+                try:
+                    for sql, params in statements:
+                        conn.execute(sql, params)
+                except sqlite3.Error as e:
+                    conn.execute("ROLLBACK TO staged")
+                    print(f"[storage] Staged write {key!r} failed: {e}")
+                    failed.append((key, statements))
+                conn.execute("RELEASE staged")
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+        return failed
+
+    def _flush_pending(self):
+        return self._flush_groups(self._take_pending())
+
+    def _fetchall(self, sql, params=()):
+        self._flush_pending()
+        return [tuple(row) for row in self._connection().execute(sql, params).fetchall()]
+
+    def _fetchone(self, sql, params=()):
+        self._flush_pending()
+        row = self._connection().execute(sql, params).fetchone()
+        return tuple(row) if row is not None else None
+
+    # ------------
+    # Write-behind staging
+    # ------------
+
+    def _stage(self, statements, key=None):
+        with self._pending_lock:
+            if key is None:
+                key = ("seq", next(self._seq))
+            else:
+                # Re-staging moves the row to the back so flush order follows the last write.
+                self._pending.pop(key, None)
+            self._pending[key] = statements
+        scheduler.mark_dirty("sqlite")
+
+    def _take_pending(self):
+        """Everything staged so far as [(key, statements)], oldest first."""
+        with self._pending_lock:
+            pending, self._pending = self._pending, {}
+        return list(pending.items())
+
+    def _restore(self, groups):
+        """
+        Put taken groups back in front of anything staged since. A key that
+        was re-staged in the meantime keeps its newer statements.
+        """
+        if not groups:
+            return
+        with self._pending_lock:
+            restored = {key: statements for key, statements in groups if key not in self._pending}
+            restored.update(self._pending)
+            self._pending = restored
+        scheduler.mark_dirty("sqlite")
+
+    def _apply(self, groups):
+        # Runs on the scheduler's worker; hop onto the database thread and wait.
+        failed = self._executor.submit(self._flush_groups, groups).result()
+        if failed:
+            raise RuntimeError(f"{len(failed)} staged write(s) failed; kept for the next flush")
+
+    def _flush_groups(self, groups):
+        """Apply groups on the database thread; failures go back into _pending for the next flush."""
+        try:
+            failed = self._apply_groups(groups)
+        except BaseException:
+            self._restore(groups)
+            raise
+        retry = []
+        for key, statements in failed:
+            attempts = self._failures.get(key, 0) + 1
+            if attempts >= MAX_WRITE_ATTEMPTS:
+                self._failures.pop(key, None)
+                print(f"[storage] Giving up on staged write {key!r} after {attempts} attempts.")
+            else:
+                self._failures[key] = attempts
+                retry.append((key, statements))
+        failed_keys = {key for key, _ in failed}
+        for key, _ in groups:
+            if key not in failed_keys:
+                self._failures.pop(key, None)
+        self._restore(retry)
+        return retry
+
+    def write(self, sql, params=(), key=None):
+        self._stage([(sql, params)], key)
+
+    def write_many(self, sql, rows, key=None):
+        self._stage([(sql, params) for params in rows], key)
+
+    def transaction(self, statements, key=None):
+        """Several (sql, params) pairs that must land together."""
+        self._stage(list(statements), key)
+
+    # ------------
+    # Reads
+    # ------------
+
+    def query(self, sql, params=()):
+        """Blocking read. Only for start-up loads, never inside a coroutine."""
+        return self._executor.submit(self._fetchall, sql, params).result()
+
+    async def fetchall(self, sql, params=()):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, self._fetchall, sql, params)
+
+    async def fetchone(self, sql, params=()):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, self._fetchone, sql, params)
+
+    # ------------
+    # Shutdown
+    # ------------
+
+    def close(self):
+        """Flush anything still staged, then close the connection."""
+        def _close():
+            failed = self._flush_pending()
+            for key, _ in failed:
+                print(f"[storage] Dropping staged write {key!r} at shutdown.")
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+        self._executor.submit(_close).result()
+        self._executor.shutdown(wait=True)
+
+
+# ----------------------------
+# One-shot JSON importer
+# ----------------------------
+
+def _read_json(path):
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except Exception as e:
+        print(f"[storage] Could not read {path}: {e}")
+        return None
+
+
+def _read_loot(path):
+    """
+    (cooldowns, history) from the old loot snapshot plus the append-only
+    journal(s) written after it. A torn last line is skipped, and records
+    the snapshot already covers (seq <= its seq) are not applied twice.
+    """
+    cooldowns = {}
+    history = {}
+    snapshot_seq = 0
+
+    data = load_snapshot(path)
+    if data is not None:
+        snapshot_seq = data.get("seq", 0)
+        cooldowns.update(data.get("cooldowns", {}))
+        for uid, v_list in data.get("history", {}).items():
+            history[uid] = [list(entry) for entry in v_list]
+
+    # A rotated journal only exists if a compaction was interrupted.
+    for journal in (path + ".journal.old", path + ".journal"):
+        if not os.path.exists(journal):
+            continue
+        with open(journal, "r") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    print(f"[storage] Skipping torn record in {journal}")
+                    continue
+                seq = record.get("seq", 0)
+                if seq and seq <= snapshot_seq:
+                    continue
+                uid = str(record["user_id"])
+                if record.get("op") == "cooldown":
+                    cooldowns[uid] = record["ts"]
+                elif record.get("op") == "loot":
+                    history.setdefault(uid, []).append([record["item"], record["value"], record["ts"]])
+    return cooldowns, history
+
+
+def import_json_files(conn: sqlite3.Connection, force: bool = False):
+    """Copy every legacy JSON file into its table. Runs once per database."""
+    done = conn.execute("SELECT value FROM meta WHERE key = 'json_imported'").fetchone()
+    if done and not force:
+        return
+
+    print("[storage] Importing legacy JSON files...")
+    counts = {}
+
+    with conn:
+        # --- loot (snapshot generations or plain file, plus any journal written since) ---
+        cooldowns, history = _read_loot(LOOT_JSON)
+        if cooldowns or history:
+            conn.executemany(
+                "INSERT OR REPLACE INTO loot_cooldowns (user_id, last_open) VALUES (?, ?)",
+                [(int(uid), ts) for uid, ts in cooldowns.items()],
+            )
+            rows = [
+                (int(uid), item, value, ts)
+                for uid, v_list in history.items()
+                for item, value, ts in v_list
+            ]
+            rows.sort(key=lambda r: r[3])
+            conn.executemany(
+                "INSERT INTO loot_history (user_id, item, value, ts) VALUES (?, ?, ?, ?)", rows
+            )
+            counts["loot_history"] = len(rows)
+
+        # --- deal ---
+        data = _read_json(DEAL_JSON)
+        if data:
+            conn.executemany(
+                "INSERT OR REPLACE INTO deal_prizes (key, data) VALUES (?, ?)",
+                [(k, json.dumps(v)) for k, v in data.get("prizes", {}).items()],
+            )
+            winners = data.get("winners", [])
+            conn.executemany(
+                "INSERT INTO deal_winners (user_id, prize_key, prize_name, timestamp, message_id, channel_id) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                [
+                    (w["user_id"], w["prize_key"], w.get("prize_name"), w["timestamp"],
+                     w.get("message_id"), w.get("channel_id"))
+                    for w in winners
+                ],
+            )
+            conn.executemany(
+                "INSERT OR REPLACE INTO deal_meta (key, value) VALUES (?, ?)",
+                [(k, json.dumps(v)) for k, v in data.get("meta", {}).items()],
+            )
+            counts["deal_winners"] = len(winners)
+
+        # --- milestone claims ---
+        data = _read_json(CLAIMS_JSON)
+        if data:
+            claims = data.get("claims", [])
+            conn.executemany(
+                "INSERT INTO milestone_claims (user_id, milestone, timestamp, reward_type, reward_amount) "
+                "VALUES (?, ?, ?, ?, ?)",
+                [
+                    (c["user_id"], c.get("milestone", ""), c.get("timestamp", ""),
+                     (c.get("reward") or {}).get("type"), (c.get("reward") or {}).get("amount"))
+                    for c in claims
+                ],
+            )
+            counts["milestone_claims"] = len(claims)
+
+        # --- lists ---
+        data = _read_json(LISTS_JSON)
+        if data:
+            conn.executemany("INSERT OR IGNORE INTO lists (name) VALUES (?)", [(n,) for n in data])
+            rows = [(name, uid) for name, uids in data.items() for uid in uids]
+            conn.executemany(
+                "INSERT OR IGNORE INTO list_members (list_name, user_id) VALUES (?, ?)", rows
+            )
+            counts["list_members"] = len(rows)
+
+        # --- luna affection ---
+        data = _read_json(AFFECTION_JSON)
+        if data:
+            conn.executemany(
+                "INSERT OR REPLACE INTO luna_affection (user_id, affection) VALUES (?, ?)",
+                [(int(k), int(v)) for k, v in data.items()],
+            )
+            counts["luna_affection"] = len(data)
+
+        # --- battle players ---
+        data = _read_json(BATTLE_JSON)
+        if data:
+            players = data.get("players", {})
+            conn.executemany(
+                "INSERT OR REPLACE INTO battle_players (user_id, data) VALUES (?, ?)",
+                [(str(uid), json.dumps(p)) for uid, p in players.items()],
+            )
+            counts["battle_players"] = len(players)
+
+        conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('json_imported', '1')")
+
+    print(f"[storage] Import complete: {counts}")
+
+
+# Shared instance used by every cog.
+db = Database()
+
+
+if __name__ == "__main__":
+    # python storage.py            -> create hotbox.db and import JSON once
+    # python storage.py --force    -> wipe tables and re-import from JSON
+    force = "--force" in sys.argv
+    conn = sqlite3.connect(DB_FILE)
+    conn.executescript(SCHEMA)
+    if force:
+        with conn:
+            for table in ("loot_cooldowns", "loot_history", "deal_prizes", "deal_winners",
+                          "deal_meta", "milestone_claims", "lists", "list_members",
+                          "luna_affection", "battle_players"):
+                conn.execute(f"DELETE FROM {table}")
+    import_json_files(conn, force=force)
+    conn.close()
@@ -0,0 +1,77 @@
+import random
+from datetime import datetime, timedelta, timezone
+
+from cooldown_index import CooldownIndex
+
+NOW = datetime(2026, 1, 1, tzinfo=timezone.utc)
+HOUR = 3600
+
+
+def test_pop_due_is_in_ready_order_and_skips_stale_entries():
+    index = CooldownIndex(HOUR)
+    index.load({1: NOW - timedelta(minutes=50), 2: NOW - timedelta(minutes=10)}, now=NOW)
+    index.set(3, NOW - timedelta(minutes=30))
+    index.set(1, NOW)   # opened again: its old entry must not fire
+
+    assert index.pop_due(NOW + timedelta(minutes=55)) == [
+        (3, NOW + timedelta(minutes=30)),
+        (2, NOW + timedelta(minutes=50)),
+    ]
+    assert index.next_due() == NOW + timedelta(hours=1)
+    assert index.ready_at(1) == NOW + timedelta(hours=1)
+
+
+def test_load_splits_expired_from_pending():
+    index = CooldownIndex(HOUR)
+    index.load({1: NOW - timedelta(hours=3), 2: NOW - timedelta(hours=2), 3: NOW}, now=NOW)
+    assert index.eligible_now(5) == [(1, NOW - timedelta(hours=2)), (2, NOW - timedelta(hours=1))]
+    assert index.ready_since(NOW - timedelta(minutes=90)) == [(2, NOW - timedelta(hours=1))]
+    assert index.next_due() == NOW + timedelta(hours=1)
+
+
+def test_upcoming_matches_a_full_sort():
+    rng = random.Random(5)
+    index = CooldownIndex(HOUR)
+    index.load({}, now=NOW)
+    for _ in range(300):
+        index.set(rng.randrange(100), NOW + timedelta(seconds=rng.randrange(-HOUR, HOUR)))
+
+    within = timedelta(minutes=40)
+    live = sorted(
+        (ready_at, user_id)
+        for user_id in range(100)
+        if (ready_at := index._ready_at.get(user_id)) is not None and ready_at <= NOW + within
+    )
+    keep = lambda user_id: user_id % 3
+    expected = [(u, r) for r, u in live if keep(u)][:10]
+    assert index.upcoming(within, 10, now=NOW, keep=keep) == expected
+
+
+def test_discarded_users_leave_every_query_until_restored():
+    index = CooldownIndex(HOUR)
+    index.load({1: NOW - timedelta(hours=2), 2: NOW - timedelta(minutes=30), 3: NOW - timedelta(minutes=20)}, now=NOW)
+    index.discard(1)   # already eligible
+    index.discard(2)   # still cooling down
+
+    assert index.eligible_now(5) == []
+    assert index.upcoming(timedelta(hours=1), 5, now=NOW) == [(3, NOW + timedelta(minutes=40))]
+    assert index.pop_due(NOW + timedelta(hours=1)) == [(3, NOW + timedelta(minutes=40))]
+    assert index._heap == []  # the parked entry was pruned, not pushed back
+    assert index.ready_at(2) == NOW + timedelta(minutes=30)  # !open still sees the cooldown
+
+    index.restore(2, now=NOW)
+    index.restore(1, now=NOW)
+    assert index.upcoming(timedelta(hours=1), 5, now=NOW) == [(2, NOW + timedelta(minutes=30))]
+    assert index.eligible_now(5) == [(1, NOW - timedelta(hours=1)), (3, NOW + timedelta(minutes=40))]
+    assert index.ready_since(NOW) == [(3, NOW + timedelta(minutes=40))]
+
+
+def test_restore_does_not_list_a_user_twice():
+    index = CooldownIndex(HOUR)
+    index.load({}, now=NOW)
+    index.set(1, NOW)
+    index.discard(1)
+    index.restore(1, now=NOW)  # the stale entry has the same ready_at as the new one
+    assert index.upcoming(timedelta(hours=2), 5, now=NOW) == [(1, NOW + timedelta(hours=1))]
+    assert index.pop_due(NOW + timedelta(hours=2)) == [(1, NOW + timedelta(hours=1))]
+    assert index.next_due() is None
@@ -0,0 +1,38 @@
+from types import SimpleNamespace
+
+from embed_rules import Classifier, WorkCompletionRule, WORK_PHRASE
+
+
+def completion(description):
+    return SimpleNamespace(title=None, description=description)
+
+
+def bot_message(*embeds):
+    return SimpleNamespace(author=SimpleNamespace(bot=True, id=1),
+                           flags=SimpleNamespace(forwarded=False), embeds=list(embeds))
+
+
+def test_credits_every_matching_embed():
+    message = bot_message(
+        completion(f"**{WORK_PHRASE}**\n<@11> <@12>"),
+        completion("Some other Karuta embed <@99>"),
+        completion(f"_{WORK_PHRASE}_\n@carol"),
+    )
+    names = {"carol": 13}
+    assert WorkCompletionRule().match(message, names.get) == (11, 12, 13)
+
+
+def test_non_matching_message_is_not_a_completion():
+    assert WorkCompletionRule().match(bot_message(completion("card dropped <@5>")), None) is None
+
+
+def test_completion_with_nobody_resolvable_is_still_a_completion():
+    message = bot_message(completion(f"{WORK_PHRASE}\n@ghost"))
+    assert WorkCompletionRule().match(message, lambda name: None) == ()
+
+
+def test_classifier_counts_one_hit_per_message():
+    message = bot_message(completion(f"{WORK_PHRASE} <@1>"), completion(f"{WORK_PHRASE} <@2>"))
+    classifier = Classifier([WorkCompletionRule()])
+    assert list(classifier.run([message])) == [("work_completion", message, (1, 2))]
+    assert classifier.counts == {"work_completion": 1}
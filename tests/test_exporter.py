@@ -0,0 +1,64 @@
+import asyncio
+import io
+import os
+import subprocess
+import sys
+
+from exporter import CSV_ROW_THRESHOLD, ExportService, GENERAL, LEFT, Sheet, TEXT, render_xlsx
+
+
+def test_xlsx_keeps_ids_as_text():
+    from openpyxl import load_workbook
+
+    sheet = Sheet("Leaderboard", ["User", "User ID", "Times"], [("ann", 123456789012345678, 4)],
+                  formats=(GENERAL, TEXT, LEFT))
+    ws = load_workbook(io.BytesIO(render_xlsx([sheet])))["Leaderboard"]
+    assert [c.value for c in ws[1]] == ["User", "User ID", "Times"]
+    assert [c.value for c in ws[2]] == ["ann", "123456789012345678", 4]
+
+
+def test_large_exports_become_csv_in_a_spawned_worker():
+    service = ExportService()
+    sheet = Sheet("Big", ["n"], [(i,) for i in range(CSV_ROW_THRESHOLD + 1)])
+    try:
+        file = asyncio.run(service.file([sheet], "big"))
+        assert service._pool._mp_context.get_start_method() == "spawn"
+    finally:
+        service.shutdown()
+    assert file.filename == "big.csv"
+    assert ExportService.label(file) == "CSV"
+    assert file.fp.read().decode("utf-8-sig").splitlines()[:2] == ["n", "0"]
+
+
+def test_small_exports_stay_excel():
+    sheet = Sheet("Small", ["n"], [(1,)])
+    assert ExportService.pick_format([sheet]) == "xlsx"
+
+
+ENTRY_POINT = """
+import asyncio
+import sys
+
+sys.path.insert(0, {repo!r})
+with open({marker!r}, "a") as f:  # stands in for run.py's bot setup and database loads
+    f.write(__name__ + "\\n")
+
+from exporter import ExportService, Sheet
+
+if __name__ == "__main__":
+    service = ExportService()
+    file = asyncio.run(service.file([Sheet("s", ["n"], [(1,)])], "out"))
+    service.shutdown()
+    print(file.filename)
+"""
+
+
+def test_workers_do_not_rerun_the_entry_point(tmp_path):
+    marker = tmp_path / "imports.txt"
+    script = tmp_path / "entry.py"
+    script.write_text(ENTRY_POINT.format(repo=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                         marker=str(marker)))
+    result = subprocess.run([sys.executable, str(script)], capture_output=True, text=True, timeout=120)
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip() == "out.xlsx"
+    assert marker.read_text().split() == ["__main__"]
@@ -0,0 +1,54 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+import discord
+
+from history_scan import HistoryScanner, history_bucket
+from outbound import TokenBucket
+
+NOW = datetime(2026, 3, 1, tzinfo=timezone.utc)
+
+
+class FakeChannel:
+    def __init__(self, message_ids):
+        self.message_ids = sorted(message_ids)
+        self.requests = 0
+
+    async def history(self, limit=None, after=None, before=None, oldest_first=True):
+        self.requests += 1
+        for message_id in self.message_ids:
+            if after.id < message_id < before.id:
+                await asyncio.sleep(0)
+                yield SimpleNamespace(id=message_id)
+
+
+def test_every_message_in_range_arrives_once():
+    start = NOW - timedelta(days=3)
+    ids = [discord.utils.time_snowflake(start + timedelta(minutes=7 * n), high=False) for n in range(600)]
+    outside = discord.utils.time_snowflake(start - timedelta(seconds=1))
+    channel = FakeChannel(ids + [outside])
+
+    async def run():
+        scanner = HistoryScanner(channel, after=start, before=NOW, concurrency=3, bucket=TokenBucket(1000, 1000))
+        seen = [message.id async for message in scanner]
+        return scanner, seen
+
+    scanner, seen = asyncio.run(run())
+    assert sorted(seen) == [i for i in ids if i < scanner.end]
+    assert channel.requests == len(scanner._windows) == 12
+    assert scanner.progress == 1.0
+    assert scanner.covered_until == scanner.end - 1
+
+
+def test_scanners_share_one_request_bucket():
+    after = datetime.now(timezone.utc) - timedelta(days=1)
+    first = HistoryScanner(object(), after=after)
+    second = HistoryScanner(object(), after=after)
+    assert first._bucket is second._bucket is history_bucket
+
+
+def test_bucket_can_be_passed_in():
+    bucket = TokenBucket(1.0, 1)
+    scanner = HistoryScanner(object(), after=datetime.now(timezone.utc) - timedelta(days=1), bucket=bucket)
+    assert scanner._bucket is bucket
@@ -0,0 +1,148 @@
+import asyncio
+import sys
+
+import discord
+import pytest
+from discord.ext import commands
+
+from hotreload import reload_with_state
+
+
+@pytest.fixture
+def run_bot(tmp_path, monkeypatch):
+    """Run `scenario(bot)` against a bot that never connects, with the database in tmp_path."""
+    monkeypatch.chdir(tmp_path)
+
+    def run(scenario):
+        async def main():
+            from persistence import scheduler
+            bot = commands.Bot(command_prefix="!", intents=discord.Intents.none())
+            async with bot:  # initialised, never logged in
+                try:
+                    await scenario(bot)
+                finally:
+                    for name in list(bot.extensions):
+                        await bot.unload_extension(name)
+                    await scheduler.shutdown()
+        asyncio.run(main())
+
+    return run
+
+
+def test_lists_reload_keeps_lists_and_moves_the_page_version_on(run_bot):
+    async def scenario(bot):
+        await bot.load_extension("lists")
+        cog = bot.get_cog("ListManager")
+        cog.lists["raffle"] = [1, 2]
+        version = cog.version
+
+        _, handed = await reload_with_state(bot, "lists")
+        new = bot.get_cog("ListManager")
+        assert handed
+        assert new is not cog
+        assert new.lists == {**new.lists, "raffle": [1, 2]}
+        assert new.version > version  # pages cached before the reload are unreachable
+
+    run_bot(scenario)
+
+
+def test_extensions_without_hooks_reload_cold(run_bot):
+    async def scenario(bot):
+        await bot.load_extension("member_index")
+        old_module = sys.modules["member_index"]
+        _, handed = await reload_with_state(bot, "member_index")
+        assert not handed
+        assert sys.modules["member_index"] is not old_module
+
+    run_bot(scenario)
+
+
+def test_work_index_reload_runs_new_code_on_the_same_index(run_bot):
+    async def scenario(bot):
+        await bot.load_extension("work_index")
+        old_module = sys.modules["work_index"]
+        old = old_module.work_index
+        message_id = discord.utils.time_snowflake(discord.utils.utcnow())
+        old.add(message_id, (7, 8))
+        old.window(30)
+
+        _, handed = await reload_with_state(bot, "work_index")
+        new = sys.modules["work_index"].work_index
+        assert handed
+        assert sys.modules["work_index"] is not old_module
+        assert new is old  # run.py and work_board hold this object
+        assert type(new) is sys.modules["work_index"].WorkIndex
+        assert len(new) == 1
+        assert dict(new.window(30).totals) == {7: 1, 8: 1}
+        assert type(new.window(30).rollup) is sys.modules["work_index"].WorkRollup
+
+        new.add(message_id + 1, (7,))
+        assert new.window(30).top(1) == [(7, 2)]
+
+    run_bot(scenario)
+
+
+def test_ticket_manager_reload_hands_tickets_to_jobboard(run_bot):
+    async def scenario(bot):
+        await bot.load_extension("ticket_lifecycle")
+        await bot.load_extension("jobboard")
+        lifecycle = sys.modules["ticket_lifecycle"]
+        old = lifecycle.ticket_manager
+        old.tickets[5] = lifecycle.TicketChannel(5, 1, 42, lifecycle._now())
+        old.open_ids.add(5)
+
+        await reload_with_state(bot, "ticket_lifecycle")
+        reloaded = sys.modules["ticket_lifecycle"]
+        new = reloaded.ticket_manager
+        # jobboard imported the manager by name: it must still be the live one, running the new code.
+        assert new is old is sys.modules["jobboard"].ticket_manager
+        assert type(new) is reloaded.TicketManager
+        assert new.open_count == 1
+        assert len(new.listeners) == 1
+        # open() must keep raising the exception class jobboard catches.
+        assert reloaded.TicketLimitReached is sys.modules["jobboard"].TicketLimitReached
+
+    run_bot(scenario)
+
+
+def test_jobboard_reload_keeps_one_listener_on_the_live_store(run_bot):
+    async def scenario(bot):
+        await bot.load_extension("ticket_lifecycle")
+        await bot.load_extension("jobboard")
+        manager = sys.modules["ticket_lifecycle"].ticket_manager
+
+        jobboard = sys.modules["jobboard"]
+        store = jobboard.ticket_store
+        store.tickets[100] = jobboard.TicketState(100, 9, 42, "1200 Effort")
+
+        for _ in range(3):
+            await reload_with_state(bot, "jobboard")
+        jobboard = sys.modules["jobboard"]
+        assert jobboard.ticket_store is store  # handed over
+        assert len(manager.listeners) == 1
+
+        manager.open_ids.add(9)
+        manager._notify(9)  # ticket channel 9 closed
+        assert 100 not in jobboard.ticket_store.tickets
+
+    run_bot(scenario)
+
+
+def test_deal_loads_and_reload_keeps_cycle_state(run_bot):
+    async def scenario(bot):
+        await bot.load_extension("deal")
+        cog = bot.get_cog("DealOrNoDeal")
+        assert cog._available_prizes()
+        key, prize = cog._pick_random_prize()
+        assert cog.prizes[key] is prize
+        cog.sent_today = 3
+        lock = cog.active_lock
+
+        _, handed = await reload_with_state(bot, "deal")
+        new = bot.get_cog("DealOrNoDeal")
+        assert handed
+        assert new is not cog
+        assert new.sent_today == 3
+        assert new.active_lock is lock  # a box on screen still holds the same lock
+
+    run_bot(scenario)
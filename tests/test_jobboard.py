@@ -0,0 +1,41 @@
+import importlib
+
+import pytest
+
+
+@pytest.fixture
+def jobboard(tmp_path, monkeypatch):
+    # jobboard loads the claim history from the database on import; keep that out of the repo.
+    monkeypatch.chdir(tmp_path)
+    return importlib.import_module("jobboard")
+
+
+def claim(user_id, milestone, timestamp):
+    return {"user_id": user_id, "milestone": milestone, "timestamp": timestamp,
+            "reward": {"type": "tickets", "amount": 1}}
+
+
+def test_claims_stay_in_timestamp_order_per_user(jobboard):
+    index = jobboard.ClaimIndex([
+        claim(1, "600 Effort", "2026-01-03T00:00:00+00:00"),
+        claim(2, "600 Effort", "2026-01-01T00:00:00+00:00"),
+    ])
+    index.add(claim(1, "300 Effort", "2026-01-01T00:00:00+00:00"))  # arrives late, sorts first
+    index.add(claim(1, "1200 Effort", "2026-01-05T00:00:00+00:00"))
+
+    assert [c["milestone"] for c in index.for_user(1)] == ["300 Effort", "600 Effort", "1200 Effort"]
+    assert index.claimed(1) == {"300 Effort", "600 Effort", "1200 Effort"}
+    assert index.claimed(2) == {"600 Effort"}
+    assert len(index) == 4
+
+
+def test_remove_user_drops_their_claims_only(jobboard):
+    index = jobboard.ClaimIndex([
+        claim(1, "300 Effort", "2026-01-01T00:00:00+00:00"),
+        claim(1, "600 Effort", "2026-01-02T00:00:00+00:00"),
+        claim(2, "300 Effort", "2026-01-01T00:00:00+00:00"),
+    ])
+    assert index.remove_user(1) == 2
+    assert index.remove_user(1) == 0
+    assert index.for_user(1) == [] and index.claimed(1) == set()
+    assert len(index) == 1 and index.claimed(2) == {"300 Effort"}
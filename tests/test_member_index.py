@@ -0,0 +1,34 @@
+from types import SimpleNamespace
+
+from member_index import MemberIndex
+
+
+def member(guild, member_id, name, display=None):
+    return SimpleNamespace(id=member_id, name=name, display_name=display or name, guild=guild)
+
+
+def test_generation_follows_joins_leaves_and_renames():
+    guild = SimpleNamespace(id=1, members=[])
+    alice = member(guild, 10, "alice")
+    guild.members.append(alice)
+    index = MemberIndex()
+    index.for_guild(guild)
+    assert index.generation(1) == 0
+
+    index.upsert(alice)                          # nothing about the names changed
+    assert index.generation(1) == 0
+    index.upsert(member(guild, 10, "alice", "Ally"))
+    assert index.generation(1) == 1
+    index.upsert(member(guild, 11, "bob"))       # join
+    assert index.generation(1) == 2
+    index.remove(1, 11)
+    assert index.generation(1) == 3
+    assert index.generation(2) == 0
+
+
+def test_unbuilt_guilds_still_count_changes():
+    guild = SimpleNamespace(id=5, members=[])
+    index = MemberIndex()
+    index.upsert(member(guild, 1, "carol"))
+    index.remove(5, 1)
+    assert index.generation(5) == 2
@@ -0,0 +1,73 @@
+import asyncio
+from types import SimpleNamespace
+
+import discord
+import pytest
+
+import outbound
+from outbound import EditQueue, PRIORITY_COSMETIC, PRIORITY_FINAL, PRIORITY_NORMAL
+
+
+class FakeMessage:
+    def __init__(self, message_id=1, channel_id=10, error=None):
+        self.id = message_id
+        self.channel = SimpleNamespace(id=channel_id)
+        self.error = error
+        self.edits = []
+
+    async def edit(self, **kwargs):
+        self.edits.append(kwargs)
+        if self.error is not None:
+            raise self.error
+        return self
+
+
+def attachment(tmp_path, name):
+    path = tmp_path / name
+    path.write_bytes(b"x")
+    return discord.File(str(path))
+
+
+def test_queued_edits_merge_field_by_field(tmp_path):
+    async def run():
+        queue = EditQueue()
+        message = FakeMessage()
+        old, new = attachment(tmp_path, "old.png"), attachment(tmp_path, "new.png")
+        first = queue.edit(message, content="frame 1", file=old)
+        embed = discord.Embed(title="final")
+        second = queue.edit(message, embed=embed, file=new, priority=PRIORITY_NORMAL)
+        assert await asyncio.gather(first, second) == [message, message]
+
+        assert message.edits == [{"content": "frame 1", "embed": embed, "file": new}]
+        assert old.fp.closed and not new.fp.closed
+        assert queue.metrics["merged"] == 1 and queue.metrics["sent"] == 1
+        new.close()
+
+    asyncio.run(run())
+
+
+def test_stale_cosmetic_frames_are_dropped_and_closed(tmp_path, monkeypatch):
+    monkeypatch.setattr(outbound, "MAX_COSMETIC_AGE", -1.0)
+
+    async def run():
+        queue = EditQueue()
+        message = FakeMessage()
+        frame = attachment(tmp_path, "frame.png")
+        assert await queue.edit(message, file=frame, priority=PRIORITY_COSMETIC) is None
+        assert message.edits == []
+        assert frame.fp.closed
+        assert queue.metrics["dropped"] == 1
+
+    asyncio.run(run())
+
+
+def test_only_final_edits_raise():
+    async def run():
+        queue = EditQueue()
+        error = RuntimeError("gone")
+        assert await queue.edit(FakeMessage(1, error=error), content="x", priority=PRIORITY_NORMAL) is None
+        with pytest.raises(RuntimeError):
+            await queue.edit(FakeMessage(2, error=error), content="x", priority=PRIORITY_FINAL)
+        assert queue.metrics["failed"] == 2
+
+    asyncio.run(run())
@@ -0,0 +1,50 @@
+import asyncio
+
+import discord
+
+from paginator import CursorPaginator, PageCache
+
+
+def pager(rows, state, cache, fetches):
+    def fetch(start, count):
+        fetches.append(start)
+        return rows[start:start + count]
+
+    return CursorPaginator(
+        namespace=("test",),
+        count=lambda: len(rows),
+        fetch=fetch,
+        render=lambda page_rows, page, total: discord.Embed(description=",".join(page_rows)),
+        version=lambda: state["version"],
+        per_page=2,
+        cache=cache,
+    )
+
+
+def test_pages_are_cached_per_version():
+    async def run():
+        rows = ["a", "b", "c", "d", "e"]
+        state = {"version": 0}
+        cache, fetches = PageCache(), []
+        view = pager(rows, state, cache, fetches)
+
+        assert view.total_pages() == 3
+        assert view.page_embed(2).description == "e"
+        assert view.page_embed(2).description == "e"
+        assert fetches == [4]
+
+        rows[4] = "E"
+        state["version"] += 1  # the store changed: the old page is unreachable
+        assert view.page_embed(2).description == "E"
+        assert fetches == [4, 4]
+
+    asyncio.run(run())
+
+
+def test_page_cache_evicts_least_recently_used():
+    cache = PageCache(maxsize=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    cache.get("a")
+    cache.put("c", 3)
+    assert cache.get("b") is None and cache.get("a") == 1 and cache.get("c") == 3
@@ -0,0 +1,47 @@
+import random
+
+import pytest
+
+from sampler import AliasTable, InventorySampler
+
+
+def test_draws_follow_the_weights():
+    weights = {"common": 70, "rare": 25, "legendary": 5, "never": 0}
+    table = AliasTable(weights.keys(), weights.values())
+    draws = 200_000
+    counts = dict.fromkeys(weights, 0)
+    for item in table.draw_many(draws, random.Random(7)):
+        counts[item] += 1
+
+    assert counts["never"] == 0
+    total = sum(weights.values())
+    for item, weight in weights.items():
+        expected = weight / total
+        # Well inside 5 standard deviations for this many draws.
+        sigma = (expected * (1 - expected) / draws) ** 0.5
+        assert abs(counts[item] / draws - expected) <= 5 * sigma + 1e-9
+
+
+def test_single_and_many_draws_agree():
+    table = AliasTable("abc", [1, 2, 3])
+    assert [table.draw(random.Random(3)) for _ in range(1)] == table.draw_many(1, random.Random(3))
+
+
+def test_empty_and_mismatched_tables():
+    assert not AliasTable([], [])
+    assert not AliasTable(["a"], [0])
+    with pytest.raises(ValueError):
+        AliasTable(["a", "b"], [1])
+
+
+def test_inventory_sampler_skips_sold_out_items():
+    inventory = {
+        "a": {"chance": 1, "remaining": 1},
+        "b": {"chance": 1, "remaining": 0},
+        "c": {"chance": 0, "remaining": 5},
+    }
+    sampler = InventorySampler.from_inventory(inventory)
+    rng = random.Random(1)
+    assert set(sampler.draw_many(100, rng)) == {"a"}
+    sampler.remove("a")
+    assert not sampler and sampler.draw(rng) is None and sampler.draw_many(3, rng) == []
@@ -0,0 +1,42 @@
+import json
+
+from snapshots import _generation_paths, load_snapshot, write_snapshot
+
+
+def test_newest_valid_generation_wins(tmp_path):
+    path = str(tmp_path / "data.json")
+    write_snapshot(path, {"n": 1})
+    write_snapshot(path, {"n": 2})
+    assert load_snapshot(path) == {"n": 2}
+
+
+def test_corrupt_and_truncated_generations_fall_back(tmp_path):
+    path = str(tmp_path / "data.json")
+    for n in range(1, 4):
+        write_snapshot(path, {"n": n})
+    (newest, newest_file), (_, middle_file), _ = _generation_paths(path)
+
+    raw = open(newest_file, "rb").read()
+    with open(newest_file, "wb") as f:
+        f.write(raw.replace(b'"n":3', b'"n":9'))       # same length, bad checksum
+    with open(middle_file, "rb+") as f:
+        f.truncate(len(f.read()) - 2)                  # torn write
+    assert load_snapshot(path) == {"n": 1}
+
+    # The broken number is never reused.
+    assert write_snapshot(path, {"n": 4}) == newest + 1
+    assert load_snapshot(path) == {"n": 4}
+
+
+def test_old_generations_are_pruned(tmp_path):
+    path = str(tmp_path / "data.json")
+    for n in range(6):
+        write_snapshot(path, {"n": n}, keep=3)
+    assert [g for g, _ in _generation_paths(path)] == [6, 5, 4]
+
+
+def test_legacy_plain_file_is_read_until_the_first_generation(tmp_path):
+    path = tmp_path / "data.json"
+    path.write_text(json.dumps({"legacy": True}))
+    assert load_snapshot(str(path)) == {"legacy": True}
+    assert load_snapshot(str(tmp_path / "missing.json"), default={}) == {}
@@ -0,0 +1,118 @@
+import asyncio
+
+import pytest
+
+from persistence import PersistenceScheduler
+from storage import Database
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    # The first connection imports legacy JSON from the working directory; keep it empty.
+    monkeypatch.chdir(tmp_path)
+    database = Database(str(tmp_path / "test.db"))
+    yield database
+    database.close()
+
+
+def flush(database):
+    """One scheduler flush: snapshot on the caller, write on the worker."""
+    database._apply(database._take_pending())
+
+
+def test_keyed_writes_coalesce(db):
+    for n in range(5):
+        db.write("INSERT OR REPLACE INTO meta (key, value) VALUES ('k', ?)", (str(n),), key=("meta", "k"))
+    assert len(db._pending) == 1
+    flush(db)
+    assert db.query("SELECT value FROM meta WHERE key = 'k'") == [("4",)]
+
+
+def test_failed_flush_is_retried(db):
+    db.write("INSERT INTO later (n) VALUES (?)", (1,))
+    db.write("INSERT INTO meta (key, value) VALUES ('a', '1')")
+
+    with pytest.raises(RuntimeError):
+        flush(db)
+    # The good group committed, the bad one is waiting for the next flush.
+    assert db.query("SELECT value FROM meta WHERE key = 'a'") == [("1",)]
+    assert len(db._pending) == 1
+
+    db._executor.submit(lambda: db._connection().execute("CREATE TABLE later (n INTEGER)")).result()
+    flush(db)
+    assert db.query("SELECT n FROM later") == [(1,)]
+    assert db._pending == {}
+
+
+def test_one_bad_group_does_not_roll_back_others(db):
+    db.transaction([
+        ("INSERT INTO meta (key, value) VALUES ('x', '1')", ()),
+        ("INSERT INTO missing (n) VALUES (1)", ()),
+    ], key=("bad",))
+    db.write("INSERT INTO meta (key, value) VALUES ('y', '2')", key=("good",))
+
+    with pytest.raises(RuntimeError):
+        flush(db)
+    # The bad group is rolled back as a whole; the good one lands.
+    assert db.query("SELECT key FROM meta WHERE key IN ('x', 'y') ORDER BY key") == [("y",)]
+
+
+def test_restore_keeps_newer_keyed_write(db):
+    sql = "INSERT OR REPLACE INTO meta (key, value) VALUES ('k', ?)"
+    db.write(sql, ("old",), key=("meta", "k"))
+    taken = db._take_pending()
+    db.write(sql, ("new",), key=("meta", "k"))
+    db._restore(taken)  # as if the flush holding "old" had failed
+    flush(db)
+    assert db.query("SELECT value FROM meta WHERE key = 'k'") == [("new",)]
+
+
+def test_persistently_failing_write_is_dropped(db, monkeypatch):
+    monkeypatch.setattr("storage.MAX_WRITE_ATTEMPTS", 2)
+    db.write("INSERT INTO missing (n) VALUES (1)", key=("bad",))
+    with pytest.raises(RuntimeError):
+        flush(db)
+    flush(db)  # second failure gives up instead of raising
+    assert db._pending == {}
+
+
+def test_reads_see_staged_writes(db):
+    db.write("INSERT INTO meta (key, value) VALUES ('r', '1')")
+    assert db.query("SELECT value FROM meta WHERE key = 'r'") == [("1",)]
+
+
+def test_scheduler_writes_each_dirty_target_once():
+    scheduler = PersistenceScheduler(interval=3600)
+    state = {"n": 0}
+    written = []
+    scheduler.register("counter", lambda: state["n"], written.append)
+
+    async def burst():
+        for n in range(1, 6):
+            state["n"] = n
+            scheduler.mark_dirty("counter")
+        await scheduler.shutdown()  # cancels the loop, then one final flush
+
+    asyncio.run(burst())
+    assert written == [5]
+
+
+def test_legacy_loot_journal_is_imported(tmp_path, monkeypatch):
+    from snapshots import write_snapshot
+
+    monkeypatch.chdir(tmp_path)
+    write_snapshot("loot_data.json", {"seq": 2, "cooldowns": {"1": "t1"}, "history": {"1": [["gem", 5, "t1"]]}})
+    with open("loot_data.json.journal", "w") as f:
+        f.write('{"op":"loot","user_id":1,"item":"gem","value":5,"ts":"t1","seq":2}\n')   # already in the snapshot
+        f.write('{"op":"loot","user_id":2,"item":"coin","value":1,"ts":"t2","seq":3}\n')
+        f.write('{"op":"cooldown","user_id":2,"ts":"t2","seq":4}\n')
+        f.write('{"op":"loot","user_id":2,"item":"tor')                                      # torn tail
+
+    database = Database(str(tmp_path / "test.db"))
+    try:
+        assert database.query("SELECT user_id, item, value FROM loot_history ORDER BY ts") == [
+            (1, "gem", 5), (2, "coin", 1),
+        ]
+        assert sorted(database.query("SELECT user_id, last_open FROM loot_cooldowns")) == [(1, "t1"), (2, "t2")]
+    finally:
+        database.close()
@@ -0,0 +1,106 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+import ticket_lifecycle
+from ticket_lifecycle import TicketLimitReached, TicketManager
+
+
+class FakeDB:
+    def __init__(self):
+        self.writes = []
+
+    def write(self, sql, params=(), key=None):
+        self.writes.append((sql, params, key))
+
+
+@pytest.fixture(autouse=True)
+def fake_db(monkeypatch, tmp_path):
+    monkeypatch.setattr(ticket_lifecycle, "TRANSCRIPT_DIR", str(tmp_path / "transcripts"))
+    db = FakeDB()
+    monkeypatch.setattr(ticket_lifecycle, "db", db)
+    return db
+
+
+def fake_guild():
+    ids = iter(range(1000, 2000))
+
+    async def create_text_channel(name, category=None, overwrites=None):
+        return SimpleNamespace(id=next(ids), name=name)
+
+    return SimpleNamespace(id=1, create_text_channel=create_text_channel)
+
+
+def archivable(channel):
+    """Give a fake channel what close() touches: history, overwrites, edit and a guild."""
+    archive = SimpleNamespace(id=99, name=ticket_lifecycle.ARCHIVE_CATEGORY_NAME, channels=[])
+
+    async def history(limit=None, oldest_first=False):
+        return
+        yield
+
+    async def edit(**kwargs):
+        channel.category = kwargs["category"]
+
+    channel.history = history
+    channel.overwrites = {}
+    channel.edit = edit
+    channel.guild = SimpleNamespace(id=1, name="guild", categories=[archive],
+                                    get_channel=lambda cid: archive if cid == 99 else None)
+    return channel
+
+
+def test_close_archives_with_a_transcript_and_notifies(tmp_path):
+    async def scenario():
+        manager = TicketManager()
+        manager._bucket = ticket_lifecycle.TokenBucket(1000, 1000)
+        channel = await manager.open(fake_guild(), SimpleNamespace(id=7), "t7")
+        closed = []
+        manager.listeners.append(closed.append)
+
+        await manager.close(archivable(channel), owner_id=7)
+        await manager.close(channel)  # second close is a no-op
+        assert channel.category.name == ticket_lifecycle.ARCHIVE_CATEGORY_NAME
+        assert closed == [channel.id]
+        assert manager.open_count == 0
+        assert len(list((tmp_path / "transcripts").iterdir())) == 1
+
+    asyncio.run(scenario())
+
+
+def test_open_count_follows_open_close_and_forget():
+    async def scenario():
+        manager = TicketManager()
+        manager._bucket = ticket_lifecycle.TokenBucket(1000, 1000)
+        guild = fake_guild()
+        channels = [await manager.open(guild, SimpleNamespace(id=n), f"t{n}") for n in range(3)]
+        assert manager.open_count == 3
+
+        closed = []
+        manager.listeners.append(closed.append)
+        await manager.close(archivable(channels[0]))
+        await manager.close(archivable(channels[0]))  # second close is a no-op
+        assert manager.open_count == 2
+        manager.forget(channels[0].id)   # archived channel deleted: already notified
+        manager.forget(channels[1].id)   # deleted while still open
+        assert manager.open_count == 1
+        assert closed == [channels[0].id, channels[1].id]
+
+    asyncio.run(scenario())
+
+
+def test_open_refuses_past_limit(monkeypatch):
+    monkeypatch.setattr(ticket_lifecycle, "MAX_OPEN_TICKETS", 2)
+
+    async def scenario():
+        manager = TicketManager()
+        manager._bucket = ticket_lifecycle.TokenBucket(1000, 1000)
+        guild = fake_guild()
+        await manager.open(guild, SimpleNamespace(id=1), "a")
+        await manager.open(guild, SimpleNamespace(id=2), "b")
+        with pytest.raises(TicketLimitReached):
+            await manager.open(guild, SimpleNamespace(id=3), "c")
+        assert manager.open_count == 2
+
+    asyncio.run(scenario())
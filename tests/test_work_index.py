@@ -0,0 +1,235 @@
+import asyncio
+import random
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+import discord
+import pytest
+
+import work_index as wi
+from outbound import TokenBucket
+
+
+class FakeDB:
+    def write(self, sql, params=(), key=None):
+        pass
+
+
+@pytest.fixture(autouse=True)
+def fake_db(monkeypatch):
+    monkeypatch.setattr(wi, "db", FakeDB())
+    # Fake channels answer instantly; don't wait on the real request rate.
+    monkeypatch.setattr("history_scan.history_bucket", TokenBucket(1000, 1000))
+
+
+PHRASE = "Your workers have finished their tasks"
+
+
+def work_message(message_id, *user_ids, text=PHRASE):
+    mentions = " ".join(f"<@{uid}>" for uid in user_ids)
+    return SimpleNamespace(
+        id=message_id,
+        author=SimpleNamespace(bot=True),
+        embeds=[SimpleNamespace(title=None, description=f"**{text}**\n{mentions}")],
+        guild=None,
+    )
+
+
+class FakeChannel:
+    """history() over a fixed list of messages, honouring after/before like discord.py."""
+
+    def __init__(self, messages):
+        self.id = wi.WORK_CHANNEL_ID
+        self.messages = sorted(messages, key=lambda m: m.id)
+
+    @staticmethod
+    def _bound(value, default):
+        if value is None:
+            return default
+        if isinstance(value, datetime):
+            return discord.utils.time_snowflake(value, high=False)
+        return value.id
+
+    async def history(self, limit=None, after=None, before=None, oldest_first=True):
+        lo = self._bound(after, -1)
+        hi = self._bound(before, 1 << 63)
+        for message in self.messages:
+            if lo < message.id < hi:
+                yield message
+
+
+def now_snowflake(seconds_ago=0):
+    return discord.utils.time_snowflake(datetime.now(timezone.utc) - timedelta(seconds=seconds_ago), high=False)
+
+
+def test_parse_completion_credits_mentions():
+    assert wi.parse_completion(work_message(1, 5, 6)) == (5, 6)
+    other = work_message(2, 5, text="a card was dropped")
+    assert wi.parse_completion(other) is None
+
+
+def test_cursor_waits_for_the_backfill():
+    async def run():
+        index = wi.WorkIndex()
+        missed = [work_message(now_snowflake(300 - n), 1) for n in range(3)]
+        live = work_message(now_snowflake(10), 2)
+
+        index.observe(live)  # arrives before the backfill ran
+        assert index.cursor is None
+
+        await index.backfill(FakeChannel(missed + [live]))
+        assert len(index) == 4
+        assert index.cursor >= live.id
+
+        later = work_message(now_snowflake(), 3)
+        index.observe(later)
+        assert index.cursor == later.id
+
+    asyncio.run(run())
+
+
+def test_rollup_top_k_tracks_adds():
+    rollup = wi.WorkRollup(1, k=3)
+    rollup.move_to(0, {}, {})
+    for user_ids in [(1,), (2,), (3,), (4,), (4,), (5,), (5,), (5,), (1,)]:
+        rollup.add(user_ids)
+    assert rollup.top(3) == [(5, 3), (1, 2), (4, 2)]
+    assert rollup.completions == 9
+
+
+def test_rollup_moving_day_by_day_matches_a_fresh_sum():
+    rng = random.Random(2)
+    buckets, day_completions = {}, {}
+    for day in range(120):
+        buckets[day] = Counter({rng.randint(1, 30): rng.randint(1, 3) for _ in range(rng.randint(0, 6))})
+        day_completions[day] = rng.randint(0, 6)
+
+    rollup = wi.WorkRollup(7, k=5)
+    for end_day in list(range(10, 60)) + [100, 101]:  # daily moves, then a jump past the window
+        rollup.move_to(end_day, buckets, day_completions)
+        days = range(end_day - 6, end_day + 1)
+        expected = sum((buckets[d] for d in days), Counter())
+        assert rollup.totals == expected
+        assert rollup.completions == sum(day_completions[d] for d in days)
+        ranked = sorted(expected.items(), key=lambda kv: (-kv[1], kv[0]))
+        assert rollup.top(5) == ranked[:5]
+
+
+START = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+
+def snowflake(when: datetime, salt: int = 0) -> int:
+    return discord.utils.time_snowflake(when, high=False) + salt
+
+
+def build(rng, until: datetime, count=3000, users=40):
+    """Random completions between START and `until` (the index never holds future messages)."""
+    index = wi.WorkIndex()
+    entries = []
+    span = int((until - START).total_seconds())
+    for n in range(count):
+        when = START + timedelta(seconds=rng.randrange(span))
+        user_ids = tuple(rng.sample(range(1, users + 1), rng.randint(1, 3)))
+        message_id = snowflake(when, n % 4096)
+        if message_id in index._seen:
+            continue
+        index.add(message_id, user_ids)
+        entries.append((message_id, user_ids))
+    return index, entries
+
+
+def brute(entries, days, now):
+    cutoff = snowflake(now - timedelta(days=days))
+    end = snowflake(now) + (1 << 22)  # everything up to the end of `now`'s millisecond
+    totals = Counter()
+    completions = 0
+    for message_id, user_ids in entries:
+        if cutoff <= message_id < end:
+            completions += 1
+            totals.update(user_ids)
+    ranked = sorted(totals.items(), key=lambda kv: (-kv[1], kv[0]))
+    return completions, totals, ranked
+
+
+@pytest.mark.parametrize("days", [1, 7, 30, 90])
+def test_window_matches_rolling_brute_force(days):
+    rng = random.Random(days)
+    now = START + timedelta(days=100, hours=13, minutes=7)
+    index, entries = build(rng, now)
+    window = index.window(days, now=now)
+    completions, totals, ranked = brute(entries, days, now)
+    assert window.completions == completions
+    assert +window.totals == totals
+    assert window.ranked() == ranked
+    assert window.top(10) == ranked[:10]
+
+
+def test_just_after_midnight_counts_a_full_day():
+    rng = random.Random(7)
+    now = START + timedelta(days=100, minutes=2)
+    index, entries = build(rng, now)
+    window = index.window(1, now=now)
+    completions, _, ranked = brute(entries, 1, now)
+    # About one day's worth of completions, not the two minutes since midnight.
+    assert completions > 10
+    assert window.completions == completions
+    assert window.top(10) == ranked[:10]
+
+
+def test_rollover_and_new_completions_stay_exact():
+    rng = random.Random(3)
+    now = START + timedelta(days=59, hours=20)
+    index, entries = build(rng, now)
+    index.window(7, now=now)  # builds the rollup for this day
+
+    for step in range(1, 60):
+        now += timedelta(hours=1, minutes=17)
+        for _ in range(rng.randint(0, 4)):
+            message_id = snowflake(now - timedelta(seconds=rng.randrange(3600)), rng.randrange(4096))
+            if message_id not in index._seen:
+                user_ids = (rng.randint(1, 40),)
+                index.add(message_id, user_ids)
+                entries.append((message_id, user_ids))
+        window = index.window(7, now=now)
+        completions, totals, ranked = brute(entries, 7, now)
+        assert window.completions == completions, step
+        assert window.top(10) == ranked[:10], step
+
+
+def test_top_with_filter_falls_back_when_kept_members_left():
+    rng = random.Random(11)
+    now = START + timedelta(days=100, hours=6)
+    index, entries = build(rng, now, users=200)
+    left = set(range(1, 150))  # most of the guild has left
+    keep = lambda user_id: user_id not in left
+    _, _, ranked = brute(entries, 30, now)
+    expected = [(u, c) for u, c in ranked if keep(u)][:10]
+    assert index.window(30, now=now).top(10, keep) == expected
+
+
+def test_reconnect_backfills_the_gap_before_moving_the_cursor(monkeypatch):
+    async def run():
+        index = wi.WorkIndex()
+        monkeypatch.setattr(wi, "work_index", index)
+        channel = FakeChannel([work_message(now_snowflake(600), 1)])
+        cog = wi.WorkIndexCog(SimpleNamespace(get_channel=lambda channel_id: channel))
+
+        await cog.on_ready()
+        caught_up = index.cursor
+
+        await cog.on_disconnect()
+        await asyncio.sleep(0.01)
+        gap = work_message(now_snowflake(), 2)    # posted while disconnected
+        await asyncio.sleep(0.01)
+        live = work_message(now_snowflake(), 3)   # arrives right after the new IDENTIFY
+        channel.messages += [gap, live]
+        index.observe(live)
+        assert index.cursor == caught_up  # held: the gap is still unread
+
+        await asyncio.sleep(0.01)
+        await cog.on_ready()
+        assert len(index) == 3
+        assert index.cursor >= live.id
+
+    asyncio.run(run())
@@ -9,12 +9,14 @@ import datetime
 import os
 from dotenv import load_dotenv
 import asyncio
+from persistence import scheduler
+from snapshots import load_snapshot, write_snapshot
+from history_scan import HistoryScanner, progress_bar
+from embed_rules import Classifier, ForwardedRule, WorkCompletionRule, snapshot_username_resolver
 import sys
 import re
 import traceback
-import openpyxl
-from io import BytesIO
-from openpyxl.styles import numbers, Alignment
+from exporter import exporter, Sheet, GENERAL, TEXT, LEFT
 
 # -------------------------------
 # LOAD ENVIRONMENT VARIABLES
@@ -72,63 +74,41 @@ user_cooldowns = {}  # user_id: datetime (UTC aware)
 user_loot_history = {}  # user_id: list of (item, value, timestamp)
 
 def load_data():
+    """Load the newest snapshot generation that passes its checksum."""
     global user_cooldowns, user_loot_history
-    if os.path.exists(DATA_FILE):
-        try:
-            with open(DATA_FILE, "r") as f:
-                raw_data = f.read()
-                data = json.loads(raw_data)
-                
-            user_cooldowns = {
-                int(k): datetime.datetime.fromisoformat(v).astimezone(datetime.timezone.utc)
-                for k, v in data.get("cooldowns", {}).items()
-            }
-            user_loot_history = {
-                int(k): [
-                    (i, v, datetime.datetime.fromisoformat(t).astimezone(datetime.timezone.utc))
-                    for i, v, t in v_list
-                ]
-                for k, v_list in data.get("history", {}).items()
-            }
-
-        except json.JSONDecodeError as e:
-            print(f"[WARNING] loot_data.json is corrupted: {e}. Attempting partial recovery...")
-            try:
-                recovered_data = None
-                for line in raw_data.splitlines():
-                    try:
-                        recovered_data = json.loads(line)
-                        break
-                    except:
-                        continue
-                if recovered_data:
-                    user_cooldowns = {
-                        int(k): datetime.datetime.fromisoformat(v).astimezone(datetime.timezone.utc)
-                        for k, v in recovered_data.get("cooldowns", {}).items()
-                    }
-                    user_loot_history = {
-                        int(k): [
-                            (i, v, datetime.datetime.fromisoformat(t).astimezone(datetime.timezone.utc))
-                            for i, v, t in v_list
-                        ]
-                        for k, v_list in recovered_data.get("history", {}).items()
-                    }
-                    print("[INFO] Successfully recovered partial data.")
-                else:
-                    print("[ERROR] Could not recover any data. Please fix loot_data.json manually.")
-            except Exception as ex:
-                print(f"[ERROR] Failed to recover data: {ex}")
+    data = load_snapshot(DATA_FILE)
+    if data is None:
+        return
 
-def save_data():
-    data = {
+    user_cooldowns = {
+        int(k): datetime.datetime.fromisoformat(v).astimezone(datetime.timezone.utc)
+        for k, v in data.get("cooldowns", {}).items()
+    }
+    user_loot_history = {
+        int(k): [
+            (i, v, datetime.datetime.fromisoformat(t).astimezone(datetime.timezone.utc))
+            for i, v, t in v_list
+        ]
+        for k, v_list in data.get("history", {}).items()
+    }
+
+def build_snapshot():
+    return {
         "cooldowns": {str(k): v.isoformat() for k, v in user_cooldowns.items()},
         "history": {
             str(k): [(i, v, t.isoformat()) for i, v, t in v_list]
             for k, v_list in user_loot_history.items()
         },
     }
-    with open(DATA_FILE, "w") as f:
-        json.dump(data, f, indent=4)
+
+def write_data(data):
+    write_snapshot(DATA_FILE, data)
+
+def save_data():
+    """Queue a write-behind save; the scheduler coalesces bursts into one flush."""
+    scheduler.mark_dirty(DATA_FILE)
+
+scheduler.register(DATA_FILE, build_snapshot, write_data)
 
 load_data()
 
@@ -535,54 +515,143 @@ async def prize_command(ctx):
 # -----------------------------
 # Count event points for electaura/draculauara by counting only forwarded messages and checking their those role id
 # -----------------------------
+EVENT_CHANNEL_ID = 1424139439126614167
+TEAM_DRACULAURA = 1423871865541234732
+TEAM_ELECTRAURA = 1423864199943028788
+EVENT_POINTS_FILE = "event_points.json"
+
+# Checked in order: someone holding both roles counts for Draculaura, as before.
+TEAM_ROLES = {TEAM_DRACULAURA: "drac", TEAM_ELECTRAURA: "elect"}
+
+
+class TeamRoster:
+    """
+    member id -> team, built once from a bulk guild chunk and then kept
+    current by member events, so a tally never has to fetch a member.
+    """
+
+    def __init__(self, team_roles: dict):
+        self.team_roles = team_roles
+        self._teams = {}
+        self._ready = set()  # guild ids already loaded
+
+    def update(self, member: discord.Member):
+        role_ids = {role.id for role in member.roles}
+        for role_id, team in self.team_roles.items():
+            if role_id in role_ids:
+                self._teams[member.id] = team
+                return
+        self._teams.pop(member.id, None)
 
-@bot.command(name="eventpoints")
-async def event_points(ctx):
-    """Count how many forwarded messages each team posted in the #event-points channel."""
-    try:
+    def remove(self, member_id: int):
+        self._teams.pop(member_id, None)
+
+    async def ensure(self, guild: discord.Guild):
+        if guild.id in self._ready:
+            return
+        if not guild.chunked:
+            await guild.chunk()
+        for member in guild.members:
+            self.update(member)
+        self._ready.add(guild.id)
+
+    def team(self, member_id: int):
+        return self._teams.get(member_id)
+
+
+team_roster = TeamRoster(TEAM_ROLES)
+
+
+@bot.listen("on_member_update")
+async def roster_member_update(before: discord.Member, after: discord.Member):
+    if before.roles != after.roles:
+        team_roster.update(after)
+
+
+@bot.listen("on_member_join")
+async def roster_member_join(member: discord.Member):
+    team_roster.update(member)
+
+
+@bot.listen("on_raw_member_remove")
+async def roster_member_remove(payload: discord.RawMemberRemoveEvent):
+    team_roster.remove(payload.user.id)
+
+
+# Running tallies; each !eventpoints only scans what was posted after last_message_id.
+event_tallies = {"last_message_id": None, "drac": 0, "elect": 0, "forwarded": 0, "total": 0}
+event_points_lock = asyncio.Lock()
 
-        EVENT_CHANNEL_ID = 1424139439126614167
-        TEAM_DRACULAURA = 1423871865541234732
-        TEAM_ELECTRAURA = 1423864199943028788
+def load_event_tallies():
+    data = load_snapshot(EVENT_POINTS_FILE)
+    if data:
+        event_tallies.update(data)
 
+def write_event_tallies(data):
+    write_snapshot(EVENT_POINTS_FILE, data)
+
+scheduler.register(EVENT_POINTS_FILE, lambda: dict(event_tallies), write_event_tallies)
+
+load_event_tallies()
+
+
+@bot.command(name="eventpoints")
+async def event_points(ctx, mode: str = None):
+    """Count how many forwarded messages each team posted in the #event-points channel. `!eventpoints full` recounts."""
+    try:
         channel = ctx.guild.get_channel(EVENT_CHANNEL_ID)
         if channel is None:
             return await ctx.send("❌ Could not find the event-points channel.")
 
-        drac_count = 0
-        elect_count = 0
-        total_messages = 0
-        forwarded_messages = 0
+        async with event_points_lock:
+            if mode == "full":
+                event_tallies.update(last_message_id=None, drac=0, elect=0, forwarded=0, total=0)
+
+            loading_msg = await ctx.send("🔍 Scanning **forwarded** messages in #event-points... please wait!")
+            await team_roster.ensure(ctx.guild)
 
-        loading_msg = await ctx.send("🔍 Scanning **forwarded** messages in #event-points... please wait!")
+            if event_tallies["last_message_id"] is not None:
+                after = event_tallies["last_message_id"] + 1
+            else:
+                after = channel.created_at
 
-        async for message in channel.history(limit=None):
-            total_messages += 1
+            counts = {"drac": 0, "elect": 0}
+            total_messages = 0
+            forwarded_messages = 0
 
-            if not getattr(message.flags, "forwarded", False):
-                continue
-            forwarded_messages += 1
+            # Read in parallel time windows; order doesn't matter for a tally.
+            classifier = Classifier([ForwardedRule()])
+            scanner = HistoryScanner(channel, after=after)
+            async for message in scanner:
+                total_messages += 1
 
-            member = message.author
-            if not isinstance(member, discord.Member):
-                try:
-                    member = await ctx.guild.fetch_member(member.id)
-                except:
+                if classifier.classify(message) is None:
                     continue
+                forwarded_messages += 1
 
-            if discord.utils.get(member.roles, id=TEAM_DRACULAURA):
-                drac_count += 1
-            elif discord.utils.get(member.roles, id=TEAM_ELECTRAURA):
-                elect_count += 1
+                team = team_roster.team(message.author.id)
+                if team is not None:
+                    counts[team] += 1
+
+            # Only committed once the whole range is read, so a failed scan is simply retried.
+            event_tallies["drac"] += counts["drac"]
+            event_tallies["elect"] += counts["elect"]
+            event_tallies["forwarded"] += forwarded_messages
+            event_tallies["total"] += total_messages
+            event_tallies["last_message_id"] = scanner.covered_until
+            scheduler.mark_dirty(EVENT_POINTS_FILE)
 
         embed = discord.Embed(
             title="🎯 Event Points Summary",
             description=f"Counted only **forwarded** messages in {channel.mention}",
             color=0xFFC5D3
         )
-        embed.add_field(name="🩷 Team Draculaura", value=f"{drac_count:,} forwarded messages", inline=False)
-        embed.add_field(name="⚡ Team Electraura", value=f"{elect_count:,} forwarded messages", inline=False)
-        embed.set_footer(text=f"Forwarded messages checked: {forwarded_messages:,} (out of {total_messages:,} total)")
+        embed.add_field(name="🩷 Team Draculaura", value=f"{event_tallies['drac']:,} forwarded messages", inline=False)
+        embed.add_field(name="⚡ Team Electraura", value=f"{event_tallies['elect']:,} forwarded messages", inline=False)
+        embed.set_footer(
+            text=f"Forwarded messages checked: {event_tallies['forwarded']:,} (out of {event_tallies['total']:,} total) "
+                 f"• {total_messages:,} new since last run"
+        )
 
         await loading_msg.edit(content=None, embed=embed)
 
@@ -595,17 +664,6 @@ async def event_points(ctx):
 # ------------------------------- 
 #Work mechanic 
 #  ------------------------------- 
-MENTION_REGEX = r"<@!?(\d+)>"
-USERNAME_REGEX = r"@(\w+)"
-
-def strip_markdown(text):
-    if not text:
-        return "" 
-    text = re.sub(r"[*_~>|]", "", text) 
-    text = text.replace("", "")
-    text = text.replace("\n", "").strip()
-    return text
-
 class LeaderboardView(View):
     def __init__(self, leaderboard_data: list[tuple]):
         """
@@ -621,44 +679,27 @@ class LeaderboardView(View):
             return await interaction.response.send_message(
                 "❌ You are not allowed to download this file.", ephemeral=True
             )
+        # Acknowledge first: building the file can outlast the 3 second interaction window.
+        await interaction.response.defer(ephemeral=True, thinking=True)
         try:
-            wb = openpyxl.Workbook()
-            ws = wb.active
-            ws.title = "Leaderboard"
-
-            # Add headers
-            ws.append(["Discord User", "User ID", "Times Worked", "Add Command"])
-
-            for username, user_id, times in self.leaderboard_data:
-
-                command = f"/add name: <@{user_id}> tickets: {times}"
-                ws.append([username, str(user_id), times, command])
-
-
-            for row in ws.iter_rows(min_row=2, min_col=2, max_col=2):
-                for cell in row:
-                    cell.number_format = numbers.FORMAT_TEXT
-                    cell.alignment = Alignment(horizontal="left")
-
-
-            for col in [3, 4, 5]:
-                for row in ws.iter_rows(min_row=2, min_col=col, max_col=col):
-                    for cell in row:
-                        cell.alignment = Alignment(horizontal="left")
-
-
-            buffer = BytesIO()
-            wb.save(buffer)
-            buffer.seek(0)
-
-            file = discord.File(fp=buffer, filename="work_leaderboard.xlsx")
-            await interaction.response.send_message(
-                "✅ Excel file with RaffleBot commands generated!", file=file, ephemeral=True
+            rows = [
+                (username, user_id, times, f"/add name: <@{user_id}> tickets: {times}")
+                for username, user_id, times in self.leaderboard_data
+            ]
+            sheet = Sheet(
+                "Leaderboard",
+                ["Discord User", "User ID", "Times Worked", "Add Command"],
+                rows,
+                formats=(GENERAL, TEXT, LEFT, TEXT),
+            )
+            file = await exporter.file([sheet], "work_leaderboard")
+            await interaction.followup.send(
+                f"✅ {exporter.label(file)} file with RaffleBot commands generated!", file=file, ephemeral=True
             )
 
         except Exception as e:
             print("Excel generation failed:", e)
-            await interaction.response.send_message(
+            await interaction.followup.send(
                 "❌ Failed to generate Excel file.", ephemeral=True
             )
 
@@ -684,62 +725,40 @@ async def worked_command(ctx, days: int = 30):
     since = datetime.datetime.now(datetime.timezone.utc) - datetime.timedelta(days=days)
     user_counts = {}
     total_scanned = 0
-    total_matched = 0
+    matched_messages = 0
     progress_bar_length = 20
     heartbeat_interval = 50  # edit progress every 50 messages
 
     progress_embed = discord.Embed(
         title="🏗️ Scanning Messages...",
-        description=f"⏳ Scanning messages from the past {days} days...\nScanned: 0\nMatches: 0",
+        description=f"⏳ Scanning messages from the past {days} days...\nScanned: 0\nCompletion messages: 0",
         color=discord.Color.orange(),
     )
     progress_msg = await ctx.send(embed=progress_embed)
 
     scanned_since_last_update = 0
 
-    async for message in channel.history(limit=None, oldest_first=False):
-        # Skip messages outside timeframe
-        if message.created_at < since:
-            break
-
+    # Name map built once per scan instead of a members walk per username.
+    classifier = Classifier([WorkCompletionRule(TARGET_PHRASE)], resolve=snapshot_username_resolver(ctx.guild))
+    scanner = HistoryScanner(channel, after=since)
+    async for message in scanner:
         total_scanned += 1
         scanned_since_last_update += 1
 
-        # Skip messages without embeds
-        if not message.embeds:
-            continue
-
-        # Only count embeds from bots
-        if message.author.bot:
-            for e in message.embeds:
-                desc = strip_markdown(e.description.lower() if e.description else "")
-                if TARGET_PHRASE.lower() in desc:
-                    total_matched += 1
-                    original_desc = e.description or ""
-
-                    mentions = re.findall(MENTION_REGEX, original_desc)
-                    if mentions:
-                        for user_id in mentions:
-                            uid = int(user_id)
-                            user_counts[uid] = user_counts.get(uid, 0) + 1
-                    else:
-                        usernames = re.findall(USERNAME_REGEX, original_desc)
-                        for username in usernames:
-                            member = discord.utils.find(
-                                lambda m: m.name.lower() == username.lower(), ctx.guild.members
-                            )
-                            if member:
-                                user_counts[member.id] = user_counts.get(member.id, 0) + 1
+        hit = classifier.classify(message)
+        if hit is not None:
+            matched_messages += 1
+            for uid in hit[1]:
+                user_counts[uid] = user_counts.get(uid, 0) + 1
 
         # Heartbeat batch update
         if scanned_since_last_update >= heartbeat_interval:
             scanned_since_last_update = 0
-            filled = min(progress_bar_length, (total_scanned % 1000) // 50)
-            bar = "#" * filled + "-" * (progress_bar_length - filled)
+            bar = progress_bar(scanner.progress, progress_bar_length)
             progress_embed.description = (
                 f"⏳ Scanning messages...\n"
-                f"**Progress:** [{bar}] Scanned: {total_scanned} messages\n"
-                f"**Matches:** {total_matched}"
+                f"**Progress:** [{bar}] {scanner.progress:.0%} of {days} days, scanned: {total_scanned} messages\n"
+                f"**Completion messages:** {matched_messages}"
             )
             await progress_msg.edit(embed=progress_embed)
 
@@ -748,11 +767,11 @@ async def worked_command(ctx, days: int = 30):
     bar = "#" * filled
     progress_embed.description = (
         f"✅ Scan complete!\nScanned {total_scanned} messages.\n"
-        f"Found {total_matched} successful completions."
+        f"Found {matched_messages} completion messages."
     )
     await progress_msg.edit(embed=progress_embed)
 
-    if not total_matched:
+    if not matched_messages:
         embed = discord.Embed(
             title="📭 No Work Completions Found",
             description=f"Scanned **{total_scanned}** messages in the past {days} days.\nNo matches found.",
@@ -778,7 +797,7 @@ async def worked_command(ctx, days: int = 30):
         title=f"🏆 Work Leaderboard (Past {days} Days)",
         description=(
             f"✅ Scan complete!\nScanned **{total_scanned}** messages.\n"
-            f"Found **{total_matched}** successful completions.\n\n{preview_text}"
+            f"Found **{matched_messages}** completion messages.\n\n{preview_text}"
         ),
         color=discord.Color.green(),
     )
@@ -835,6 +854,7 @@ async def inspect_karuta(ctx):
 # RUN BOT
 # -------------------------------
 async def main():
+    scheduler.start()
     try:
         async with bot:
 
@@ -844,6 +864,7 @@ async def main():
             await bot.start(TOKEN)
     finally:
         await notify_offline()
+        await scheduler.shutdown()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,366 @@
+import asyncio
+import os
+import time
+import traceback
+from datetime import datetime, timedelta, timezone
+
+import discord
+from discord.ext import commands, tasks
+
+from outbound import TokenBucket
+from storage import db
+
+# ----------------------------
+# CONFIG
+# ----------------------------
+
+CREATE_CONCURRENCY = 2       # channel creations in flight at once
+CREATE_RATE = 0.2            # channel creations per second across the bot
+CREATE_BURST = 3
+MAX_OPEN_TICKETS = 150       # refuse new tickets past this many open ones
+
+IDLE_TTL = timedelta(hours=72)          # open tickets with no messages for this long are closed
+ARCHIVE_RETENTION = timedelta(hours=24) # archived tickets are deleted after this long
+SWEEP_MINUTES = 10
+
+ARCHIVE_CATEGORY_NAME = "ticket-archive"
+CATEGORY_LIMIT = 50          # Discord's channels-per-category limit
+TRANSCRIPT_DIR = "transcripts"
+TRANSCRIPT_LIMIT = 2000      # messages kept per transcript
+
+TICKET_MANAGERS = {296181275344109568, 1370076515429253264}
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+# ----------------------------
+# Records
+# ----------------------------
+
+class TicketChannel:
+    __slots__ = ("channel_id", "guild_id", "owner_id", "opened_at", "last_activity", "archived_at")
+
+    def __init__(self, channel_id: int, guild_id: int, owner_id: int, opened_at: datetime,
+                 last_activity: datetime | None = None, archived_at: datetime | None = None):
+        self.channel_id = channel_id
+        self.guild_id = guild_id
+        self.owner_id = owner_id
+        self.opened_at = opened_at
+        self.last_activity = last_activity or opened_at
+        self.archived_at = archived_at
+
+
+class TicketLimitReached(Exception):
+    pass
+
+
+# ----------------------------
+# Manager
+# ----------------------------
+
+class TicketManager:
+    """
+    Owns every ticket channel from creation to deletion.
+
+      open    creations queue on a semaphore and a token bucket, so a burst
+              of claims is spread out instead of tripping Discord's
+              channel-creation limits; past MAX_OPEN_TICKETS it refuses
+      touch   called per message, moves the idle deadline
+      close   writes a text transcript, locks the channel and moves it into
+              the guild's archive category (found or created once, then
+              reused)
+      sweep   closes tickets idle past IDLE_TTL and deletes archived ones
+              after ARCHIVE_RETENTION
+
+    State is mirrored to ticket_channels so the sweep survives restarts.
+    Listeners are called with the channel id whenever a ticket closes.
+    """
+
+    def __init__(self):
+        self.tickets = {}          # channel id -> TicketChannel
+        self.open_ids = set()      # channel ids of tickets not yet archived
+        self.listeners = []        # callables(channel_id)
+        self._archive_ids = {}     # guild id -> archive category id
+        self._create_slots = asyncio.Semaphore(CREATE_CONCURRENCY)
+        self._bucket = TokenBucket(CREATE_RATE, CREATE_BURST)
+        self.waiting = 0
+
+    def load(self):
+        rows = db.query(
+            "SELECT channel_id, guild_id, owner_id, opened_at, last_activity, archived_at FROM ticket_channels"
+        )
+        self.tickets = {
+            channel_id: TicketChannel(
+                channel_id, guild_id, owner_id,
+                datetime.fromisoformat(opened_at),
+                datetime.fromisoformat(last_activity),
+                datetime.fromisoformat(archived_at) if archived_at else None,
+            )
+            for channel_id, guild_id, owner_id, opened_at, last_activity, archived_at in rows
+        }
+        self.open_ids = {cid for cid, t in self.tickets.items() if t.archived_at is None}
+        print(f"[Tickets] Loaded {self.open_count} open and {len(self.tickets) - self.open_count} archived tickets.")
+
+    @property
+    def open_count(self) -> int:
+        return len(self.open_ids)
+
+    def _save(self, ticket: TicketChannel):
+        db.write(
+            "INSERT OR REPLACE INTO ticket_channels "
+            "(channel_id, guild_id, owner_id, opened_at, last_activity, archived_at) VALUES (?, ?, ?, ?, ?, ?)",
+            (ticket.channel_id, ticket.guild_id, ticket.owner_id, ticket.opened_at.isoformat(),
+             ticket.last_activity.isoformat(), ticket.archived_at.isoformat() if ticket.archived_at else None),
+            key=("ticket_channels", ticket.channel_id),
+        )
+
+    def forget(self, channel_id: int):
+        ticket = self.tickets.pop(channel_id, None)
+        if ticket is None:
+            return
+        db.write(
+            "DELETE FROM ticket_channels WHERE channel_id = ?",
+            (channel_id,),
+            key=("ticket_channels", channel_id),
+        )
+        if channel_id in self.open_ids:
+            self.open_ids.discard(channel_id)
+            self._notify(channel_id)
+
+    def _notify(self, channel_id: int):
+        for listener in self.listeners:
+            try:
+                listener(channel_id)
+            except Exception:
+                traceback.print_exc()
+
+    # ------------
+    # Open
+    # ------------
+
+    async def _take_token(self):
+        while True:
+            now = time.monotonic()
+            wait = self._bucket.wait_time(now)
+            if wait <= 0:
+                self._bucket.take(now)
+                return
+            await asyncio.sleep(wait)
+
+    async def open(self, guild: discord.Guild, owner: discord.abc.User, name: str, *,
+                   category=None, overwrites=None) -> discord.TextChannel:
+        """Create a ticket channel once a creation slot and a rate token are free."""
+        if self.open_count + self.waiting >= MAX_OPEN_TICKETS:
+            raise TicketLimitReached()
+        self.waiting += 1
+        try:
+            async with self._create_slots:
+                await self._take_token()
+                channel = await guild.create_text_channel(name=name, category=category, overwrites=overwrites or {})
+        finally:
+            self.waiting -= 1
+        ticket = TicketChannel(channel.id, guild.id, owner.id, _now())
+        self.tickets[channel.id] = ticket
+        self.open_ids.add(channel.id)
+        self._save(ticket)
+        return channel
+
+    def touch(self, channel_id: int):
+        ticket = self.tickets.get(channel_id)
+        if ticket is None or ticket.archived_at is not None:
+            return
+        ticket.last_activity = _now()
+        self._save(ticket)
+
+    # ------------
+    # Close
+    # ------------
+
+    async def _archive_category(self, guild: discord.Guild) -> discord.CategoryChannel:
+        category = guild.get_channel(self._archive_ids.get(guild.id, 0))
+        if category is None:
+            category = discord.utils.get(guild.categories, name=ARCHIVE_CATEGORY_NAME)
+        if category is None:
+            category = await guild.create_category(
+                ARCHIVE_CATEGORY_NAME,
+                overwrites={guild.default_role: discord.PermissionOverwrite(view_channel=False)},
+            )
+            print(f"[Tickets] Created archive category in {guild.name}.")
+        self._archive_ids[guild.id] = category.id
+        return category
+
+    async def write_transcript(self, channel: discord.TextChannel) -> str:
+        """One line per message, oldest first: time, author, text, attachment and embed counts."""
+        lines = [f"# {channel.name} ({channel.id}) closed {_now():%Y-%m-%d %H:%M:%S} UTC"]
+        async for message in channel.history(limit=TRANSCRIPT_LIMIT, oldest_first=True):
+            text = message.clean_content.replace("\n", " / ")
+            extras = []
+            if message.attachments:
+                extras.append(f"{len(message.attachments)} attachment(s): "
+                              + " ".join(a.url for a in message.attachments))
+            if message.embeds:
+                extras.append(f"{len(message.embeds)} embed(s)")
+            if extras:
+                text = f"{text} [{'; '.join(extras)}]".strip()
+            lines.append(f"[{message.created_at:%Y-%m-%d %H:%M}] {message.author}: {text}")
+
+        path = os.path.join(TRANSCRIPT_DIR, f"{channel.name}-{channel.id}.txt")
+        data = "\n".join(lines) + "\n"
+
+        def _write():
+            os.makedirs(TRANSCRIPT_DIR, exist_ok=True)
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(data)
+
+        await asyncio.to_thread(_write)
+        return path
+
+    async def close(self, channel: discord.TextChannel, *, owner_id: int = 0, reason: str = "closed"):
+        """Transcript, then lock the channel and move it into the archive category."""
+        ticket = self.tickets.get(channel.id)
+        if ticket is None:
+            # Opened before the manager tracked it; adopt it so it is archived the same way.
+            ticket = self.tickets[channel.id] = TicketChannel(channel.id, channel.guild.id, owner_id,
+                                                              channel.created_at)
+        if ticket.archived_at is not None:
+            return
+        ticket.archived_at = _now()  # claimed before any await, so a double close is a no-op
+        self.open_ids.discard(channel.id)
+        self._save(ticket)
+        self._notify(channel.id)
+
+        try:
+            path = await self.write_transcript(channel)
+            print(f"[Tickets] {channel.name} {reason}; transcript at {path}.")
+        except Exception:
+            traceback.print_exc()
+
+        guild = channel.guild
+        try:
+            archive = await self._archive_category(guild)
+            if len(archive.channels) >= CATEGORY_LIMIT:
+                await self._delete_oldest_archived(guild, archive)
+            # Same viewers as before (owner and staff roles), but members can no longer post.
+            overwrites = dict(channel.overwrites)
+            for target, overwrite in overwrites.items():
+                if isinstance(target, discord.Member):
+                    overwrite.update(send_messages=False)
+            await channel.edit(category=archive, overwrites=overwrites, reason=f"Ticket {reason}")
+        except discord.HTTPException:
+            # No room or no permission to archive: the transcript is written, so delete instead.
+            traceback.print_exc()
+            await self._delete(channel)
+
+    async def _delete(self, channel: discord.abc.GuildChannel):
+        try:
+            await channel.delete(reason="Ticket archive expired")
+        except discord.NotFound:
+            pass
+        self.forget(channel.id)
+
+    async def _delete_oldest_archived(self, guild: discord.Guild, archive: discord.CategoryChannel):
+        archived = [
+            t for t in self.tickets.values()
+            if t.archived_at is not None and t.guild_id == guild.id
+        ]
+        if not archived:
+            return
+        oldest = min(archived, key=lambda t: t.archived_at)
+        channel = guild.get_channel(oldest.channel_id)
+        if channel is None:
+            self.forget(oldest.channel_id)
+        else:
+            await self._delete(channel)
+
+    # ------------
+    # Sweep
+    # ------------
+
+    async def sweep(self, bot: commands.Bot):
+        now = _now()
+        for ticket in list(self.tickets.values()):
+            channel = bot.get_channel(ticket.channel_id)
+            if channel is None:
+                if bot.get_guild(ticket.guild_id) is not None:
+                    self.forget(ticket.channel_id)  # deleted while we were offline
+                continue
+            try:
+                if ticket.archived_at is None and now - ticket.last_activity > IDLE_TTL:
+                    await channel.send("⏳ This ticket has been idle too long and is now closed.")
+                    await self.close(channel, reason="closed for inactivity")
+                elif ticket.archived_at is not None and now - ticket.archived_at > ARCHIVE_RETENTION:
+                    await self._delete(channel)
+            except Exception:
+                traceback.print_exc()
+
+
+# Shared instance used by every cog.
+ticket_manager = TicketManager()
+
+
+# ----------------------------
+# Cog
+# ----------------------------
+
+class TicketLifecycleCog(commands.Cog):
+    def __init__(self, bot: commands.Bot):
+        self.bot = bot
+        self.sweep_loop.start()
+
+    def cog_unload(self):
+        self.sweep_loop.cancel()
+
+    @tasks.loop(minutes=SWEEP_MINUTES)
+    async def sweep_loop(self):
+        await ticket_manager.sweep(self.bot)
+
+    @sweep_loop.before_loop
+    async def before_sweep_loop(self):
+        await self.bot.wait_until_ready()
+
+    @commands.Cog.listener()
+    async def on_message(self, message: discord.Message):
+        if message.channel.id in ticket_manager.tickets and not message.author.bot:
+            ticket_manager.touch(message.channel.id)
+
+    @commands.Cog.listener()
+    async def on_guild_channel_delete(self, channel: discord.abc.GuildChannel):
+        ticket_manager.forget(channel.id)
+
+    @commands.command(name="tickets")
+    async def tickets_command(self, ctx):
+        """Open / archived ticket counts and the creation queue."""
+        if ctx.author.id not in TICKET_MANAGERS:
+            return await ctx.send("⛔ You do not have permission to use this command.")
+        archived = len(ticket_manager.tickets) - ticket_manager.open_count
+        await ctx.send(
+            f"🎫 **{ticket_manager.open_count}** open tickets (limit {MAX_OPEN_TICKETS}), "
+            f"**{archived}** archived, **{ticket_manager.waiting}** waiting to be created."
+        )
+
+
+async def setup(bot: commands.Bot):
+    ticket_manager.load()
+    await bot.add_cog(TicketLifecycleCog(bot))
+
+
+# ----------------------------
+# HOT RELOAD
+# ----------------------------
+
+def export_state(bot: commands.Bot) -> dict:
+    return {"manager": ticket_manager, "limit_error": TicketLimitReached}
+
+
+def import_state(bot: commands.Bot, state: dict):
+    # jobboard imported ticket_manager and TicketLimitReached by name, and
+    # reload_extension builds a fresh module, so both keep their identity:
+    # the manager (tickets, open count, queue, listeners) moves onto the
+    # reloaded class, and open() keeps raising the class jobboard catches.
+    global ticket_manager, TicketLimitReached
+    manager = state["manager"]
+    manager.__class__ = TicketManager
+    ticket_manager = manager
+    TicketLimitReached = state["limit_error"]
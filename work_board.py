@@ -0,0 +1,228 @@
+import time
+import traceback
+
+import discord
+from discord.ext import commands, tasks
+from discord.ui import View, Button, button
+
+from embeds import add_embed_footer
+from exporter import exporter, Sheet, GENERAL, TEXT, LEFT
+from outbound import edit_queue, PRIORITY_NORMAL
+from storage import db
+from work_index import work_index
+
+# ----------------------------
+# CONFIG
+# ----------------------------
+
+BOARD_ADMINS = {1370076515429253264, 296181275344109568}
+REFRESH_SECONDS = 60   # at most one edit per board per refresh
+PREVIEW_SIZE = 10
+MAX_DAYS = 90
+
+
+# ----------------------------
+# Rendering
+# ----------------------------
+
+def _in_guild(guild: discord.Guild):
+    return lambda user_id: guild.get_member(user_id) is not None
+
+
+def _display(guild: discord.Guild, user_id: int) -> str:
+    member = guild.get_member(user_id)
+    return member.display_name if member else f"<@{user_id}>"
+
+
+def leaderboard_rows(guild: discord.Guild, days: int):
+    """[(display name, user id, times worked)] for every member still in the guild, best first."""
+    rollup = work_index.window(days)
+    return [(_display(guild, user_id), user_id, count) for user_id, count in rollup.ranked(_in_guild(guild))]
+
+
+def preview_top(guild: discord.Guild, days: int, n: int = PREVIEW_SIZE):
+    """The visible top n as ((user_id, count), ...); equal tuples render identically."""
+    return tuple(work_index.window(days).top(n, _in_guild(guild)))
+
+
+def preview_lines(guild: discord.Guild, top) -> list[str]:
+    return [
+        f"**#{i}** {_display(guild, user_id)} — {count} times"
+        for i, (user_id, count) in enumerate(top, start=1)
+    ]
+
+
+# ----------------------------
+# Excel button
+# ----------------------------
+
+class LeaderboardView(View):
+    """
+    Excel export for a work leaderboard. Rows are read from the work index
+    when the button is pressed, so the file matches the counts at that
+    moment rather than when the message was posted. The custom_id carries
+    the window, which lets live boards re-attach after a restart.
+    """
+
+    def __init__(self, days: int):
+        super().__init__(timeout=None)
+        self.days = days
+        self.ALLOWED_USERS = {296181275344109568, 1370076515429253264}
+        self.download_excel.custom_id = f"work_board:excel:{days}"
+
+    @button(label="📋 Download Excel", style=discord.ButtonStyle.primary)
+    async def download_excel(self, interaction: discord.Interaction, button: Button):
+        if interaction.user.id not in self.ALLOWED_USERS:
+            return await interaction.response.send_message(
+                "❌ You are not allowed to download this file.", ephemeral=True
+            )
+        # Acknowledge first: building the file can outlast the 3 second interaction window.
+        await interaction.response.defer(ephemeral=True, thinking=True)
+        try:
+            rows = [
+                (username, user_id, times, f"/add name: clanlottery tickets: {times} user: <@{user_id}>")
+                for username, user_id, times in leaderboard_rows(interaction.guild, self.days)
+            ]
+            sheet = Sheet(
+                "Leaderboard",
+                ["Discord User", "User ID", "Times Worked", "Add Command"],
+                rows,
+                formats=(GENERAL, TEXT, LEFT, TEXT),
+            )
+            file = await exporter.file([sheet], "work_leaderboard")
+            await interaction.followup.send(
+                f"✅ {exporter.label(file)} file with RaffleBot commands generated!", file=file, ephemeral=True
+            )
+
+        except Exception as e:
+            print("Excel generation failed:", e)
+            await interaction.followup.send(
+                "❌ Failed to generate Excel file.", ephemeral=True
+            )
+
+
+# ----------------------------
+# Live boards
+# ----------------------------
+
+class LiveBoard:
+    __slots__ = ("message_id", "channel_id", "days", "shown")
+
+    def __init__(self, message_id: int, channel_id: int, days: int):
+        self.message_id = message_id
+        self.channel_id = channel_id
+        self.days = days
+        self.shown = None  # top tuple currently on the message
+
+
+def live_embed(guild: discord.Guild, days: int, top) -> discord.Embed:
+    text = "\n".join(preview_lines(guild, top)) or "No completions yet."
+    embed = discord.Embed(
+        title=f"🏆 Live Work Leaderboard (Past {days} Days)",
+        description=f"{text}\n\nUpdated <t:{int(time.time())}:R>",
+        color=discord.Color.green(),
+    )
+    return add_embed_footer(embed)
+
+
+class WorkBoardCog(commands.Cog):
+    """
+    Pinned leaderboard messages that follow the work index.
+
+    Windows are rolling (the last N x 24 hours), so counts change both when
+    completions arrive and when old ones age out. A loop recomputes each
+    board's top 10 once per REFRESH_SECONDS (a few dict lookups against the
+    index) and edits the message only when it differs from what is shown.
+    """
+
+    def __init__(self, bot: commands.Bot):
+        self.bot = bot
+        self.boards = {}  # message id -> LiveBoard
+        for message_id, channel_id, days in db.query(
+            "SELECT message_id, channel_id, days FROM work_live_boards"
+        ):
+            self.boards[message_id] = LiveBoard(message_id, channel_id, days)
+            bot.add_view(LeaderboardView(days), message_id=message_id)
+        self.refresh_loop.start()
+
+    def cog_unload(self):
+        self.refresh_loop.cancel()
+
+    def _drop(self, message_id: int):
+        self.boards.pop(message_id, None)
+        db.write("DELETE FROM work_live_boards WHERE message_id = ?", (message_id,))
+
+    # ------------
+    # Refresh
+    # ------------
+
+    @tasks.loop(seconds=REFRESH_SECONDS)
+    async def refresh_loop(self):
+        for board in list(self.boards.values()):
+            channel = self.bot.get_channel(board.channel_id)
+            if channel is None:
+                continue
+            try:
+                top = preview_top(channel.guild, board.days)
+                if top == board.shown:
+                    continue
+                board.shown = top
+                message = channel.get_partial_message(board.message_id)
+                edit_queue.edit(message, embed=live_embed(channel.guild, board.days, top), priority=PRIORITY_NORMAL)
+            except Exception:
+                traceback.print_exc()
+
+    @refresh_loop.before_loop
+    async def before_refresh_loop(self):
+        await self.bot.wait_until_ready()
+
+    @commands.Cog.listener()
+    async def on_raw_message_delete(self, payload: discord.RawMessageDeleteEvent):
+        if payload.message_id in self.boards:
+            self._drop(payload.message_id)
+            print(f"[WorkBoard] Board {payload.message_id} was deleted; stopped updating it.")
+
+    # ------------
+    # Commands
+    # ------------
+
+    @commands.command(name="workboard")
+    async def workboard(self, ctx, days: str = "30"):
+        """!workboard [days] posts and pins a live leaderboard here; !workboard off removes it."""
+        if ctx.author.id not in BOARD_ADMINS:
+            return await ctx.send("❌ You do not have permission to use this command.")
+
+        if days.lower() == "off":
+            removed = [b for b in self.boards.values() if b.channel_id == ctx.channel.id]
+            if not removed:
+                return await ctx.send("❌ There is no live leaderboard in this channel.")
+            for board in removed:
+                self._drop(board.message_id)
+                try:
+                    await ctx.channel.get_partial_message(board.message_id).unpin()
+                except discord.HTTPException:
+                    pass
+            return await ctx.send("✅ Live leaderboard stopped.")
+
+        if not days.isdigit() or not (1 <= int(days) <= MAX_DAYS):
+            return await ctx.send(f"❌ Please provide a number between 1 and {MAX_DAYS}, or `off`.")
+        days = int(days)
+
+        top = preview_top(ctx.guild, days)
+        message = await ctx.send(embed=live_embed(ctx.guild, days, top), view=LeaderboardView(days))
+        try:
+            await message.pin()
+        except discord.HTTPException:
+            await ctx.send("⚠️ Could not pin the leaderboard (missing Manage Messages?). It will still update.")
+
+        board = LiveBoard(message.id, ctx.channel.id, days)
+        board.shown = top
+        self.boards[message.id] = board
+        db.write(
+            "INSERT OR REPLACE INTO work_live_boards (message_id, channel_id, days) VALUES (?, ?, ?)",
+            (message.id, ctx.channel.id, days),
+        )
+
+
+async def setup(bot: commands.Bot):
+    await bot.add_cog(WorkBoardCog(bot))
@@ -0,0 +1,388 @@
+import asyncio
+import bisect
+import traceback
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+
+import discord
+from discord.ext import commands
+
+from history_scan import HistoryScanner
+from embed_rules import WorkCompletionRule, guild_username_resolver
+from storage import db
+
+# ----------------------------
+# CONFIG
+# ----------------------------
+
+WORK_CHANNEL_ID = 1455637507000762571
+MAX_DAYS = 90  # how far back the first backfill reaches
+
+_WORK_RULE = WorkCompletionRule()
+
+
+def parse_completion(message: discord.Message):
+    """User ids credited by a Karuta "workers have finished" embed, or None if it isn't one."""
+    if not message.author.bot or not message.embeds:
+        return None
+    resolve = guild_username_resolver(message.guild) if message.guild else None
+    return _WORK_RULE.match(message, resolve)
+
+
+# ----------------------------
+# Day rollups
+# ----------------------------
+
+DAY_MS = 86_400_000
+TOP_K = 25  # kept per window; a few spare for members who have since left
+
+
+def day_of(message_id: int) -> int:
+    """UTC day number of a snowflake."""
+    return ((message_id >> 22) + discord.utils.DISCORD_EPOCH) // DAY_MS
+
+
+def today(now: datetime | None = None) -> int:
+    now = now or datetime.now(timezone.utc)
+    return int(now.timestamp() * 1000) // DAY_MS
+
+
+def day_start_snowflake(day: int) -> int:
+    """Smallest snowflake on UTC day `day`."""
+    return (day * DAY_MS - discord.utils.DISCORD_EPOCH) << 22
+
+
+class WorkRollup:
+    """
+    Per-user totals for one window of `days` UTC days (today and the days
+    before it), with a top-k kept sorted as completions arrive.
+
+    Moving to a new day subtracts the buckets that fell out and adds the new
+    ones; the top-k is only rebuilt then, since counts can drop.
+    """
+
+    def __init__(self, days: int, k: int = TOP_K):
+        self.days = days
+        self.k = k
+        self.totals = Counter()
+        self.completions = 0
+        self.start_day = None
+        self.end_day = None
+        self._top = []  # user ids, best first
+
+    def _sort_key(self, user_id):
+        return (-self.totals[user_id], user_id)
+
+    def _rebuild_top(self):
+        self._top = sorted(self.totals, key=self._sort_key)[: self.k]
+
+    def covers(self, day: int) -> bool:
+        return self.start_day <= day <= self.end_day
+
+    def add(self, user_ids):
+        self.completions += 1
+        for user_id in user_ids:
+            self.totals[user_id] += 1
+            if user_id in self._top:
+                self._top.sort(key=self._sort_key)
+            elif len(self._top) < self.k or self._sort_key(user_id) < self._sort_key(self._top[-1]):
+                self._top.append(user_id)
+                self._top.sort(key=self._sort_key)
+                del self._top[self.k:]
+
+    def move_to(self, end_day: int, buckets: dict, day_completions: dict):
+        start_day = end_day - self.days + 1
+        if self.end_day is None or start_day > self.end_day:
+            # First build, or the whole window moved past the old one.
+            self.totals = Counter()
+            self.completions = 0
+            days = range(start_day, end_day + 1)
+        else:
+            for day in range(self.start_day, start_day):
+                self.totals.subtract(buckets.get(day, {}))
+                self.completions -= day_completions.get(day, 0)
+            days = range(self.end_day + 1, end_day + 1)
+        for day in days:
+            self.totals.update(buckets.get(day, {}))
+            self.completions += day_completions.get(day, 0)
+        self.totals = +self.totals  # drop zero counts
+        self.start_day, self.end_day = start_day, end_day
+        self._rebuild_top()
+
+    def top(self, n: int, keep=None):
+        """Up to n (user_id, count), best first; `keep` filters (e.g. still in the guild)."""
+        out = []
+        for user_id in self._top:
+            if keep is None or keep(user_id):
+                out.append((user_id, self.totals[user_id]))
+                if len(out) >= n:
+                    return out
+        if len(self._top) < len(self.totals):
+            # Too many of the kept top-k filtered out; fall back to a full ranking.
+            return self.ranked(keep)[:n]
+        return out
+
+    def ranked(self, keep=None):
+        """Every (user_id, count) in the window, best first."""
+        return [
+            (user_id, self.totals[user_id])
+            for user_id in sorted(self.totals, key=self._sort_key)
+            if keep is None or keep(user_id)
+        ]
+
+
+class WorkWindow:
+    """
+    The last `days` x 24 hours: the whole-day rollup after the cut-off day,
+    plus the completions on the cut-off day itself that are newer than the
+    cut-off (the partial edge bucket). Cheap to build per query; only the
+    edge is counted on the spot.
+    """
+
+    def __init__(self, rollup: WorkRollup, edge: Counter, edge_completions: int):
+        self.rollup = rollup
+        self.edge = edge
+        self.days = rollup.days
+        self.completions = rollup.completions + edge_completions
+        self.totals = rollup.totals + edge if edge else rollup.totals
+
+    def _sort_key(self, user_id):
+        return (-self.totals[user_id], user_id)
+
+    def top(self, n: int, keep=None):
+        """Up to n (user_id, count), best first; `keep` filters (e.g. still in the guild)."""
+        if not self.edge:
+            return self.rollup.top(n, keep)
+        kept = self.rollup._top
+        candidates = sorted(
+            (u for u in set(kept) | set(self.edge) if keep is None or keep(u)),
+            key=self._sort_key,
+        )[:n]
+        if len(kept) < len(self.rollup.totals):
+            # Users outside the rollup's top-k have no edge counts and at most
+            # the k-th total; only a strict lead over that proves the cut.
+            bound = self.rollup.totals[kept[-1]] if kept else 0
+            if len(candidates) < n or self.totals[candidates[-1]] <= bound:
+                return self.ranked(keep)[:n]
+        return [(user_id, self.totals[user_id]) for user_id in candidates]
+
+    def ranked(self, keep=None):
+        """Every (user_id, count) in the window, best first."""
+        return [
+            (user_id, self.totals[user_id])
+            for user_id in sorted(self.totals, key=self._sort_key)
+            if keep is None or keep(user_id)
+        ]
+
+
+# ----------------------------
+# Index
+# ----------------------------
+
+class WorkIndex:
+    """
+    Every work completion ever seen in the work channel, sorted by message
+    snowflake, plus per-user per-day counters. A window of N x 24 hours is
+    answered from a WorkRollup that sums at most N day buckets once and is
+    then kept current, plus the few completions on the partial day at the
+    window's edge, so asking for 7, 30 and 90 days side by side costs next
+    to nothing.
+
+    Completions are mirrored to work_completions; work_index_cursor remembers
+    the newest message scanned (matching or not), so a backfill resumes from
+    there instead of re-reading the channel.
+    """
+
+    def __init__(self, channel_id: int = WORK_CHANNEL_ID):
+        self.channel_id = channel_id
+        self._entries = []      # [(message_id, user_ids)] sorted
+        self._seen = set()      # message ids in _entries
+        self._buckets = {}      # day -> Counter(user_id -> completions credited)
+        self._day_completions = {}  # day -> completions
+        self._rollups = {}      # window days -> WorkRollup
+        self.cursor = None      # newest message id the backfill has covered
+        self.backfilled = asyncio.Event()
+        self._backfill_lock = asyncio.Lock()
+
+    def load(self):
+        rows = db.query(
+            "SELECT message_id, user_ids FROM work_completions WHERE channel_id = ? ORDER BY message_id",
+            (self.channel_id,),
+        )
+        self._entries = [
+            (message_id, tuple(int(uid) for uid in user_ids.split(",") if uid))
+            for message_id, user_ids in rows
+        ]
+        self._seen = {message_id for message_id, _ in self._entries}
+        self._buckets = {}
+        self._day_completions = {}
+        self._rollups = {}
+        for message_id, user_ids in self._entries:
+            self._count(message_id, user_ids)
+        row = db.query("SELECT last_message_id FROM work_index_cursor WHERE channel_id = ?", (self.channel_id,))
+        self.cursor = row[0][0] if row else None
+
+    def __len__(self):
+        return len(self._entries)
+
+    # ------------
+    # Updates
+    # ------------
+
+    def add(self, message_id: int, user_ids: tuple):
+        if message_id in self._seen:
+            return
+        self._seen.add(message_id)
+        entry = (message_id, user_ids)
+        if not self._entries or message_id > self._entries[-1][0]:
+            self._entries.append(entry)
+        else:
+            bisect.insort(self._entries, entry)
+        self._count(message_id, user_ids)
+        day = day_of(message_id)
+        for rollup in self._rollups.values():
+            if rollup.covers(day):
+                rollup.add(user_ids)
+        db.write(
+            "INSERT OR IGNORE INTO work_completions (message_id, channel_id, user_ids) VALUES (?, ?, ?)",
+            (message_id, self.channel_id, ",".join(str(uid) for uid in user_ids)),
+        )
+
+    def _count(self, message_id: int, user_ids: tuple):
+        day = day_of(message_id)
+        bucket = self._buckets.get(day)
+        if bucket is None:
+            bucket = self._buckets[day] = Counter()
+        bucket.update(user_ids)
+        self._day_completions[day] = self._day_completions.get(day, 0) + 1
+
+    def advance(self, message_id: int):
+        if self.cursor is not None and message_id <= self.cursor:
+            return
+        self.cursor = message_id
+        db.write(
+            "INSERT INTO work_index_cursor (channel_id, last_message_id) VALUES (?, ?) "
+            "ON CONFLICT(channel_id) DO UPDATE SET last_message_id = excluded.last_message_id",
+            (self.channel_id, message_id),
+            key=("work_index_cursor", self.channel_id),
+        )
+
+    def observe(self, message: discord.Message):
+        user_ids = parse_completion(message)
+        if user_ids is not None:
+            self.add(message.id, user_ids)
+        # Until the backfill has caught up, moving the cursor would hide the gap behind it.
+        if self.backfilled.is_set():
+            self.advance(message.id)
+
+    async def backfill(self, channel: discord.TextChannel):
+        """Scan everything after the cursor (or the last MAX_DAYS) with a parallel HistoryScanner."""
+        async with self._backfill_lock:
+            if self.cursor is not None:
+                after = self.cursor + 1
+            else:
+                after = datetime.now(timezone.utc) - timedelta(days=MAX_DAYS)
+            scanner = HistoryScanner(channel, after=after)
+            before = len(self._entries)
+            async for message in scanner:
+                user_ids = parse_completion(message)
+                if user_ids is not None:
+                    self.add(message.id, user_ids)
+                if scanner.scanned % 500 == 0:
+                    self.advance(scanner.covered_until)
+            self.advance(scanner.covered_until)
+            self.backfilled.set()
+            print(f"[WorkIndex] Backfill scanned {scanner.scanned} messages, {len(self._entries) - before} new completions.")
+
+    # ------------
+    # Queries
+    # ------------
+
+    def window(self, days: int, now: datetime | None = None) -> WorkWindow:
+        """
+        Completions in the last `days` x 24 hours: the rollup for the `days`
+        UTC days up to today, plus the part of the day before them that is
+        still inside the window (found by bisecting on the snowflake).
+        """
+        now = now or datetime.now(timezone.utc)
+        current = today(now)
+        rollup = self._rollups.get(days)
+        if rollup is None:
+            rollup = self._rollups[days] = WorkRollup(days)
+        if rollup.end_day != current:
+            rollup.move_to(current, self._buckets, self._day_completions)
+
+        cutoff = discord.utils.time_snowflake(now - timedelta(days=days), high=False)
+        lo = bisect.bisect_left(self._entries, (cutoff,))
+        hi = bisect.bisect_left(self._entries, (day_start_snowflake(rollup.start_day),))
+        edge = Counter()
+        for _, user_ids in self._entries[lo:hi]:
+            edge.update(user_ids)
+        return WorkWindow(rollup, edge, max(0, hi - lo))
+
+
+# Shared instance used by every cog.
+work_index = WorkIndex()
+
+
+# ----------------------------
+# Listener cog
+# ----------------------------
+
+class WorkIndexCog(commands.Cog):
+    """Feeds work_index from the gateway and catches up on whatever was missed while offline."""
+
+    def __init__(self, bot: commands.Bot):
+        self.bot = bot
+
+    @commands.Cog.listener()
+    async def on_message(self, message: discord.Message):
+        if message.channel.id == work_index.channel_id:
+            work_index.observe(message)
+
+    async def _catch_up(self):
+        channel = self.bot.get_channel(work_index.channel_id)
+        if channel is None:
+            print(f"[WorkIndex] Work channel {work_index.channel_id} not found; backfill skipped.")
+            return
+        try:
+            await work_index.backfill(channel)
+        except Exception:
+            traceback.print_exc()
+
+    @commands.Cog.listener()
+    async def on_disconnect(self):
+        # Messages posted while offline only come back through the backfill;
+        # live messages after the reconnect must not move the cursor past them.
+        work_index.backfilled.clear()
+
+    @commands.Cog.listener()
+    async def on_ready(self):
+        await self._catch_up()
+
+    @commands.Cog.listener()
+    async def on_resumed(self):
+        # A resumed session replays what it missed, but the cursor was held since
+        # the disconnect; a short scan from it puts it back in step.
+        await self._catch_up()
+
+
+async def setup(bot: commands.Bot):
+    work_index.load()
+    await bot.add_cog(WorkIndexCog(bot))
+
+
+def export_state(bot: commands.Bot) -> dict:
+    return {"index": work_index}
+
+
+def import_state(bot: commands.Bot, state: dict):
+    # Keep the same object (run.py and work_board imported it by name, and
+    # reload_extension builds a fresh module, so no attribute lookup would
+    # follow a swap), but move it onto the reloaded class so the new code
+    # runs. Rollups are rebuilt lazily from the day buckets for the same reason.
+    global work_index
+    index = state["index"]
+    index.__class__ = WorkIndex
+    index._rollups = {}
+    work_index = index